@@ -0,0 +1,120 @@
+import bisect
+from collections import Counter
+from datetime import datetime, timedelta
+
+HEATMAP_WEEKS = 26
+MAX_HEATMAP_WEEKS = 53
+
+
+class TaskAggregates:
+    # Liczniki poprawiane przy kazdej zmianie zadania: liczba zadan na dzien i na priorytet oraz posortowana
+    # lista zajetych dni (min/max data i zakresy dni bez przegladania zadan)
+    def __init__(self):
+        self.total = 0
+        self.undated = 0
+        self.day_counts = {}
+        self.days = []
+        self.priority_counts = {}
+
+    @classmethod
+    def from_counts(cls, date_counts, priority_counts):
+        # Z gotowych licznikow (GROUP BY w bazie, np.unique w kolumnach) - klucze dat to ordinale, 0 = brak daty
+        aggregates = cls()
+        for day, count in date_counts.items():
+            if not count:
+                continue
+            aggregates.total += count
+            if day:
+                aggregates.day_counts[day] = count
+            else:
+                aggregates.undated += count
+        aggregates.days = sorted(aggregates.day_counts)
+        aggregates.priority_counts = {priority: count for priority, count in priority_counts.items() if count}
+        return aggregates
+
+    def add(self, task):
+        self.total += 1
+        self.priority_counts[task.priority] = self.priority_counts.get(task.priority, 0) + 1
+        if task.date is None:
+            self.undated += 1
+            return
+        day = task.date.toordinal()
+        count = self.day_counts.get(day, 0)
+        self.day_counts[day] = count + 1
+        if not count:
+            bisect.insort(self.days, day)
+
+    def add_all(self, tasks):
+        # Duza partia (wczytywanie) - zliczenie w jednym przejsciu, lista dni sortowana raz
+        dates = Counter(task.date for task in tasks)
+        priorities = Counter(task.priority for task in tasks)
+        for priority, count in priorities.items():
+            self.priority_counts[priority] = self.priority_counts.get(priority, 0) + count
+        added = False
+        for date, count in dates.items():
+            self.total += count
+            if date is None:
+                self.undated += count
+                continue
+            day = date.toordinal()
+            previous = self.day_counts.get(day, 0)
+            self.day_counts[day] = previous + count
+            added = added or not previous
+        if added:
+            self.days = sorted(self.day_counts)
+
+    def remove(self, task):
+        self.total -= 1
+        count = self.priority_counts.get(task.priority, 0) - 1
+        if count > 0:
+            self.priority_counts[task.priority] = count
+        else:
+            self.priority_counts.pop(task.priority, None)
+        if task.date is None:
+            self.undated -= 1
+            return
+        day = task.date.toordinal()
+        count = self.day_counts.get(day, 0) - 1
+        if count > 0:
+            self.day_counts[day] = count
+            return
+        self.day_counts.pop(day, None)
+        position = bisect.bisect_left(self.days, day)
+        if position < len(self.days) and self.days[position] == day:
+            del self.days[position]
+
+    def min_max_dates(self):
+        if not self.days:
+            return None, None
+        return datetime.fromordinal(self.days[0]), datetime.fromordinal(self.days[-1])
+
+    def day_range(self, min_date=None, max_date=None):
+        # (ordinal, liczba) dla zajetych dni w zakresie - wyszukiwanie binarne granic
+        start = bisect.bisect_left(self.days, min_date.toordinal()) if min_date else 0
+        end = bisect.bisect_right(self.days, max_date.toordinal()) if max_date else len(self.days)
+        return [(day, self.day_counts[day]) for day in self.days[start:end]]
+
+
+def heatmap_window(controller, weeks=HEATMAP_WEEKS):
+    # Okno mapy obciazenia: zakres filtra dat, a bez niego pol roku od najwczesniejszej daty; pelne tygodnie
+    min_date, max_date = controller.filtered_date
+    if min_date is None:
+        min_date = controller.get_min_max_dates()[0] if max_date is None else max_date - timedelta(weeks=weeks)
+    start = min_date - timedelta(days=min_date.weekday())
+    end = max_date or start + timedelta(weeks=weeks, days=-1)
+    return start, min(end, start + timedelta(weeks=MAX_HEATMAP_WEEKS, days=-1))
+
+
+def heatmap_grid(days, start, end):
+    # Wiersze = dni tygodnia od poniedzialku, kolumny = tygodnie od `start`
+    counts = {date.toordinal(): count for date, count in days}
+    first = start.toordinal()
+    weeks = (end.toordinal() - first) // 7 + 1
+    return [[counts.get(first + week * 7 + weekday, 0) for week in range(weeks)] for weekday in range(7)]
+
+
+def heatmap_level(count, peak, levels=4):
+    # 0 = wolny dzien, 1..levels proporcjonalnie do najbardziej obciazonego dnia w oknie
+    if not count:
+        return 0
+    return min(levels, 1 + (count * levels - 1) // peak)
@@ -0,0 +1,110 @@
+import copy
+import threading
+import time
+
+
+class AutosaveWorker:
+    def __init__(self, storage, delay=0.5, max_delay=5.0):
+        self.storage = storage
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}
+        self.snapshot = None
+        self.compact_requested = False
+        self.changes = 0
+        self.closing = False
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    @property
+    def dirty(self):
+        return bool(self.pending) or self.snapshot is not None or self.compact_requested
+
+    def submit(self, operation, task):
+        self.submit_changes([(operation, task)])
+
+    def submit_changes(self, changes):
+        with self.condition:
+            for operation, task in changes:
+                self.coalesce(operation, task)
+            self.changes += 1
+            self.condition.notify()
+
+    def coalesce(self, operation, task):
+        # Kopia zadania (ze wszystkimi polami, tez regula powtarzania) - watek zapisu nie dotyka obiektow,
+        # ktore edytuje interfejs
+        record = copy.copy(task)
+        previous = self.pending.get(task.id)
+        if previous is None:
+            self.pending[task.id] = (operation, record)
+        elif operation == "delete":
+            if previous[0] == "add":
+                del self.pending[task.id]
+            else:
+                self.pending[task.id] = (operation, record)
+        else:
+            # add + edit zostaje dodaniem z najnowszymi danymi
+            self.pending[task.id] = (previous[0] if previous[0] == "add" else operation, record)
+
+    def submit_snapshot(self, tasks):
+        # Oczekujace zmiany zostaja - trafiaja do dziennika przed kompaktowaniem, ktore widza tez inne procesy
+        with self.condition:
+            self.snapshot = tasks
+            self.changes += 1
+            self.condition.notify()
+
+    def submit_compaction(self):
+        # Kompaktowanie magazynu, ktory sam buduje snapshot (compacts_from_disk) - kontroler nie kopiuje zadan
+        with self.condition:
+            self.compact_requested = True
+            self.changes += 1
+            self.condition.notify()
+
+    def take_pending(self):
+        snapshot, compact, changes = self.snapshot, self.compact_requested, list(self.pending.values())
+        self.snapshot = None
+        self.compact_requested = False
+        self.pending = {}
+        return snapshot, compact, changes
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closing:
+                    self.condition.wait()
+                if not self.dirty:
+                    return
+
+                # Czekamy, az zmiany ucichna na `delay` sekund (ale nie dluzej niz `max_delay`)
+                started = time.monotonic()
+                seen = self.changes
+                while not self.closing and time.monotonic() - started < self.max_delay:
+                    self.condition.wait(self.delay)
+                    if self.changes == seen:
+                        break
+                    seen = self.changes
+            self.flush()
+
+    def write(self, snapshot, compact, changes):
+        self.storage.record_changes(changes)
+        if snapshot is not None:
+            self.storage.compact(snapshot)
+        elif compact:
+            self.storage.compact(None)
+
+    def flush(self):
+        # Pobranie i zapis pod jedna blokada - flush() z innego watku nie zapisze nowszych zmian przed starszymi,
+        # ktore watek zapisu juz pobral
+        with self.write_lock:
+            with self.condition:
+                snapshot, compact, changes = self.take_pending()
+            self.write(snapshot, compact, changes)
+
+    def close(self):
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join()
+        self.flush()
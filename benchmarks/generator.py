@@ -0,0 +1,52 @@
+import csv
+import random
+from datetime import date, timedelta
+
+VERBS = ["plan", "optimize", "coordinate", "write", "train", "test", "refactor", "design", "audit", "review",
+         "research", "prepare", "debug", "create", "analyze", "organize", "update", "sync", "schedule", "manage"]
+NOUNS = ["release", "report", "budget", "meeting", "database", "campaign", "dashboard", "backlog", "server",
+         "invoice", "roadmap", "onboarding", "newsletter", "migration", "workshop", "survey", "contract", "API"]
+WORDS = ["the", "for", "with", "new", "team", "product", "client", "issues", "metrics", "quarterly", "customer",
+         "launch", "system", "project", "trends", "documentation", "feedback", "online", "security", "review"]
+
+# Rozklad priorytetow jak w typowym planerze - duzo srednich, malo krytycznych
+PRIORITIES = [None, 1, 2, 3, 4, 5]
+PRIORITY_WEIGHTS = [10, 15, 25, 25, 15, 10]
+
+
+def generate_rows(count, seed=0, start_id=1, center=date(2024, 11, 15), spread_days=120, undated_ratio=0.1):
+    # Wiersze w formacie tasks.csv generowane strumieniowo - 1e7 wierszy nie trafia naraz do pamieci
+    rng = random.Random(seed)
+    center = center.toordinal()
+    for task_id in range(start_id, start_id + count):
+        title = f"{rng.choice(VERBS)} {rng.choice(NOUNS)}"
+        if rng.random() < 0.3:
+            title += f" {rng.randint(1, 999)}"
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))).capitalize() + "."
+
+        if rng.random() < undated_ratio:
+            date_str = ""
+        else:
+            # Terminy skupione wokol "dzisiaj", z dlugim ogonem w przeszlosc i przyszlosc
+            offset = int(rng.gauss(0, spread_days / 3))
+            date_str = date.fromordinal(center + max(-spread_days * 3, min(spread_days * 3, offset))).isoformat()
+
+        priority = rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0]
+        yield [title, description, date_str, "" if priority is None else priority, task_id]
+
+
+def write_tasks_csv(filename, count, seed=0):
+    with open(filename, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Title", "Description", "Date", "Priority", "ID"])
+        writer.writerows(generate_rows(count, seed))
+    return filename
+
+
+def sample_ids(count, samples, seed=0):
+    rng = random.Random(seed + 1)
+    return [rng.randint(1, count) for _ in range(samples)]
+
+
+def center_window(days, center=date(2024, 11, 15)):
+    return (center - timedelta(days=days // 2)).isoformat(), (center + timedelta(days=days // 2)).isoformat()
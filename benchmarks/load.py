@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import write_tasks_csv
+from benchmarks.run import FILTER_SHAPES, parse_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Udzial rodzajow zapytan - przewaga odczytow jak u uzytkownikow przegladajacych liste
+MIX = (
+    ("page", 0.70),
+    ("get", 0.10),
+    ("changes", 0.10),
+    ("add", 0.05),
+    ("edit", 0.03),
+    ("delete", 0.02),
+)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def filter_query(shape, offset, limit):
+    min_date, max_date, min_priority, max_priority, name, descriptions = FILTER_SHAPES[shape]
+    params = {"min_date": min_date or "", "max_date": max_date or "", "min_priority": min_priority or "",
+              "max_priority": max_priority or "", "name": name, "descriptions": int(descriptions),
+              "offset": offset, "limit": limit}
+    return "/tasks?" + "&".join(f"{key}={value}".replace(" ", "+") for key, value in params.items())
+
+
+class LoadClient:
+    # Jedno polaczenie keep-alive na klienta, minimalny klient HTTP na strumieniach asyncio
+    def __init__(self, address):
+        self.address = address
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        if self.address.startswith("unix:"):
+            self.reader, self.writer = await asyncio.open_unix_connection(self.address[len("unix:"):])
+        else:
+            host, _, port = self.address.rpartition(":")
+            self.reader, self.writer = await asyncio.open_connection(host, int(port))
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_client(address, deadline, rate, rng, known_ids, latencies, errors):
+    client = LoadClient(address)
+    await client.connect()
+    kinds, weights = zip(*MIX)
+    shapes = list(FILTER_SHAPES)
+    revision = 0
+    next_at = time.perf_counter()
+    try:
+        while time.perf_counter() < deadline:
+            # Otwarta petla ze stalym tempem - opoznienia serwera nie zanizaja liczby zapytan
+            next_at += rng.expovariate(rate)
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            kind = rng.choices(kinds, weights)[0]
+            task_id = rng.choice(known_ids)
+            if kind == "page":
+                request = ("GET", filter_query(rng.choice(shapes), rng.choice((0, 0, 0, 50, 500)), 50), None)
+            elif kind == "get":
+                request = ("GET", f"/tasks/{task_id}", None)
+            elif kind == "changes":
+                request = ("GET", f"/changes?since={revision}", None)
+            elif kind == "add":
+                request = ("POST", "/tasks", {"title": f"load {rng.randrange(10 ** 6)}", "description": "load test",
+                                              "date": "2024-11-15", "priority": rng.randint(1, 5)})
+            elif kind == "edit":
+                request = ("PATCH", f"/tasks/{task_id}", {"priority": rng.randint(1, 5)})
+            else:
+                request = ("DELETE", f"/tasks/{task_id}", None)
+
+            started = time.perf_counter()
+            status, payload = await client.request(*request)
+            latencies.setdefault(kind, []).append(time.perf_counter() - started)
+            if kind == "changes" and status == 200:
+                revision = payload["revision"]
+            elif kind == "add" and status == 201:
+                known_ids.extend(payload["ids"])
+            elif status >= 400 and not (status == 404 and kind in ("get", "edit", "delete")):
+                # 404 dla zadania usunietego przez innego klienta jest oczekiwane
+                errors.append((kind, status, payload))
+    finally:
+        await client.close()
+
+
+async def run_load(address, clients, duration, rate, seed, known_ids):
+    latencies = {}
+    errors = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(run_client(address, deadline, rate / clients, random.Random(seed + number),
+                                      known_ids, latencies, errors) for number in range(clients)))
+    return latencies, errors
+
+
+def start_server(directory, rows, seed, socket_path=None):
+    write_tasks_csv(os.path.join(directory, "tasks.csv"), rows, seed)
+    command = [sys.executable, os.path.join(ROOT, "main.py"), "serve"]
+    command += ["--socket", socket_path] if socket_path else ["--port", "0"]
+    process = subprocess.Popen(command, cwd=directory, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Listening on "):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    return process, line[len("Listening on "):].strip()
+
+
+def summarize(latencies, duration):
+    report = {}
+    everything = [value for values in latencies.values() for value in values]
+    for kind, values in sorted(latencies.items()) + [("all", everything)]:
+        report[kind] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.50) * 1e3,
+            "p95_ms": percentile(values, 0.95) * 1e3,
+            "p99_ms": percentile(values, 0.99) * 1e3,
+            "max_ms": max(values, default=0.0) * 1e3,
+        }
+        print(f"{kind:<10} {len(values):8d} req  p50 {report[kind]['p50_ms']:7.2f} ms  "
+              f"p95 {report[kind]['p95_ms']:7.2f} ms  p99 {report[kind]['p99_ms']:7.2f} ms  "
+              f"max {report[kind]['max_ms']:7.2f} ms", file=sys.stderr)
+    report["requests_per_second"] = len(everything) / duration
+    print(f"{report['requests_per_second']:.0f} requests/s", file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test obciazenia lokalnego serwera (main.py serve)")
+    parser.add_argument("--rows", type=parse_rows, default=100000, help="Liczba zadan na serwerze (domyslnie 1e5)")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno danych i zapytan")
+    parser.add_argument("--clients", type=int, default=32, help="Liczba rownoleglych polaczen (domyslnie 32)")
+    parser.add_argument("--rate", type=float, default=500, help="Laczna liczba zapytan na sekunde (domyslnie 500)")
+    parser.add_argument("--duration", type=float, default=10, help="Czas trwania w sekundach (domyslnie 10)")
+    parser.add_argument("--socket", action="store_true", help="Polacz przez gniazdo Unix zamiast TCP")
+    parser.add_argument("--p99-ms", type=float, default=10.0, help="Docelowe p99 w ms (domyslnie 10)")
+    parser.add_argument("--output", metavar="PLIK", help="Zapisz wyniki JSON do pliku")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="planner-load-")
+    socket_path = os.path.join(directory, "planner.sock") if args.socket else None
+    process = None
+    try:
+        started = time.perf_counter()
+        process, address = start_server(directory, args.rows, args.seed, socket_path)
+        print(f"server ready at {address} in {time.perf_counter() - started:.2f} s", file=sys.stderr)
+        known_ids = list(range(1, args.rows + 1))
+        latencies, errors = asyncio.run(run_load(address, args.clients, args.duration, args.rate, args.seed,
+                                                 known_ids))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = summarize(latencies, args.duration)
+    report.update(rows=args.rows, clients=args.clients, target_rate=args.rate, errors=len(errors))
+    if args.output:
+        with open(args.output, mode="w") as file:
+            json.dump(report, file, indent=2)
+    for kind, status, payload in errors[:5]:
+        print(f"error: {kind} -> {status} {payload}", file=sys.stderr)
+
+    if errors:
+        return 1
+    if report["all"]["p99_ms"] > args.p99_ms:
+        print(f"p99 {report['all']['p99_ms']:.2f} ms exceeds the {args.p99_ms:.1f} ms target", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
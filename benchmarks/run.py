@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.generator import center_window, sample_ids, write_tasks_csv
+from controller import CSVStorage, PlannerController
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+FILTER_SHAPES = {
+    "all": (None, None, None, None, "", False),
+    "date_30d": center_window(30) + (None, None, "", False),
+    "priority_4_5": (None, None, "4", "5", "", False),
+    "date_90d_priority_3_5": center_window(90) + ("3", "5", "", False),
+    "name_common": (None, None, None, None, "plan", False),
+    "name_rare": (None, None, None, None, "release 999", False),
+    "name_descriptions": (None, None, None, None, "security", True),
+}
+
+
+class BenchmarkRunner:
+    def __init__(self, repeat=3, memory=True):
+        self.repeat = repeat
+        self.memory = memory
+        self.results = {}
+
+    def measure(self, name, func, items=1, setup=None, repeat=None, **extra):
+        timings = []
+        result = None
+        for _ in range(repeat or self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+
+        record = {
+            "seconds": min(timings),
+            "median_seconds": statistics.median(timings),
+            "items": items,
+            "items_per_second": items / min(timings) if min(timings) > 0 else None,
+        }
+        if self.memory:
+            # Osobny przebieg pod tracemalloc - sledzenie alokacji spowalnia kod kilkukrotnie
+            tracemalloc.start()
+            if setup:
+                setup()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            record["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1] - current
+            tracemalloc.stop()
+        record.update(extra)
+        if callable(record.get("matches")):
+            record["matches"] = record["matches"](result)
+        self.results[name] = record
+        print(f"{name:<32} {record['seconds'] * 1e3:12.3f} ms", file=sys.stderr)
+        return result
+
+
+def create_controller(backend, filename, directory):
+    storage = CSVStorage(filename, os.path.join(directory, "errors.log"))
+    if backend == "columnar":
+        return PlannerController(storage, columnar=True)
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        database = SQLiteStorage(os.path.join(directory, "tasks.db"), os.path.join(directory, "errors.log"))
+        database.save_tasks(storage.load_tasks())
+        return PlannerController(database)
+    return PlannerController(storage)
+
+
+def run_benchmarks(rows, seed=0, backend="memory", repeat=3, memory=True):
+    runner = BenchmarkRunner(repeat, memory)
+    directory = tempfile.mkdtemp(prefix="planner-bench-")
+    try:
+        source = write_tasks_csv(os.path.join(directory, "source.csv"), rows, seed)
+        log_filename = os.path.join(directory, "errors.log")
+
+        # Storage CSV: odczyt i zapis calego pliku
+        tasks = runner.measure("csv_load_tasks", CSVStorage(source, log_filename, journal=False).load_tasks,
+                               items=rows, repeat=min(repeat, 2))
+        output = CSVStorage(os.path.join(directory, "saved.csv"), log_filename, journal=False)
+        runner.measure("csv_save_tasks", lambda: output.save_tasks(tasks), items=rows, repeat=min(repeat, 2))
+        del tasks
+
+        working = os.path.join(directory, "tasks.csv")
+        shutil.copy(source, working)
+        controller = runner.measure("controller_build", lambda: create_controller(backend, working, directory),
+                                    items=rows, repeat=1)
+        if memory:
+            # Przebieg pomiaru pamieci zbudowal drugi kontroler - odtwarzamy stan z pliku zrodlowego
+            shutil.copy(source, working)
+            controller = create_controller(backend, working, directory)
+
+        for shape, (min_date, max_date, min_priority, max_priority, name, descriptions) in FILTER_SHAPES.items():
+            controller.clear_filters()
+            error = controller.set_filter(min_date, max_date, min_priority, max_priority, name, descriptions)
+            if error:
+                raise ValueError(f"{shape}: {error}")
+            runner.measure(f"filter_{shape}", controller.get_filtered_tasks, setup=controller.invalidate_view,
+                           matches=len)
+        controller.clear_filters()
+        controller.set_filter(None, None, None, None, "")
+
+        for sort_key in ("date", "priority"):
+            for reverse in (False, True):
+                controller.set_sort(sort_key, reverse)
+                runner.measure(f"sort_{sort_key}_{'desc' if reverse else 'asc'}", controller.get_filtered_tasks,
+                               setup=controller.invalidate_view, matches=len)
+        controller.set_sort("date", False)
+
+        lookups = sample_ids(rows, 10000, seed)
+        runner.measure("get_task_by_id", lambda: [controller.get_task_by_id(task_id) for task_id in lookups],
+                       items=len(lookups))
+        runner.measure("get_min_max_dates", controller.get_min_max_dates)
+
+        # Usuwanie jest nieodwracalne - kazdy przebieg dostaje wlasna porcje identyfikatorow
+        victims = iter(list(dict.fromkeys(sample_ids(rows, 20000, seed + 1))))
+        batch_size = min(1000, rows // 10)
+
+        def delete_batch():
+            for task_id, _ in zip(victims, range(batch_size)):
+                controller.delete_task(task_id)
+
+        runner.measure("delete_task", delete_batch, items=batch_size)
+        controller.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "meta": {
+            "rows": rows,
+            "seed": seed,
+            "backend": backend,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": runner.results,
+    }
+
+
+def compare(report, baseline, tolerance, min_delta=0.001):
+    regressions = []
+    for key in ("rows", "backend"):
+        if report["meta"].get(key) != baseline["meta"].get(key):
+            print(f"Warning: baseline {key} is {baseline['meta'].get(key)}, current run uses {report['meta'].get(key)}",
+                  file=sys.stderr)
+
+    print(f"\n{'benchmark':<32} {'baseline [ms]':>14} {'current [ms]':>14} {'ratio':>8}", file=sys.stderr)
+    for name, record in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = record["seconds"] / previous["seconds"]
+        # Bardzo krotkie pomiary sa zaszumione - wymagamy tez bezwzglednej roznicy czasu
+        slower = record["seconds"] - previous["seconds"] > min_delta
+        status = "REGRESSION" if ratio > 1 + tolerance and slower else ""
+        if status:
+            regressions.append(name)
+        print(f"{name:<32} {previous['seconds'] * 1e3:14.3f} {record['seconds'] * 1e3:14.3f} {ratio:8.2f} {status}",
+              file=sys.stderr)
+    return regressions
+
+
+def parse_rows(value):
+    rows = int(float(value))
+    if not 1e3 <= rows <= 1e7:
+        raise argparse.ArgumentTypeError("rows must be between 1e3 and 1e7")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark kontrolera i storage na syntetycznych danych")
+    parser.add_argument("--rows", type=parse_rows, default=100000, help="Liczba zadan, od 1e3 do 1e7 (domyslnie 1e5)")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno generatora danych")
+    parser.add_argument("--backend", choices=["memory", "columnar", "sqlite"], default="memory",
+                        help="Tryb kontrolera")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtorzen (liczy sie najlepszy czas)")
+    parser.add_argument("--no-memory", action="store_true", help="Pomin pomiar pamieci przez tracemalloc")
+    parser.add_argument("--output", metavar="PLIK", help="Zapisz wyniki JSON do pliku (domyslnie stdout)")
+    parser.add_argument("--baseline", metavar="PLIK", nargs="?", const=DEFAULT_BASELINE,
+                        help="Porownaj z zapisanym baseline (domyslnie benchmarks/baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Dopuszczalne spowolnienie (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Minimalna bezwzgledna roznica uznawana za regresje (ms)")
+    parser.add_argument("--save-baseline", metavar="PLIK", nargs="?", const=DEFAULT_BASELINE,
+                        help="Zapisz wyniki jako nowy baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.rows, args.seed, args.backend, args.repeat, not args.no_memory)
+
+    if args.output:
+        with open(args.output, mode="w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if args.save_baseline:
+        with open(args.save_baseline, mode="w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, mode="r") as file:
+            regressions = compare(report, json.load(file), args.tolerance, args.min_delta_ms / 1e3)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
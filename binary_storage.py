@@ -0,0 +1,369 @@
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from controller import Storage
+from columnar import LazyTaskList, aggregate_counts
+from model import Task
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class BinaryStorage(Storage):
+    queryable = True
+    supports_recurrence = False
+
+    # Naglowek: magic, wersja, dlugosc rekordu, liczba usunietych rekordow, bajty nieuzywanych tekstow
+    HEADER = struct.Struct("<4sHHQQ8x")
+    MAGIC = b"PLNR"
+    HEAP_MAGIC = b"PLNS"
+    VERSION = 1
+    # Rekord stalej dlugosci: id, data (ordinal, 0 = brak), priorytet (0 = brak), flagi,
+    # a teksty jako (offset, dlugosc) w osobnym pliku-stercie
+    RECORD = struct.Struct("<qiBB2xQIQI")
+    DELETED = 1
+    DATE_OFFSET = 8
+    PRIORITY_OFFSET = 12
+    FLAGS_OFFSET = 13
+    TEXT_OFFSET = 16
+
+    def __init__(self, filename="tasks.bin", log_filename="errors.log", compact_ratio=0.5):
+        if np is None:
+            raise ImportError("Binary storage requires numpy.")
+        self.filename = filename
+        self.heap_filename = filename + ".strings"
+        self.log_filename = log_filename
+        self.compact_ratio = compact_ratio
+        self.sort_orders = {}
+
+        logging.basicConfig(
+            filename=self.log_filename,
+            level=logging.ERROR,
+            format="%(asctime)s - %(levelname)s - %(message)s"
+        )
+
+        if not os.path.exists(filename):
+            self.write_files(filename, self.heap_filename, [])
+        self.open_maps()
+
+    # --- pliki i mapowanie ---
+
+    @classmethod
+    def write_files(cls, filename, heap_filename, tasks):
+        # Pliki tymczasowe i podmiana - blad w polowie zapisu nie zostawia uszkodzonego pliku
+        count = cls.write_temp_files(filename, heap_filename, tasks)
+        os.replace(heap_filename + ".tmp", heap_filename)
+        os.replace(filename + ".tmp", filename)
+        return count
+
+    @classmethod
+    def write_temp_files(cls, filename, heap_filename, tasks):
+        # Zapis do filename.tmp i heap_filename.tmp; przy bledzie pliki tymczasowe sa usuwane, a wyjatek idzie dalej
+        temp_filenames = (filename + ".tmp", heap_filename + ".tmp")
+        try:
+            return cls.write_records(*temp_filenames, tasks)
+        except BaseException:
+            for temp_filename in temp_filenames:
+                if os.path.exists(temp_filename):
+                    os.remove(temp_filename)
+            raise
+
+    @classmethod
+    def write_records(cls, filename, heap_filename, tasks):
+        # Rekordy posortowane po id - get_task szuka binarnie bez wczytywania pliku
+        tasks = sorted(tasks, key=lambda task: task.id)
+        with open(filename, mode="wb") as records, open(heap_filename, mode="wb") as heap:
+            records.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.RECORD.size, 0, 0))
+            heap.write(cls.HEAP_MAGIC)
+            position = len(cls.HEAP_MAGIC)
+            for task in tasks:
+                title = task.title.encode("utf-8")
+                description = task.description.encode("utf-8")
+                heap.write(title)
+                heap.write(description)
+                records.write(cls.pack_record(task, position, len(title), position + len(title), len(description)))
+                position += len(title) + len(description)
+            for file in (records, heap):
+                file.flush()
+                os.fsync(file.fileno())
+        return len(tasks)
+
+    @classmethod
+    def pack_record(cls, task, title_offset, title_length, description_offset, description_length):
+        date = task.date.toordinal() if task.date else 0
+        priority = task.priority if task.priority is not None else 0
+        if not 0 < priority < 256 and task.priority is not None:
+            raise ValueError(f"Priority {task.priority} of task {task.id} does not fit the binary format.")
+        if task.recurrence is not None:
+            raise ValueError(f"Recurring task {task.id} does not fit the binary format.")
+        return cls.RECORD.pack(task.id, date, priority, 0, title_offset, title_length,
+                               description_offset, description_length)
+
+    def open_maps(self):
+        self.records_file = open(self.filename, mode="r+b")
+        self.heap_file = open(self.heap_filename, mode="r+b")
+        magic, version, record_size, _, _ = self.HEADER.unpack(self.records_file.read(self.HEADER.size))
+        if magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD.size:
+            raise ValueError(f"{self.filename} is not a planner binary file (version {self.VERSION}).")
+        self.map_files()
+
+    def map_files(self):
+        self.records = mmap.mmap(self.records_file.fileno(), 0)
+        self.heap = mmap.mmap(self.heap_file.fileno(), 0)
+        self.sort_orders = {}
+
+    def close_maps(self):
+        self.records.close()
+        self.heap.close()
+
+    def close(self):
+        self.close_maps()
+        self.records_file.close()
+        self.heap_file.close()
+
+    @property
+    def count(self):
+        return (len(self.records) - self.HEADER.size) // self.RECORD.size
+
+    def header_counters(self):
+        _, _, _, deleted, garbage = self.HEADER.unpack_from(self.records, 0)
+        return deleted, garbage
+
+    def set_header_counters(self, deleted, garbage):
+        self.records[:self.HEADER.size] = self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size, deleted, garbage)
+
+    def column(self, name):
+        # Widok numpy bezposrednio na mapowanym pliku - bez kopiowania. Nie przechowujemy go,
+        # bo zywy widok blokuje ponowne mapowanie po dopisaniu rekordow.
+        dtype = np.dtype([("id", "<i8"), ("date", "<i4"), ("priority", "u1"), ("flags", "u1"), ("pad", "V2"),
+                          ("title_offset", "<u8"), ("title_length", "<u4"),
+                          ("description_offset", "<u8"), ("description_length", "<u4")])
+        return np.frombuffer(self.records, dtype=dtype, count=self.count, offset=self.HEADER.size)[name]
+
+    @property
+    def ids(self):
+        return self.column("id")
+
+    # --- odczyt ---
+
+    def record_offset(self, row):
+        return self.HEADER.size + int(row) * self.RECORD.size
+
+    def task_at(self, row):
+        task_id, date, priority, _, title_offset, title_length, description_offset, description_length = \
+            self.RECORD.unpack_from(self.records, self.record_offset(row))
+        title = self.heap[title_offset:title_offset + title_length].decode("utf-8")
+        description = self.heap[description_offset:description_offset + description_length].decode("utf-8")
+        return Task(title, description, datetime.fromordinal(date) if date else None, priority or None, task_id)
+
+    def row_of(self, task_id):
+        ids = self.ids
+        row = int(np.searchsorted(ids, task_id))
+        if row < len(ids) and ids[row] == task_id and not self.records[self.record_offset(row) + self.FLAGS_OFFSET] \
+                & self.DELETED:
+            return row
+        return None
+
+    def live_rows(self):
+        return np.flatnonzero((self.column("flags") & self.DELETED) == 0)
+
+    def get_task(self, task_id):
+        row = self.row_of(task_id)
+        return self.task_at(row) if row is not None else None
+
+    def iter_tasks(self):
+        for row in self.live_rows():
+            yield self.task_at(row)
+
+    def load_tasks(self):
+        return list(self.iter_tasks())
+
+    def max_task_id(self):
+        return int(self.ids[-1]) if self.count else 0
+
+    def get_min_max_dates(self):
+        dates = self.column("date")[self.live_rows()]
+        dates = dates[dates > 0]
+        if not len(dates):
+            return datetime.now().date(), datetime.now().date()
+        return datetime.fromordinal(int(dates.min())), datetime.fromordinal(int(dates.max()))
+
+    def aggregate_counts(self):
+        rows = self.live_rows()
+        return aggregate_counts(self.column("date")[rows], self.column("priority")[rows])
+
+    def sorted_order(self, sort_key):
+        # Rekordy leza po id, wiec stabilny sort po dacie (i priorytecie) daje kolejnosc (data, id)
+        if sort_key not in self.sort_orders:
+            key = self.column("date").astype(np.int64)
+            if sort_key == "priority":
+                key |= self.column("priority").astype(np.int64) << 32
+            self.sort_orders[sort_key] = np.argsort(key, kind="stable")
+        return self.sort_orders[sort_key]
+
+    def text_matches(self, rows, name, search_descriptions):
+        # Teksty dekodujemy tylko dla wierszy, ktore przeszly filtry dat i priorytetu
+        needle = name.lower()
+        fields = ("title", "description") if search_descriptions else ("title",)
+        spans = [(self.column(f"{field}_offset")[rows].tolist(), self.column(f"{field}_length")[rows].tolist())
+                 for field in fields]
+        heap = self.heap
+        keep = np.zeros(len(rows), dtype=bool)
+        for offsets, lengths in spans:
+            for position, (offset, length) in enumerate(zip(offsets, lengths)):
+                if not keep[position] and needle in heap[offset:offset + length].decode("utf-8").lower():
+                    keep[position] = True
+        return rows[keep]
+
+    def query_tasks(self, min_date, max_date, min_priority, max_priority, name, sort_key="date", reverse=False,
+                    search_descriptions=False):
+        mask = (self.column("flags") & self.DELETED) == 0
+        dates = self.column("date")
+        priorities = self.column("priority")
+        if min_date:
+            mask &= dates >= min_date.toordinal()
+        if max_date:
+            mask &= dates <= max_date.toordinal()
+        # Brak priorytetu zapisany jako 0 - jak brak daty przechodzi tylko filtr bez dolnej granicy
+        if min_priority is not None:
+            mask &= priorities >= min_priority
+        if max_priority is not None:
+            mask &= priorities <= max_priority
+        del dates, priorities
+
+        order = self.sorted_order(sort_key)
+        rows = order[mask[order]]
+        if name:
+            rows = self.text_matches(rows, name, search_descriptions)
+        if reverse:
+            rows = rows[::-1]
+        return LazyTaskList(self, rows)
+
+    def query_page(self, offset, limit, min_date, max_date, min_priority, max_priority, name, sort_key="date",
+                   reverse=False, search_descriptions=False):
+        # Rekordy czytane z mapy tylko dla strony
+        tasks = self.query_tasks(min_date, max_date, min_priority, max_priority, name, sort_key, reverse,
+                                 search_descriptions)
+        return tasks[offset:offset + limit], len(tasks)
+
+    # --- zapis ---
+
+    def save_tasks(self, tasks):
+        try:
+            self.write_tasks(tasks)
+        except Exception as e:
+            logging.error(f"Error saving data to {self.filename}: {e}")
+
+    def write_tasks(self, tasks):
+        # Nowe pliki obok starych i podmiana - `tasks` moze byc generatorem czytajacym z obecnej mapy
+        self.write_temp_files(self.filename, self.heap_filename, tasks)
+        self.close()
+        os.replace(self.heap_filename + ".tmp", self.heap_filename)
+        os.replace(self.filename + ".tmp", self.filename)
+        self.open_maps()
+
+    def record_change(self, operation, task):
+        self.record_changes([(operation, task)])
+
+    def record_changes(self, changes):
+        deleted, garbage = self.header_counters()
+        appended = []
+        try:
+            for operation, task in changes:
+                if operation == "add":
+                    appended.append(task)
+                    continue
+                row = self.row_of(task.id)
+                if row is None:
+                    continue
+                offset = self.record_offset(row)
+                if operation == "delete":
+                    # Jeden bajt flagi w miejscu; miejsce odzyskuje kompakcja
+                    self.records[offset + self.FLAGS_OFFSET] |= self.DELETED
+                    deleted += 1
+                elif operation == "edit":
+                    garbage += self.update_record(offset, task)
+            if appended:
+                self.append_records(appended)
+            self.set_header_counters(deleted, garbage)
+            self.records.flush()
+        except (OSError, ValueError) as e:
+            logging.error(f"Error applying {len(changes)} changes to {self.filename}: {e}")
+        self.sort_orders = {}
+
+    def update_record(self, offset, task):
+        # Pola stalej dlugosci nadpisujemy w miejscu; zmieniony tekst trafia na koniec sterty
+        date = task.date.toordinal() if task.date else 0
+        struct.pack_into("<iB", self.records, offset + self.DATE_OFFSET, date, task.priority or 0)
+        _, _, _, _, title_offset, title_length, description_offset, description_length = \
+            self.RECORD.unpack_from(self.records, offset)
+        garbage = 0
+        texts = []
+        for text, text_offset, length in ((task.title, title_offset, title_length),
+                                          (task.description, description_offset, description_length)):
+            encoded = text.encode("utf-8")
+            if self.heap[text_offset:text_offset + length] == encoded:
+                texts.append((text_offset, length))
+            else:
+                texts.append((self.append_text(encoded), len(encoded)))
+                garbage += length
+        struct.pack_into("<QIQI", self.records, offset + self.TEXT_OFFSET, *texts[0], *texts[1])
+        return garbage
+
+    def append_text(self, encoded):
+        self.heap_file.seek(0, os.SEEK_END)
+        position = self.heap_file.tell()
+        self.heap_file.write(encoded)
+        self.heap_file.flush()
+        self.heap.close()
+        self.heap = mmap.mmap(self.heap_file.fileno(), 0)
+        return position
+
+    def append_records(self, tasks):
+        # Nowe id sa zawsze wieksze od istniejacych, wiec dopisanie na koncu zachowuje porzadek po id
+        self.heap_file.seek(0, os.SEEK_END)
+        position = self.heap_file.tell()
+        records = bytearray()
+        texts = bytearray()
+        for task in sorted(tasks, key=lambda task: task.id):
+            title = task.title.encode("utf-8")
+            description = task.description.encode("utf-8")
+            records += self.pack_record(task, position, len(title), position + len(title), len(description))
+            texts += title + description
+            position += len(title) + len(description)
+        self.heap_file.write(texts)
+        self.heap_file.flush()
+        self.records.flush()
+        self.records_file.seek(0, os.SEEK_END)
+        self.records_file.write(records)
+        self.records_file.flush()
+        self.close_maps()
+        self.map_files()
+
+    def needs_compaction(self):
+        deleted, garbage = self.header_counters()
+        return deleted > self.compact_ratio * max(self.count, 1) or \
+            garbage > self.compact_ratio * max(len(self.heap), 1)
+
+
+def convert(source, destination, log_filename="errors.log"):
+    # Konwersja w obie strony wedlug rozszerzenia; wiersze laduja w kolejnosci id
+    from controller import CSVStorage
+
+    if source.endswith(".bin"):
+        storage = BinaryStorage(source, log_filename)
+        tasks = storage.load_tasks()
+        storage.close()
+    else:
+        tasks = CSVStorage(source, log_filename).load_tasks()
+
+    if destination.endswith(".bin"):
+        count = BinaryStorage.write_files(destination, destination + ".strings", tasks)
+    else:
+        CSVStorage(destination, log_filename, journal=False).write_tasks(sorted(tasks, key=lambda task: task.id))
+        count = len(tasks)
+    return count
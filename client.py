@@ -0,0 +1,267 @@
+import http.client
+import json
+import socket
+from datetime import datetime
+from urllib.parse import urlencode
+
+from controller import PlannerController
+from model import Recurrence, Task
+
+PAGE_SIZE = 500
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class RemoteError(Exception):
+    pass
+
+
+def record_to_task(record):
+    date = datetime.strptime(record["date"], "%Y-%m-%d") if record.get("date") else None
+    recurrence = Recurrence.parse(record["recurrence"]) if record.get("recurrence") else None
+    task = Task(record["title"], record["description"], date, record.get("priority"), record["id"], recurrence)
+    task.key = record.get("key", task.id)
+    return task
+
+
+class RemoteTaskList:
+    # Widok z serwera pobierany stronami przy dostepie - jak LazyTaskList, okno GUI czyta tylko widoczne wiersze
+    def __init__(self, client, params, first_page):
+        self.client = client
+        self.params = params
+        self.total = first_page["total"]
+        self.pages = {0: [record_to_task(record) for record in first_page["tasks"]]}
+
+    def __len__(self):
+        return self.total
+
+    def page(self, number):
+        tasks = self.pages.get(number)
+        if tasks is None:
+            response = self.client.request("GET", "/tasks", self.params + [("offset", number * PAGE_SIZE),
+                                                                           ("limit", PAGE_SIZE)])
+            tasks = self.pages[number] = [record_to_task(record) for record in response["tasks"]]
+        return tasks
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.total))]
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("task index out of range")
+        return self.page(index // PAGE_SIZE)[index % PAGE_SIZE]
+
+    def __iter__(self):
+        for number in range((self.total + PAGE_SIZE - 1) // PAGE_SIZE):
+            yield from self.page(number)
+
+    def ids(self):
+        return self.client.request("GET", "/tasks", self.params + [("fields", "id")])["ids"]
+
+
+class RemoteController:
+    # Cienki klient serwera (main.py serve) z interfejsem PlannerController uzywanym przez widoki i polecenia.
+    # Filtr i sortowanie sa stanem klienta - wysylane z kazdym zapytaniem, serwer nie pamieta sesji.
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self.connection = None
+        self.filtered_date = (None, None)
+        self.filtered_priority = (None, None)
+        self.filtered_name = ""
+        self.filtered_descriptions = False
+        self.sort_key = "date"
+        self.sort_reverse = False
+        self.loading = False
+        self.tasks = None
+        self.profiler = None
+        self.task_id = 1
+        self.listeners = []
+        self.view = None
+        self.revision = self.request("GET", "/changes")["revision"]
+
+    # Walidacja filtra i powiadamianie jak w lokalnym kontrolerze
+    set_filter = PlannerController.set_filter
+    clear_filters = PlannerController.clear_filters
+    set_sort = PlannerController.set_sort
+    add_listener = PlannerController.add_listener
+    remove_listener = PlannerController.remove_listener
+    notify = PlannerController.notify
+    parse_date = staticmethod(PlannerController.parse_date)
+    parse_priority = staticmethod(PlannerController.parse_priority)
+    validate_entry = PlannerController.validate_entry
+
+    def parse_recurrence(self, recurrence):
+        # Czy magazyn obsluguje serie, wie tylko serwer - tu sama skladnia reguly
+        if not recurrence or recurrence.strip().lower() == "none":
+            return None
+        return Recurrence.parse(recurrence)
+
+    def connect(self):
+        if self.address.startswith("unix:"):
+            return UnixHTTPConnection(self.address[len("unix:"):], self.timeout)
+        host, _, port = self.address.rpartition(":")
+        return http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=self.timeout)
+
+    def request(self, method, path, params=None, body=None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        # Jedno trwale polaczenie; po zerwaniu (np. restart serwera) jedna ponowna proba, ale tylko dla GET -
+        # zmiana mogla juz dojsc do serwera przed zerwaniem i powtorzona dodalaby zadanie drugi raz
+        attempts = 2 if method == "GET" else 1
+        for attempt in range(attempts):
+            if self.connection is None:
+                self.connection = self.connect()
+            try:
+                self.connection.request(method, path, body=data, headers=headers)
+                response = self.connection.getresponse()
+                payload = json.loads(response.read() or b"null")
+                break
+            except (ConnectionError, http.client.HTTPException, socket.timeout):
+                self.connection.close()
+                self.connection = None
+                if attempt == attempts - 1:
+                    raise
+        if response.status >= 400:
+            raise RemoteError(payload.get("error", f"HTTP {response.status}"))
+        return payload
+
+    def view_params(self):
+        min_date, max_date = self.filtered_date
+        min_priority, max_priority = self.filtered_priority
+        params = [("min_date", min_date.strftime("%Y-%m-%d") if min_date else ""),
+                  ("max_date", max_date.strftime("%Y-%m-%d") if max_date else ""),
+                  ("min_priority", min_priority or ""), ("max_priority", max_priority or ""),
+                  ("name", self.filtered_name), ("descriptions", int(self.filtered_descriptions)),
+                  ("sort", self.sort_key), ("reverse", int(self.sort_reverse))]
+        return params
+
+    def get_filtered_tasks(self, offset=None, limit=None):
+        params = self.view_params()
+        if limit is not None:
+            # Serwer ogranicza rozmiar odpowiedzi - wieksza strone skladamy z kilku zapytan
+            offset, tasks = offset or 0, []
+            while True:
+                size = min(PAGE_SIZE, limit - len(tasks))
+                page = self.request("GET", "/tasks", params + [("offset", offset + len(tasks)), ("limit", size)])
+                tasks.extend(record_to_task(record) for record in page["tasks"])
+                if len(page["tasks"]) < size or len(tasks) >= limit:
+                    return tasks, page["total"]
+        if self.view is not None and self.view.params == params:
+            return self.view
+        first_page = self.request("GET", "/tasks", params + [("offset", 0), ("limit", PAGE_SIZE)])
+        self.view = RemoteTaskList(self, params, first_page)
+        return self.view
+
+    def invalidate_view(self):
+        self.view = None
+
+    def iter_tasks(self):
+        params = [("sort", "date")]
+        return iter(RemoteTaskList(self, params, self.request("GET", "/tasks", params + [("limit", PAGE_SIZE)])))
+
+    def iter_upcoming_tasks(self, min_date):
+        params = [("min_date", min_date.strftime("%Y-%m-%d")), ("sort", "date")]
+        return iter(RemoteTaskList(self, params, self.request("GET", "/tasks", params + [("limit", PAGE_SIZE)])))
+
+    def get_task_by_id(self, task_id):
+        try:
+            return record_to_task(self.request("GET", f"/tasks/{task_id}"))
+        except RemoteError:
+            return None
+
+    def get_min_max_dates(self):
+        dates = self.request("GET", "/dates")
+        return datetime.strptime(dates["min_date"], "%Y-%m-%d"), datetime.strptime(dates["max_date"], "%Y-%m-%d")
+
+    def get_summary(self, min_date=None, max_date=None):
+        params = [("min_date", min_date.strftime("%Y-%m-%d") if min_date else ""),
+                  ("max_date", max_date.strftime("%Y-%m-%d") if max_date else "")]
+        summary = self.request("GET", "/summary", params)
+        for name in ("min_date", "max_date"):
+            if summary[name]:
+                summary[name] = datetime.strptime(summary[name], "%Y-%m-%d")
+        summary["priorities"] = {priority: count for priority, count in summary["priorities"]}
+        summary["days"] = [(datetime.strptime(date, "%Y-%m-%d"), count) for date, count in summary["days"]]
+        return summary
+
+    def load_next_chunk(self):
+        return False
+
+    def finish_loading(self):
+        pass
+
+    def sync(self):
+        # Zmiany wszystkich klientow od ostatniego odczytu - widok odswieza tylko zmienione wiersze
+        changes = self.request("GET", "/changes", [("since", self.revision)])
+        if changes["revision"] == self.revision and not changes["reload"]:
+            return False
+        self.revision = changes["revision"]
+        self.invalidate_view()
+        if changes["reload"]:
+            self.notify("reloaded", [])
+        for event, task_ids in changes["events"]:
+            self.notify(event, task_ids)
+        return True
+
+    # --- zapisy przez kolejke serwera ---
+
+    @staticmethod
+    def entry_to_record(title, description, date, priority, recurrence=None):
+        return {"title": title, "description": description, "date": date or None,
+                "priority": priority if priority not in ("", None) else None, "recurrence": recurrence or None}
+
+    def write(self, method, path, body=None):
+        try:
+            self.request(method, path, body=body)
+        except RemoteError as e:
+            return str(e)
+        finally:
+            self.invalidate_view()
+        return None
+
+    def add_task(self, title, description, date, priority, recurrence=None):
+        return self.add_tasks([(title, description, date, priority, recurrence)])
+
+    def add_tasks(self, entries):
+        try:
+            ids = self.request("POST", "/tasks", body={"tasks": [self.entry_to_record(*entry) for entry in entries]})
+        except RemoteError as e:
+            return str(e)
+        self.invalidate_view()
+        if ids["ids"]:
+            self.task_id = max(ids["ids"]) + 1
+        return None
+
+    def edit_task(self, task, new_title=None, new_description=None, new_date=None, new_priority=None,
+                  new_recurrence=None):
+        error = self.write("PATCH", f"/tasks/{task.id}", {"title": new_title or None,
+                                                          "description": new_description or None,
+                                                          "date": new_date or None, "priority": new_priority,
+                                                          "recurrence": new_recurrence})
+        if error is None:
+            self.notify("updated", [task.id])
+        return error
+
+    def delete_task(self, task_id):
+        self.delete_tasks([task_id])
+
+    def delete_tasks(self, task_ids):
+        self.write("POST", "/tasks/delete", {"ids": [int(task_id) for task_id in task_ids]})
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,316 @@
+from array import array
+from datetime import datetime
+from model import Task
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def aggregate_counts(dates, priorities):
+    # Liczniki startowe dla TaskAggregates kontrolera: {ordinal: liczba}, {priorytet: liczba} (0 = brak)
+    date_values, date_counts = np.unique(dates, return_counts=True)
+    priority_values, priority_counts = np.unique(priorities, return_counts=True)
+    return (dict(zip(date_values.tolist(), date_counts.tolist())),
+            {priority or None: count for priority, count in zip(priority_values.tolist(), priority_counts.tolist())})
+
+
+class LazyTaskList:
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table.task_at(row) for row in self.rows[index]]
+        return self.table.task_at(self.rows[index])
+
+    def __iter__(self):
+        for row in self.rows:
+            yield self.table.task_at(row)
+
+    def ids(self):
+        return self.table.ids[self.rows].tolist()
+
+
+class TextColumn:
+    def __init__(self, capacity):
+        self.buffer = bytearray()
+        self.lower_buffer = bytearray()
+        self.starts = np.empty(capacity, dtype=np.int64)
+        self.lengths = np.empty(capacity, dtype=np.int32)
+        self.lower_starts = np.empty(capacity, dtype=np.int64)
+        # Poczatki tekstow w buforze w kolejnosci zapisu (rosnaco) z numerem wiersza
+        self.heap_starts = array("q")
+        self.heap_rows = array("q")
+
+    def grow(self, capacity, size):
+        for name in ("starts", "lengths", "lower_starts"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:size] = column[:size]
+            setattr(self, name, grown)
+
+    @staticmethod
+    def append(heap, text):
+        # Separator \0 nie pozwala, zeby dopasowanie podciagu przeszlo przez granice dwoch wierszy
+        data = text.encode("utf-8")
+        start = len(heap)
+        heap += data
+        heap += b"\0"
+        return start, len(data)
+
+    def write(self, row, text):
+        self.starts[row], self.lengths[row] = self.append(self.buffer, text)
+        self.lower_starts[row], _ = self.append(self.lower_buffer, text.lower())
+        self.heap_starts.append(int(self.lower_starts[row]))
+        self.heap_rows.append(row)
+
+    def read(self, row):
+        start = self.starts[row]
+        return self.buffer[start:start + self.lengths[row]].decode("utf-8")
+
+    def match(self, text, size):
+        needle = text.lower().replace("\0", "").encode("utf-8")
+        positions = []
+        position = self.lower_buffer.find(needle)
+        while position != -1:
+            positions.append(position)
+            position = self.lower_buffer.find(needle, position + 1)
+
+        mask = np.zeros(size, dtype=bool)
+        if not positions:
+            return mask
+        positions = np.array(positions, dtype=np.int64)
+        heap_starts = np.frombuffer(self.heap_starts, dtype=np.int64)
+        heap_rows = np.frombuffer(self.heap_rows, dtype=np.int64)
+        entries = np.searchsorted(heap_starts, positions, side="right") - 1
+        candidates = heap_rows[entries]
+        # Po edycji stary tekst zostaje w buforze - liczymy tylko trafienia w aktualnym tekscie wiersza
+        current = self.lower_starts[candidates] == heap_starts[entries]
+        mask[candidates[current]] = True
+        return mask
+
+
+class ColumnarTaskTable:
+    # Klucz sortowania w jednym int64: [priorytet 8 bitow][data 20 bitow][id 34 bity]
+    ID_BITS = 34
+    DATE_BITS = 20
+
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise ImportError("Columnar mode requires numpy.")
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.dates = np.empty(capacity, dtype=np.int32)
+        self.priorities = np.empty(capacity, dtype=np.uint8)
+        self.alive = np.empty(capacity, dtype=bool)
+        self.titles = TextColumn(capacity)
+        self.descriptions = TextColumn(capacity)
+
+        # Posortowane klucze z numerami wierszy: po id (wyszukiwanie) i dla kazdego porzadku widoku
+        self.id_keys = np.empty(0, dtype=np.int64)
+        self.id_rows = np.empty(0, dtype=np.int64)
+        self.sort_orders = {}
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        table = cls()
+        for chunk in chunks:
+            table.append_rows(chunk)
+        # Indeks id budowany raz na koncu - scalanie po kazdej porcji kopiowaloby caly indeks (koszt kwadratowy)
+        ids = table.ids[:table.size]
+        table.id_rows = np.argsort(ids, kind="stable")
+        table.id_keys = ids[table.id_rows]
+        return table
+
+    def ensure_capacity(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("ids", "dates", "priorities", "alive"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+        self.titles.grow(capacity, self.size)
+        self.descriptions.grow(capacity, self.size)
+
+    def write_strings(self, row, task):
+        self.titles.write(row, task.title)
+        self.descriptions.write(row, task.description)
+
+    @staticmethod
+    def date_key(date):
+        return date.toordinal() if date else 0
+
+    def append_rows(self, tasks):
+        # Same kolumny, bez indeksow; zwraca numery dopisanych wierszy
+        start = self.size
+        self.ensure_capacity(start + len(tasks))
+        for row, task in enumerate(tasks, start):
+            self.ids[row] = task.id
+            self.dates[row] = self.date_key(task.date)
+            self.priorities[row] = task.priority or 0
+            self.alive[row] = True
+            self.write_strings(row, task)
+        self.size = start + len(tasks)
+        return np.arange(start, self.size, dtype=np.int64)
+
+    def extend(self, tasks):
+        if not tasks:
+            return
+        rows = self.append_rows(tasks)
+        self.id_keys, self.id_rows = self.merge_sorted(self.id_keys, self.id_rows, self.ids[rows], rows)
+        for sort_key, (keys, order) in self.sort_orders.items():
+            self.sort_orders[sort_key] = self.merge_sorted(keys, order, self.sort_keys(sort_key, rows), rows)
+
+    @staticmethod
+    def merge_sorted(keys, rows, new_keys, new_rows):
+        order = np.argsort(new_keys, kind="stable")
+        new_keys = new_keys[order]
+        positions = np.searchsorted(keys, new_keys, side="right")
+        return np.insert(keys, positions, new_keys), np.insert(rows, positions, new_rows[order])
+
+    def sort_keys(self, sort_key, rows):
+        key = (self.dates[rows].astype(np.int64) << self.ID_BITS) | self.ids[rows]
+        if sort_key == "priority":
+            key |= self.priorities[rows].astype(np.int64) << (self.ID_BITS + self.DATE_BITS)
+        return key
+
+    def sorted_order(self, sort_key):
+        if sort_key not in self.sort_orders:
+            rows = np.arange(self.size, dtype=np.int64)
+            keys = self.sort_keys(sort_key, rows)
+            order = np.argsort(keys, kind="stable")
+            self.sort_orders[sort_key] = (keys[order], rows[order])
+        return self.sort_orders[sort_key]
+
+    def row_of(self, task_id):
+        position = np.searchsorted(self.id_keys, task_id)
+        if position < len(self.id_keys) and self.id_keys[position] == task_id:
+            return int(self.id_rows[position])
+        return None
+
+    def task_at(self, row):
+        row = int(row)
+        date = int(self.dates[row])
+        priority = int(self.priorities[row])
+        return Task(self.titles.read(row), self.descriptions.read(row),
+                    datetime.fromordinal(date) if date else None, priority or None, int(self.ids[row]))
+
+    def get_task(self, task_id):
+        row = self.row_of(task_id)
+        return self.task_at(row) if row is not None else None
+
+    def iter_tasks(self):
+        for row in np.flatnonzero(self.alive[:self.size]):
+            yield self.task_at(row)
+
+    def max_task_id(self):
+        return int(self.id_keys[-1]) if len(self.id_keys) else 0
+
+    def get_min_max_dates(self):
+        dates = self.dates[:self.size][self.alive[:self.size]]
+        dates = dates[dates > 0]
+        if not len(dates):
+            return datetime.now().date(), datetime.now().date()
+        return datetime.fromordinal(int(dates.min())), datetime.fromordinal(int(dates.max()))
+
+    def aggregate_counts(self):
+        alive = self.alive[:self.size]
+        return aggregate_counts(self.dates[:self.size][alive], self.priorities[:self.size][alive])
+
+    def filter_mask(self, min_date, max_date, min_priority, max_priority, name, search_descriptions=False):
+        mask = self.alive[:self.size].copy()
+        dates = self.dates[:self.size]
+        priorities = self.priorities[:self.size]
+        if min_date:
+            mask &= dates >= min_date.toordinal()
+        if max_date:
+            mask &= dates <= max_date.toordinal()
+        # Brak priorytetu zapisany jako 0 - jak brak daty przechodzi tylko filtr bez dolnej granicy
+        if min_priority is not None:
+            mask &= priorities >= min_priority
+        if max_priority is not None:
+            mask &= priorities <= max_priority
+        if name:
+            name_mask = self.titles.match(name, self.size)
+            if search_descriptions:
+                name_mask |= self.descriptions.match(name, self.size)
+            mask &= name_mask
+        return mask
+
+    def query_tasks(self, min_date, max_date, min_priority, max_priority, name, sort_key="date", reverse=False,
+                    search_descriptions=False):
+        mask = self.filter_mask(min_date, max_date, min_priority, max_priority, name, search_descriptions)
+        _, order = self.sorted_order(sort_key)
+        rows = order[mask[order]]
+        if reverse:
+            rows = rows[::-1]
+        return LazyTaskList(self, rows)
+
+    def query_page(self, offset, limit, min_date, max_date, min_priority, max_priority, name, sort_key="date",
+                   reverse=False, search_descriptions=False):
+        # Numery wierszy wyliczane wektorowo, obiekty Task powstaja tylko dla strony
+        tasks = self.query_tasks(min_date, max_date, min_priority, max_priority, name, sort_key, reverse,
+                                 search_descriptions)
+        return tasks[offset:offset + limit], len(tasks)
+
+    def record_change(self, operation, task):
+        self.record_changes([(operation, task)])
+
+    def record_changes(self, changes):
+        # Partia jednego rodzaju trafia do kolumn jedna operacja wektorowa
+        for operation in ("add", "edit", "delete"):
+            tasks = [task for change, task in changes if change == operation]
+            if not tasks:
+                continue
+            if operation == "add":
+                self.extend(tasks)
+            elif operation == "edit":
+                self.update_rows(tasks)
+            else:
+                self.delete_rows(tasks)
+
+    def positions_of(self, task_ids):
+        task_ids = np.unique(np.asarray(task_ids, dtype=np.int64))
+        positions = np.searchsorted(self.id_keys, task_ids)
+        found = positions < len(self.id_keys)
+        found[found] = self.id_keys[positions[found]] == task_ids[found]
+        return positions[found]
+
+    def delete_rows(self, tasks):
+        positions = self.positions_of([task.id for task in tasks])
+        self.alive[self.id_rows[positions]] = False
+        self.id_keys = np.delete(self.id_keys, positions)
+        self.id_rows = np.delete(self.id_rows, positions)
+
+    def update_rows(self, tasks):
+        by_id = {task.id: task for task in tasks}
+        rows = self.id_rows[self.positions_of(list(by_id))]
+        if not len(rows):
+            return
+        old_keys = {sort_key: self.sort_keys(sort_key, rows) for sort_key in self.sort_orders}
+        for row in rows.tolist():
+            task = by_id[int(self.ids[row])]
+            self.dates[row] = self.date_key(task.date)
+            self.priorities[row] = task.priority or 0
+            self.write_strings(row, task)
+
+        for sort_key, (keys, order) in self.sort_orders.items():
+            new_keys = self.sort_keys(sort_key, rows)
+            moved = new_keys != old_keys[sort_key]
+            if not moved.any():
+                continue
+            # Klucze sa unikalne (zawieraja id), wiec searchsorted trafia dokladnie w stare wpisy
+            positions = np.searchsorted(keys, old_keys[sort_key][moved])
+            keys = np.delete(keys, positions)
+            order = np.delete(order, positions)
+            self.sort_orders[sort_key] = self.merge_sorted(keys, order, new_keys[moved], rows[moved])
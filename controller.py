@@ -1,14 +1,92 @@
+from abc import ABC, abstractmethod
+import bisect
 import csv
+import heapq
+import io
+import itertools
 import logging
-from model import Task
+from aggregates import TaskAggregates
+from model import Recurrence, Task
+from search import TextIndex
+from autosave import AutosaveWorker
+from locking import FileLock, file_identity
 from datetime import datetime
 import os
 
 
-class CSVStorage:
-    def __init__(self, filename="tasks.csv", log_filename="errors.log"):
+class Storage(ABC):
+    queryable = False
+    partitioned = False
+    supports_recurrence = True
+    # compact() buduje snapshot sam (z dysku) i nie potrzebuje listy zadan kontrolera
+    compacts_from_disk = False
+
+    @abstractmethod
+    def load_tasks(self):
+        pass
+
+    def load_series(self):
+        # Zadania cykliczne trzymane poza silnikiem zapytan (tylko magazyny z queryable = True)
+        return []
+
+    @abstractmethod
+    def save_tasks(self, tasks):
+        pass
+
+    @abstractmethod
+    def record_change(self, operation, task):
+        pass
+
+    def record_changes(self, changes):
+        for operation, task in changes:
+            self.record_change(operation, task)
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, tasks):
+        self.save_tasks(tasks)
+
+    def iter_task_chunks(self):
+        yield self.load_tasks()
+
+    def reserve_ids(self, count, next_id):
+        return next_id
+
+    def has_external_changes(self):
+        # Tania kontrola bez blokady, czy poll_changes moze cos zwrocic
+        return False
+
+    def poll_changes(self):
+        # Zmiany zapisane przez inne procesy: lista (operacja, id, zadanie), None gdy trzeba wczytac wszystko od nowa
+        return []
+
+
+class CSVStorage(Storage):
+    HEADER = ["Title", "Description", "Date", "Priority", "ID", "Recurrence"]
+    ID_BLOCK_MAX = 1024
+
+    def __init__(self, filename="tasks.csv", log_filename="errors.log", journal=True,
+                 compact_min_records=1000, compact_ratio=0.5):
         self.filename = filename
         self.log_filename = log_filename
+        self.journal = journal
+        self.journal_filename = filename + ".journal"
+        self.ids_filename = filename + ".ids"
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio
+        self.snapshot_count = 0
+        self.journal_count = 0
+
+        # Wspoldzielenie pliku miedzy procesami: zapisy pod blokada, a kazdy proces pamieta, dokad przeczytal
+        # dziennik i ktory snapshot wczytal. Cudze wpisy z konca dziennika czekaja na poll_changes.
+        self.lock = FileLock(filename + ".lock")
+        self.journal_position = 0
+        self.snapshot_identity = None
+        self.external_changes = []
+        self.reload_needed = False
+        self.id_block = (0, 0)
+        self.id_block_size = 0
 
         logging.basicConfig(
             filename=self.log_filename,
@@ -16,111 +94,840 @@ class CSVStorage:
             format="%(asctime)s - %(levelname)s - %(message)s"
         )
 
+    @staticmethod
+    def task_to_row(task):
+        date_str = task.date.strftime("%Y-%m-%d") if task.date else ""
+        priority = task.priority if task.priority is not None else ""
+        recurrence = str(task.recurrence) if task.recurrence else ""
+        return [task.title, task.description, date_str, priority, task.id, recurrence]
+
+    @staticmethod
+    def row_to_task(row):
+        # Pliki sprzed kolumny Recurrence maja piec pol
+        title, description, date_str, priority, task_id = row[:5]
+        date = datetime.strptime(date_str, "%Y-%m-%d") if date_str else None  # Konwersja daty
+        priority = int(priority) if priority != "" else None
+        recurrence = Recurrence.parse(row[5]) if len(row) > 5 and row[5] else None
+        return Task(title, description, date, priority, int(task_id), recurrence)
+
     def save_tasks(self, tasks):
         try:
-            with open(self.filename, mode="w", newline="") as file: 
-                writer = csv.writer(file)
-                writer.writerow(["Title", "Description", "Date", "Priority", "ID"])
-                for task in tasks:
-                    writer.writerow([task.title, task.description, task.date.strftime("%Y-%m-%d"), task.priority, task.id])
+            self.write_tasks(tasks)
         except Exception as e:
             logging.error(f"Error saving data to {self.filename}: {e}")
 
+    def write_tasks(self, tasks):
+        # Zapis do pliku tymczasowego i podmiana - przerwany zapis nie niszczy poprzedniego snapshotu.
+        # Bledy ida do wywolujacego (np. pierwsze wypelnienie magazynu w main.py).
+        temp_filename = self.filename + ".tmp"
+        count = 0
+        with self.lock:
+            with open(temp_filename, mode="w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(self.HEADER)
+                for task in tasks:
+                    writer.writerow(self.task_to_row(task))
+                    count += 1
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_filename, self.filename)
+
+            # Snapshot zawiera juz wszystkie zmiany z dziennika
+            self.snapshot_count = count
+            self.journal_count = 0
+            self.journal_position = 0
+            self.snapshot_identity = file_identity(self.filename)
+            if os.path.exists(self.journal_filename):
+                try:
+                    os.remove(self.journal_filename)
+                except OSError as e:
+                    logging.error(f"Error removing journal {self.journal_filename}: {e}")
+
+    def compact(self, tasks):
+        if not self.journal:
+            self.save_tasks(tasks)
+            return
+        # Snapshot budujemy z dysku, nie z pamieci procesu - dziennik zawiera tez zmiany innych procesow
+        with self.lock:
+            self.read_tail()
+            if self.reload_needed:
+                # Inny proces wlasnie skompaktowal plik
+                return
+            # Wczytanie z dysku zeruje stan odczytu - nieodebrane zmiany innych procesow musza zostac
+            pending = self.external_changes
+            tasks = [task for chunk in self.iter_task_chunks() for task in chunk]
+            self.external_changes = pending
+            self.save_tasks(tasks)
+
+    @property
+    def compacts_from_disk(self):
+        return self.journal
+
+    def record_change(self, operation, task):
+        self.record_changes([(operation, task)])
+
+    def record_changes(self, changes):
+        if not self.journal or not changes:
+            return
+        rows = []
+        for operation, task in changes:
+            if operation == "delete":
+                rows.append([operation, "", "", "", "", task.id])
+            else:
+                rows.append([operation] + self.task_to_row(task))
+        with self.lock:
+            # Najpierw odkladamy nieprzeczytane wpisy innych procesow, potem dopisujemy swoje.
+            # Nasze wpisy sa w dzienniku pozniej, wiec cudze zmiany tych samych zadan sa juz nieaktualne.
+            self.read_tail()
+            written = {task.id for _, task in changes}
+            self.external_changes = [change for change in self.external_changes if change[1] not in written]
+            try:
+                with open(self.journal_filename, mode="a", newline="") as file:
+                    csv.writer(file).writerows(rows)
+                self.journal_count += len(rows)
+                self.journal_position = os.path.getsize(self.journal_filename)
+            except Exception as e:
+                logging.error(f"Error writing journal {self.journal_filename}: {e}")
+
+    def reserve_ids(self, count, next_id):
+        # Numery z zarezerwowanego bloku; kolejne bloki sa coraz wieksze (do ID_BLOCK_MAX), wiec przy czestym
+        # dodawaniu plik licznika odwiedzamy rzadko, a pojedyncze `add` z wiersza polecen nie zostawia dziur
+        block_start, block_end = self.id_block
+        if block_end - block_start >= count:
+            self.id_block = (block_start + count, block_end)
+            return block_start
+
+        size = max(count, min(self.ID_BLOCK_MAX, 2 * self.id_block_size))
+        # Wspolny licznik id - dwa procesy dodajace naraz nie dostana tego samego id
+        with self.lock:
+            try:
+                with open(self.ids_filename, mode="r") as file:
+                    stored = int(file.read() or 0)
+            except (OSError, ValueError):
+                stored = 0
+            start = max(stored, next_id)
+            try:
+                with open(self.ids_filename, mode="w") as file:
+                    file.write(str(start + size))
+            except OSError as e:
+                logging.error(f"Error writing id counter {self.ids_filename}: {e}")
+        self.id_block_size = size
+        self.id_block = (start + count, start + size)
+        return start
+
+    def needs_compaction(self):
+        if not self.journal:
+            return True
+        return self.journal_count > max(self.compact_min_records, self.compact_ratio * self.snapshot_count)
+
     def load_tasks(self):
-        tasks = []
-        try:
-            with open(self.filename, mode="r") as file:
-                reader = csv.reader(file)
-                next(reader)
-                for row in reader:
-                    if row:
-                        try:
-                            title, description, date_str, priority, task_id = row
-                            date = datetime.strptime(date_str, "%Y-%m-%d")  # Konwersja daty
-                            task = Task(title, description, date, int(priority), int(task_id))
-                            tasks.append(task)
-                        except ValueError as e:
-                            logging.error(f"Error parsing row {row}: {e}")
-                            continue
-        except Exception as e:
-            logging.error(f"Error reading file {self.filename}: {e}")
+        tasks = [task for chunk in self.iter_task_chunks() for task in chunk]
 
         if not tasks:
             logging.warning("No tasks found or file is empty.")
+
+        if self.journal_count and self.needs_compaction():
+            self.compact(tasks)
         return tasks
 
+    def iter_task_chunks(self, first_chunk_size=1000, chunk_size=20000):
+        # Dziennik czytamy i snapshot otwieramy pod blokada - otwarty plik zostaje spojny nawet po podmianie
+        file = None
+        with self.lock:
+            # Zmiany z dziennika czytamy najpierw, zeby podmieniac wiersze snapshotu w locie
+            changes, self.journal_count = self.read_journal() if self.journal else ({}, 0)
+            self.journal_position = os.path.getsize(self.journal_filename) \
+                if self.journal and os.path.exists(self.journal_filename) else 0
+            self.snapshot_identity = file_identity(self.filename)
+            self.external_changes = []
+            self.reload_needed = False
+            try:
+                file = open(self.filename, mode="r")
+            except Exception as e:
+                logging.error(f"Error reading file {self.filename}: {e}")
+
+        self.snapshot_count = 0
+        chunk = []
+        limit = first_chunk_size
+        if file is not None:
+            try:
+                with file:
+                    reader = csv.reader(file)
+                    next(reader, None)
+                    for row in reader:
+                        if row:
+                            try:
+                                task = self.row_to_task(row)
+                            except ValueError as e:
+                                logging.error(f"Error parsing row {row}: {e}")
+                                continue
+                            self.snapshot_count += 1
+                            if task.id in changes:
+                                task = changes.pop(task.id)
+                                if task is None:
+                                    continue
+                            chunk.append(task)
+                            if len(chunk) >= limit:
+                                yield chunk
+                                chunk = []
+                                limit = chunk_size
+            except Exception as e:
+                logging.error(f"Error reading file {self.filename}: {e}")
+
+        chunk.extend(task for task in changes.values() if task is not None)
+        if chunk:
+            yield chunk
+
+    def parse_journal(self, rows):
+        changes = []
+        for row in rows:
+            if not row:
+                continue
+            try:
+                operation, fields = row[0], row[1:7]
+                if operation == "delete":
+                    changes.append((operation, int(fields[4]), None))
+                else:
+                    task = self.row_to_task(fields)
+                    changes.append((operation, task.id, task))
+            except (ValueError, IndexError) as e:
+                # Niedokonczony zapis (np. po awarii) - pomijamy
+                logging.error(f"Error parsing journal row {row}: {e}")
+        return changes
+
+    def read_journal(self):
+        changes = {}
+        count = 0
+        if not os.path.exists(self.journal_filename):
+            return changes, count
+        try:
+            with open(self.journal_filename, mode="r", newline="") as file:
+                for _, task_id, task in self.parse_journal(csv.reader(file)):
+                    changes[task_id] = task
+                    count += 1
+        except Exception as e:
+            logging.error(f"Error reading journal {self.journal_filename}: {e}")
+        return changes, count
+
+    def read_tail(self):
+        # Wywolywane pod blokada: dopisane przez innych wpisy dziennika od miejsca, w ktorym skonczylismy
+        if file_identity(self.filename) != self.snapshot_identity:
+            self.reload_needed = True
+            return
+        size = os.path.getsize(self.journal_filename) if os.path.exists(self.journal_filename) else 0
+        if size < self.journal_position:
+            self.reload_needed = True
+            return
+        if size == self.journal_position:
+            return
+        try:
+            with open(self.journal_filename, mode="rb") as file:
+                file.seek(self.journal_position)
+                data = file.read(size - self.journal_position)
+        except OSError as e:
+            logging.error(f"Error reading journal {self.journal_filename}: {e}")
+            return
+        changes = self.parse_journal(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+        self.external_changes.extend(changes)
+        self.journal_count += len(changes)
+        self.journal_position = size
+
+    def has_external_changes(self):
+        # Dwa wywolania stat, bez blokady
+        return bool(self.external_changes) or self.reload_needed or \
+            file_identity(self.filename) != self.snapshot_identity or \
+            (os.path.getsize(self.journal_filename) if os.path.exists(self.journal_filename) else 0) != \
+            self.journal_position
+
+    def poll_changes(self):
+        # Szybka sciezka bez blokady, gdy nikt nic nie zmienil
+        if not self.has_external_changes():
+            return []
+        with self.lock:
+            self.read_tail()
+            if self.reload_needed:
+                return None
+            changes, self.external_changes = self.external_changes, []
+        return changes
+
 
 class PlannerController:
-    def __init__(self):
-        self.storage = CSVStorage()
-        self.tasks = self.storage.load_tasks()
-        self.task_id = max([task.id for task in self.tasks], default=0) + 1
+    EVENTS = {"add": "added", "edit": "updated", "delete": "removed"}
+    BULK_INDEX_MIN = 64
+    BULK_UNINDEX_MIN = 64
+    MATCH_CACHE_SIZE = 16
+
+    def __init__(self, storage=None, progressive=False, columnar=False, autosave_delay=None):
+        self.storage = storage or CSVStorage()
+        # Zapis w tle zbiera serie zmian w jedna operacje na pliku; baza SQL zapisuje sie sama transakcjami
+        self.writer = None
+        if autosave_delay is not None and not self.storage.queryable:
+            self.writer = AutosaveWorker(self.storage, autosave_delay)
+        self.loader = None
+        self.engine = None
+        # Zadania cykliczne (id -> zadanie) - poza indeksami dat, wystapienia powstaja dopiero dla okna widoku
+        self.series = {}
+        # Liczniki na dzien i priorytet poprawiane przy kazdej zmianie (bez zadan cyklicznych)
+        self.aggregates = TaskAggregates()
+        if self.storage.queryable or columnar:
+            # Filtrowanie i sortowanie wykonuje baza albo tabela kolumnowa, obiekty Task nie sa trzymane w pamieci
+            if self.storage.queryable:
+                self.engine = self.storage
+                self.index_series(self.storage.load_series())
+            else:
+                from columnar import ColumnarTaskTable  # numpy ladujemy tylko w trybie kolumnowym
+                self.engine = ColumnarTaskTable.from_chunks(self.iter_regular_chunks(self.storage.iter_task_chunks()))
+            self.tasks = None
+            self.task_id = self.engine.max_task_id() + 1
+            self.aggregates = TaskAggregates.from_counts(*self.engine.aggregate_counts())
+        elif self.storage.partitioned:
+            # Shardy miesieczne wczytywane dopiero, gdy zapytanie obejmuje ich zakres dat
+            self.tasks = {}
+            self.task_id = self.storage.max_task_id() + 1
+            self.build_indexes()
+        elif progressive:
+            # Zadania doczytywane sa porcjami przez load_next_chunk, pierwsza porcja od razu
+            self.tasks = {}
+            self.task_id = 1
+            self.build_indexes()
+            self.loader = self.storage.iter_task_chunks()
+        else:
+            # Slownik id -> zadanie: wyszukiwanie i usuwanie w czasie O(1)
+            self.tasks = {task.id: task for task in self.storage.load_tasks()}
+            self.task_id = max(self.tasks, default=0) + 1
+            self.build_indexes()
         self.filtered_date = (None, None)
         self.filtered_priority = (None, None)
         self.filtered_name = ""
+        self.filtered_descriptions = False
+        self.title_index = None
+        self.match_cache = {}
+        self.description_index = None
         self.sort_key = "date"
         self.sort_reverse = False
+        self.version = 0
+        self.view_cache_key = None
+        self.view_cache = None
+        self.stats = {"view_cache_hits": 0, "view_cache_misses": 0}
+        self.profiler = None
+        self.listeners = []
 
-    def add_task(self, title, description, date, priority):
-        if date:
-            try:
-                converted_date = datetime.strptime(date, "%Y-%m-%d")
-            except ValueError:
-                return "Error: Invalid date format. Please use 'YYYY-MM-DD'."
-        else:
-            converted_date = None
+        if self.loader is not None:
+            self.load_next_chunk()
 
-        if priority is not None:
-            try:
-                new_priority = int(priority)
-                if new_priority < 1 or new_priority > 5:
-                    raise ValueError("Priority must be between 1 and 5.")
-            except ValueError:
-                return "Priority must be a number between 1 and 5."
-        else:
-            new_priority = None
+    @property
+    def loading(self):
+        return self.loader is not None
+
+    def load_next_chunk(self):
+        if self.loader is None:
+            return False
+        chunk = next(self.loader, None)
+        if chunk is None:
+            self.loader = None
+            return False
+        self.merge_tasks(chunk)
+        return True
 
-        task = Task(title, description, converted_date, new_priority, self.task_id)
-        self.tasks.append(task)
-        self.task_id += 1
-        self.storage.save_tasks(self.tasks)
+    def load_partitions(self, min_date=None, max_date=None):
+        chunk = self.storage.load_range(min_date, max_date)
+        if chunk:
+            self.merge_tasks(chunk)
+
+    def merge_tasks(self, chunk):
+        for task in chunk:
+            previous = self.tasks.get(task.id)
+            if previous is not None:
+                self.unindex_task(previous)
+                self.unindex_text(previous)
+            self.tasks[task.id] = task
+            self.index_text(task)
+        self.index_tasks(chunk)
+        self.task_id = max(self.task_id, max(task.id for task in chunk) + 1)
+
+        self.invalidate_view()
+        self.notify("added", [task.id for task in chunk])
+
+    def finish_loading(self):
+        while self.load_next_chunk():
+            pass
+
+    @staticmethod
+    def parse_date(date):
+        if not date:
+            return None
+        try:
+            return datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Error: Invalid date format. Please use 'YYYY-MM-DD'.")
+
+    @staticmethod
+    def parse_priority(priority):
+        if priority is None:
+            return None
+        try:
+            new_priority = int(priority)
+            if new_priority < 1 or new_priority > 5:
+                raise ValueError("Priority must be between 1 and 5.")
+        except ValueError:
+            raise ValueError("Priority must be a number between 1 and 5.")
+        return new_priority
+
+    def parse_recurrence(self, recurrence):
+        # None i "" - zadanie jednorazowe; "none" w edycji usuwa regule
+        if not recurrence or recurrence.strip().lower() == "none":
+            return None
+        if not self.storage.supports_recurrence:
+            raise ValueError("Recurring tasks are not supported by this storage.")
+        return Recurrence.parse(recurrence)
+
+    def validate_entry(self, title, description, date, priority, recurrence=None):
+        date = self.parse_date(date)
+        recurrence = self.parse_recurrence(recurrence)
+        if recurrence is not None and date is None:
+            raise ValueError("A recurring task needs a start date.")
+        return title, description, date, self.parse_priority(priority), recurrence
+
+    def add_task(self, title, description, date, priority, recurrence=None):
+        self.finish_loading()
+        try:
+            entry = self.validate_entry(title, description, date, priority, recurrence)
+        except ValueError as e:
+            return str(e)
+        self.insert_tasks([entry])
         return None
 
-    def get_task_by_id(self, task_id):
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
+    def add_tasks(self, entries):
+        self.finish_loading()
+        # Najpierw walidacja calej partii - blad w jednym wierszu nie zostawia polowicznego zapisu
+        parsed = []
+        for number, entry in enumerate(entries, 1):
+            try:
+                parsed.append(self.validate_entry(*entry))
+            except ValueError as e:
+                return f"Row {number}: {e}"
+        self.insert_tasks(parsed)
         return None
 
-    def get_filtered_tasks(self):
-        tasks = self.tasks
+    def insert_tasks(self, entries):
+        entries = list(entries)
+        if not entries:
+            return []
+        # Id rezerwowane w storage - inny proces dzielacy plik mogl juz zajac kolejne numery
+        self.task_id = self.storage.reserve_ids(len(entries), self.task_id)
+        tasks = [Task(title, description, date, priority, self.task_id + offset, *recurrence)
+                 for offset, (title, description, date, priority, *recurrence) in enumerate(entries)]
+        self.task_id += len(tasks)
+        if self.engine is None:
+            for task in tasks:
+                self.tasks[task.id] = task
+                self.index_text(task)
+            if len(tasks) == 1:
+                self.index_task(tasks[0])
+            else:
+                self.index_tasks(tasks)
+        else:
+            self.count_tasks(tasks)
+        self.persist_batch("add", tasks)
+        return tasks
+
+    def get_task_by_id(self, task_id):
+        if self.engine is not None:
+            if task_id in self.series:
+                return self.series[task_id]
+            return self.engine.get_task(task_id)
+        if task_id not in self.tasks and self.storage.partitioned:
+            self.load_partitions()
+        return self.tasks.get(task_id)
+
+    def get_filtered_tasks(self, offset=None, limit=None):
+        # Z limitem zwraca jedna strone i liczbe wszystkich trafien (query_page) - bez budowania calej listy.
+        # Ostatni wynik zostaje w pamieci do zmiany zadan lub filtra - odswiezenie widoku bez zmian nic nie liczy.
+        if self.storage.partitioned:
+            self.load_partitions(*self.filtered_date)
+        view_key = (self.version, self.filtered_date, self.filtered_priority, self.filtered_name,
+                    self.filtered_descriptions, self.sort_key, self.sort_reverse)
+        if limit is not None:
+            offset = offset or 0
+            if self.view_cache is not None and self.view_cache_key == view_key + (None, None):
+                # Cala lista juz jest - strona to jej wycinek
+                self.stats["view_cache_hits"] += 1
+                return self.view_cache[offset:offset + limit], len(self.view_cache)
+        cache_key = view_key + (offset, limit)
+        if self.view_cache is not None and cache_key == self.view_cache_key:
+            self.stats["view_cache_hits"] += 1
+            return self.view_cache
 
-        if self.filtered_date:
+        self.stats["view_cache_misses"] += 1
+        self.view_cache = self.query_page(offset, limit) if limit is not None else self.query_filtered_tasks()
+        self.view_cache_key = cache_key
+        return self.view_cache
+
+    def invalidate_view(self):
+        self.version += 1
+        self.view_cache = None
+        self.view_cache_key = None
+
+    def query_filtered_tasks(self):
+        if self.engine is not None:
             min_date, max_date = self.filtered_date
-            if min_date and max_date:
-                tasks = [task for task in tasks if min_date.date() <= task.date.date() <= max_date.date()]
-            elif min_date:
-                tasks = [task for task in tasks if task.date.date() >= min_date.date()]
-            elif max_date:
-                tasks = [task for task in tasks if task.date.date() <= max_date.date()]
-
-        if self.filtered_priority:
             min_priority, max_priority = self.filtered_priority
-            if min_priority is not None and max_priority is not None:
-                tasks = [task for task in tasks if min_priority <= task.priority <= max_priority]
-            elif min_priority is not None:
-                tasks = [task for task in tasks if task.priority >= min_priority]
-            elif max_priority is not None:
-                tasks = [task for task in tasks if task.priority <= max_priority]
+            tasks = self.engine.query_tasks(min_date, max_date, min_priority, max_priority, self.filtered_name,
+                                            self.sort_key, self.sort_reverse, self.filtered_descriptions)
+        elif self.filtered_name:
+            matches = self.match_text(self.filtered_name, self.filtered_descriptions)
+            tasks = [self.tasks[task_id] for _, task_id in self.iter_sorted_entries() if task_id in matches]
+        else:
+            tasks = [self.tasks[task_id] for _, task_id in self.iter_sorted_entries()]
 
-        if self.filtered_name:
-            tasks = [task for task in tasks if self.filtered_name.lower() in task.title.lower()]
+        streams = [occurrences for _, occurrences in self.iter_occurrence_streams()]
+        if not streams:
+            return tasks
+        return list(heapq.merge(tasks, *streams, key=self.sort_order_key, reverse=self.sort_reverse))
 
-        return tasks
+    def filtered_series(self):
+        # Serie przechodzace filtr priorytetu i nazwy; filtr dat dotyczy pojedynczych wystapien
+        min_priority, max_priority = self.filtered_priority
+        name = self.filtered_name.lower()
+        for task in self.series.values():
+            priority = self.priority_key(task.priority)
+            if min_priority is not None and priority < min_priority or \
+                    max_priority is not None and priority > max_priority:
+                continue
+            if name and name not in task.title.lower() and \
+                    not (self.filtered_descriptions and name in task.description.lower()):
+                continue
+            yield task
 
-        return tasks
+    def iter_occurrence_streams(self):
+        # Dla kazdej serii (liczba wystapien w oknie, leniwy generator wystapien w porzadku widoku).
+        # Okno bez gornej granicy pokazuje serie raz - jako najblizsze wystapienie od dolnej granicy.
+        min_date, max_date = self.filtered_date
+        for task in self.filtered_series():
+            if max_date is None:
+                count = task.recurrence.count_between(task.date, min_date)
+                count = 1 if count is None else min(count, 1)
+                dates = itertools.islice(task.recurrence.dates(task.date, min_date), count)
+            else:
+                count = task.recurrence.count_between(task.date, min_date, max_date)
+                dates = task.recurrence.dates(task.date, min_date, max_date, self.sort_reverse)
+            if count:
+                yield count, map(task.occurrence, dates)
+
+    def iter_upcoming_tasks(self, min_date):
+        # Zadania z data od min_date bez wzgledu na filtr widoku, serie jako najblizsze wystapienie
+        # (kolejnosc dowolna) - do budowy kolejki przypomnien
+        if self.storage.partitioned:
+            self.load_partitions(min_date, None)
+        if self.engine is not None:
+            yield from self.engine.query_tasks(min_date, None, None, None, "", "date", False)
+        else:
+            start = bisect.bisect_left(self.date_index, (self.date_key(min_date),))
+            for position in range(start, len(self.date_index)):
+                yield self.tasks[self.date_index[position][1]]
+        for task in list(self.series.values()):
+            date = next(task.recurrence.dates(task.date, min_date), None)
+            if date is not None:
+                yield task.occurrence(date)
+
+    def search_tasks(self, query, include_descriptions=True):
+        if self.engine is not None:
+            return list(self.engine.query_tasks(None, None, None, None, query, "date", False, include_descriptions))
+        if self.storage.partitioned:
+            self.load_partitions()
+        matches = self.match_text(query, include_descriptions)
+        return sorted((self.tasks[task_id] for task_id in matches),
+                      key=lambda task: (self.date_key(task.date), task.id))
+
+    def build_text_index(self):
+        if self.title_index is not None or self.engine is not None:
+            return
+        self.title_index = TextIndex()
+        self.description_index = TextIndex()
+        for task in self.tasks.values():
+            self.index_text(task)
+
+    def match_text(self, query, include_descriptions):
+        # Indeks tekstowy budujemy przy pierwszym wyszukiwaniu, potem jest aktualizowany na biezaco
+        self.build_text_index()
+        key = (query.lower(), include_descriptions)
+        matches = self.match_cache.get(key)
+        if matches is not None:
+            return matches
+        matches = self.title_index.search(query)
+        if include_descriptions:
+            matches |= self.description_index.search(query)
+        # Ostatnie wyniki trzymamy i poprawiamy przy kazdej zmianie zadania (zwracany zbior jest tylko do odczytu)
+        if len(self.match_cache) >= self.MATCH_CACHE_SIZE:
+            del self.match_cache[next(iter(self.match_cache))]
+        self.match_cache[key] = matches
+        return matches
+
+    def index_text(self, task):
+        if self.title_index is not None:
+            self.title_index.add(task.id, task.title)
+            self.description_index.add(task.id, task.description)
+            for (query, include_descriptions), matches in self.match_cache.items():
+                if query in task.title.lower() or include_descriptions and query in task.description.lower():
+                    matches.add(task.id)
+
+    def unindex_text(self, task):
+        if self.title_index is not None:
+            self.title_index.remove(task.id)
+            self.description_index.remove(task.id)
+            for matches in self.match_cache.values():
+                matches.discard(task.id)
+
+    def sorted_slices(self):
+        # Zakresy indeksow pasujace do filtra dat i priorytetow; merged=True, gdy trzeba je scalac po dacie
+        min_date, max_date = self.filtered_date
+        min_priority, max_priority = self.filtered_priority
+
+        keys = [key for key in self.priority_buckets
+                if (min_priority is None or key >= min_priority) and (max_priority is None or key <= max_priority)]
+
+        if self.sort_key == "priority":
+            # Koszyki w kolejnosci priorytetu, wewnatrz posortowane po (data, id)
+            buckets = [self.priority_buckets[key] for key in sorted(keys, reverse=self.sort_reverse)]
+            merged = False
+        elif len(keys) == len(self.priority_buckets):
+            buckets = [self.date_index]
+            merged = False
+        else:
+            buckets = [self.priority_buckets[key] for key in keys]
+            merged = True
+        slices = []
+        for bucket in buckets:
+            start, end = self.date_range(bucket, min_date, max_date)
+            if start < end:
+                slices.append((bucket, start, end))
+        return slices, merged
+
+    def iter_sorted_entries(self, slices=None, merged=None):
+        if slices is None:
+            slices, merged = self.sorted_slices()
+        reverse = self.sort_reverse
+        iterators = [self.iter_slice(bucket, start, end, reverse) for bucket, start, end in slices]
+        if merged:
+            yield from heapq.merge(*iterators, reverse=reverse)
+        else:
+            for iterator in iterators:
+                yield from iterator
+
+    def query_page(self, offset, limit):
+        # Jedna strona widoku i liczba wszystkich trafien - bez budowania calej listy
+        if self.storage.partitioned:
+            self.load_partitions(*self.filtered_date)
+        streams = list(self.iter_occurrence_streams())
+        if not streams:
+            return self.query_regular_page(offset, limit)
+        # Wystapienia serii scalane ze strona zwyklych zadan - kazdy generator konczy sie na koncu strony
+        tasks, total = self.query_regular_page(0, offset + limit)
+        merged = heapq.merge(tasks, *(occurrences for _, occurrences in streams), key=self.sort_order_key,
+                             reverse=self.sort_reverse)
+        return list(itertools.islice(merged, offset, offset + limit)), total + sum(count for count, _ in streams)
+
+    def query_regular_page(self, offset, limit):
+        if self.engine is None:
+            return self.query_index_page(offset, limit)
+        min_date, max_date = self.filtered_date
+        min_priority, max_priority = self.filtered_priority
+        return self.engine.query_page(offset, limit, min_date, max_date, min_priority, max_priority, self.filtered_name,
+                                      self.sort_key, self.sort_reverse, self.filtered_descriptions)
+
+    def query_index_page(self, offset, limit):
+        slices, merged = self.sorted_slices()
+        in_range = sum(end - start for _, start, end in slices)
+        if not self.filtered_name:
+            if merged:
+                entries = itertools.islice(self.iter_sorted_entries(slices, merged), offset, offset + limit)
+            else:
+                entries = self.iter_concatenated(slices, offset, limit)
+            return [self.tasks[task_id] for _, task_id in entries], in_range
+
+        matches = self.match_text(self.filtered_name, self.filtered_descriptions)
+        if 4 * len(matches) ** 2 < (offset + limit) * in_range:
+            # Sortowanie trafien (~m log m) tansze niz przejscie indeksu do konca strony (~strona * zakres / m)
+            tasks = sorted((task for task in map(self.tasks.get, matches) if task and self.in_filter_range(task)),
+                           key=self.sort_order_key, reverse=self.sort_reverse)
+            return tasks[offset:offset + limit], len(tasks)
+
+        # Strona z przejscia po indeksie zatrzymanego na jej koncu; liczba trafien z mniejszego z dwoch zbiorow
+        entries = (task_id for _, task_id in self.iter_sorted_entries(slices, merged) if task_id in matches)
+        page = [self.tasks[task_id] for task_id in itertools.islice(entries, offset, offset + limit)]
+        if in_range == len(self.date_index):
+            # Trafienia obejmuja tez serie, ktorych nie ma w indeksie dat
+            total = len(matches) - len(self.series.keys() & matches)
+        elif len(matches) < in_range:
+            total = sum(1 for task_id in matches if self.in_filter_range(self.tasks[task_id]))
+        else:
+            total = sum(1 for _, task_id in self.iter_sorted_entries(slices, merged) if task_id in matches)
+        return page, total
+
+    def iter_concatenated(self, slices, offset, limit):
+        # Zakresy nastepuja po sobie - cale zakresy przed strona pomijamy bez iterowania
+        for bucket, start, end in slices:
+            if limit <= 0:
+                return
+            if offset >= end - start:
+                offset -= end - start
+                continue
+            if self.sort_reverse:
+                positions = range(end - 1 - offset, max(start, end - offset - limit) - 1, -1)
+            else:
+                positions = range(start + offset, min(end, start + offset + limit))
+            offset = 0
+            limit -= len(positions)
+            for position in positions:
+                yield bucket[position]
+
+    def in_filter_range(self, task):
+        # Czy zadanie jest w zakresach indeksu dat; serie sa poza nim (ich wystapienia liczy iter_occurrence_streams)
+        if task.recurrence is not None:
+            return False
+        min_date, max_date = self.filtered_date
+        min_priority, max_priority = self.filtered_priority
+        priority = self.priority_key(task.priority)
+        date = self.date_key(task.date)
+        return ((min_priority is None or priority >= min_priority)
+                and (max_priority is None or priority <= max_priority)
+                and (min_date is None or date >= self.date_key(min_date))
+                and (max_date is None or date <= self.date_key(max_date)))
+
+    def sort_order_key(self, task):
+        # Ten sam porzadek co iter_sorted_entries
+        if self.sort_key == "priority":
+            return self.priority_key(task.priority), self.date_key(task.date), task.id
+        return self.date_key(task.date), task.id
+
+    @staticmethod
+    def iter_slice(index, start, end, reverse):
+        if reverse:
+            return (index[position] for position in range(end - 1, start - 1, -1))
+        return (index[position] for position in range(start, end))
+
+    @staticmethod
+    def date_key(date):
+        return date.toordinal() if date else 0
+
+    @staticmethod
+    def priority_key(priority):
+        return priority if priority is not None else 0
+
+    def date_range(self, index, min_date, max_date):
+        start = bisect.bisect_left(index, (self.date_key(min_date),)) if min_date else 0
+        end = bisect.bisect_left(index, (self.date_key(max_date) + 1,)) if max_date else len(index)
+        return start, end
+
+    def build_indexes(self):
+        self.date_index = []
+        self.priority_buckets = {}
+        self.index_tasks(self.tasks.values())
+
+    def index_series(self, tasks):
+        # Zadania cykliczne odkladamy do self.series; zwraca pozostale zadania do indeksow dat
+        regular = []
+        for task in tasks:
+            if task.recurrence is None:
+                regular.append(task)
+            else:
+                self.series[task.id] = task
+        return regular
+
+    def unindex_series(self, tasks):
+        regular = []
+        for task in tasks:
+            if task.recurrence is None:
+                regular.append(task)
+            else:
+                self.series.pop(task.id, None)
+        return regular
+
+    def count_tasks(self, tasks):
+        # Tryby z silnikiem - bez indeksow kontrolera liczniki poprawiamy wprost
+        for task in tasks:
+            if task.recurrence is None:
+                self.aggregates.add(task)
+
+    def uncount_tasks(self, tasks):
+        for task in tasks:
+            if task.recurrence is None:
+                self.aggregates.remove(task)
+
+    def iter_regular_chunks(self, chunks):
+        # Tabela kolumnowa nie ma kolumny z regula - zadania cykliczne zostaja w self.series
+        for chunk in chunks:
+            yield self.index_series(chunk)
+
+    def index_tasks(self, tasks):
+        tasks = self.index_series(tasks)
+        if len(tasks) < self.BULK_INDEX_MIN:
+            # Kilka zadan - wstawianie binarne, sort calego indeksu kosztowalby O(n) porownan krotek
+            for task in tasks:
+                self.index_task(task)
+            return
+        self.aggregates.add_all(tasks)
+
+        # Dopisanie posortowanej porcji i sort (Timsort scala dwa uporzadkowane ciagi w czasie liniowym)
+        entries = sorted((self.date_key(task.date), task.id, self.priority_key(task.priority)) for task in tasks)
+        self.date_index.extend(entry[:2] for entry in entries)
+        self.date_index.sort()
+        touched = set()
+        for date_key, task_id, priority_key in entries:
+            self.priority_buckets.setdefault(priority_key, []).append((date_key, task_id))
+            touched.add(priority_key)
+        for priority_key in touched:
+            self.priority_buckets[priority_key].sort()
+
+    def index_task(self, task):
+        if not self.index_series([task]):
+            return
+        self.aggregates.add(task)
+        entry = (self.date_key(task.date), task.id)
+        bisect.insort(self.date_index, entry)
+        bisect.insort(self.priority_buckets.setdefault(self.priority_key(task.priority), []), entry)
 
-    def set_filter(self, min_date_input, max_date_input, min_priority_input, max_priority_input, name_input):
+    def unindex_task(self, task):
+        if not self.unindex_series([task]):
+            return
+        self.aggregates.remove(task)
+        entry = (self.date_key(task.date), task.id)
+        self.remove_entry(self.date_index, entry)
+        key = self.priority_key(task.priority)
+        bucket = self.priority_buckets.get(key)
+        if bucket is not None:
+            self.remove_entry(bucket, entry)
+            if not bucket:
+                del self.priority_buckets[key]
+
+    def unindex_tasks(self, tasks):
+        tasks = self.unindex_series(tasks)
+        if len(tasks) < self.BULK_UNINDEX_MIN:
+            for task in tasks:
+                self.unindex_task(task)
+            return
+
+        # Duza partia - jedno przejscie filtrujace zamiast usuwania wpis po wpisie
+        for task in tasks:
+            self.aggregates.remove(task)
+        removed = {(self.date_key(task.date), task.id) for task in tasks}
+        touched = {self.priority_key(task.priority) for task in tasks}
+        self.date_index = [entry for entry in self.date_index if entry not in removed]
+        for key in touched:
+            bucket = [entry for entry in self.priority_buckets.get(key, ()) if entry not in removed]
+            if bucket:
+                self.priority_buckets[key] = bucket
+            else:
+                self.priority_buckets.pop(key, None)
+
+    @staticmethod
+    def remove_entry(index, entry):
+        position = bisect.bisect_left(index, entry)
+        if position < len(index) and index[position] == entry:
+            del index[position]
+
+    def set_filter(self, min_date_input, max_date_input, min_priority_input, max_priority_input, name_input,
+                   search_descriptions=False):
         try:
             if min_date_input:
                 self.filtered_date = (datetime.strptime(min_date_input, "%Y-%m-%d"), self.filtered_date[1])
@@ -144,60 +951,326 @@ class PlannerController:
                 self.filtered_priority[1]:
             return "Minimum priority cannot be greater than maximum priority."
 
-        if not 1 <= self.filtered_priority[0] <= 5 or not 1 <= self.filtered_priority[1] <= 5:
+        if any(priority is not None and not 1 <= priority <= 5 for priority in self.filtered_priority):
             return "Priority must be between 1 and 5."
 
         self.filtered_name = name_input.strip() if name_input else ""
+        self.filtered_descriptions = search_descriptions
 
+        self.invalidate_view()
+        self.notify("reordered", [])
         return None
 
     def clear_filters(self):
         self.filtered_date = (None, None)
         self.filtered_priority = (None, None)
+        self.invalidate_view()
+        self.notify("reordered", [])
 
-    def edit_task(self, task, new_title=None, new_description=None, new_date=None, new_priority=None):
-        if new_title:
-            task.title = new_title
-        if new_description:
-            task.description = new_description
+    def set_sort(self, sort_key, sort_reverse):
+        if (sort_key, sort_reverse) == (self.sort_key, self.sort_reverse):
+            return
+        self.sort_key = sort_key
+        self.sort_reverse = sort_reverse
+        self.notify("reordered", [])
 
-        if new_date:
-            try:
-                task.date = datetime.strptime(new_date, "%Y-%m-%d")
-            except ValueError:
-                return "Error: Invalid date format. Please use 'YYYY-MM-DD'."
+    def add_listener(self, listener):
+        self.listeners.append(listener)
 
-        if new_priority is not None:
-            try:
-                new_priority = int(new_priority)
-                if new_priority < 1 or new_priority > 5:
-                    raise ValueError("Priority must be between 1 and 5.")
-            except ValueError:
-                return "Priority must be a number between 1 and 5."
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def notify(self, event, task_ids):
+        for listener in list(self.listeners):
+            listener(event, task_ids)
+
+    def edit_task(self, task, new_title=None, new_description=None, new_date=None, new_priority=None,
+                  new_recurrence=None):
+        return self.edit_tasks([task], new_title, new_description, new_date, new_priority, new_recurrence)
+
+    def edit_tasks(self, tasks, new_title=None, new_description=None, new_date=None, new_priority=None,
+                   new_recurrence=None):
+        self.finish_loading()
+        if new_priority == "":
+            # Puste pole priorytetu (jak puste pole daty) - bez zmian
+            new_priority = None
+        try:
+            converted_date = self.parse_date(new_date)
+            converted_priority = self.parse_priority(new_priority)
+            converted_recurrence = self.parse_recurrence(new_recurrence)
+        except ValueError as e:
+            return str(e)
+
+        # Wystapienie zadania cyklicznego to kopia - zmiana dotyczy calej serii (data zmienia jej poczatek)
+        tasks = list({task.id: self.series.get(task.id, task) for task in tasks}.values())
+        changes = [(task,
+                    converted_date if new_date else task.date,
+                    converted_priority if new_priority is not None else task.priority,
+                    converted_recurrence if new_recurrence is not None else task.recurrence) for task in tasks]
+        if any(recurrence is not None and date is None for _, date, _, recurrence in changes):
+            return "A recurring task needs a start date."
+        if self.engine is None:
+            moved = [task for task, date, priority, recurrence in changes
+                     if date != task.date or priority != task.priority or recurrence != task.recurrence]
+            self.unindex_tasks(moved)
+            if new_title or new_description:
+                for task in tasks:
+                    self.unindex_text(task)
+        else:
+            self.uncount_tasks(tasks)
+
+        for task, date, priority, recurrence in changes:
+            if new_title:
+                task.title = new_title
+            if new_description:
+                task.description = new_description
+            task.date = date
+            task.priority = priority
+            task.recurrence = recurrence
 
-            task.priority = new_priority
+        if self.engine is None:
+            if new_title or new_description:
+                for task in tasks:
+                    self.index_text(task)
+            if len(moved) == 1:
+                self.index_task(moved[0])
+            elif moved:
+                self.index_tasks(moved)
+        else:
+            self.count_tasks(tasks)
 
-        self.storage.save_tasks(self.tasks)
+        self.persist_batch("edit", tasks)
         return None
 
-    def sort_tasks_by_key(self):
-        if self.sort_key == "date":
-            self.tasks.sort(key=lambda task: task.date, reverse=self.sort_reverse)
-        elif self.sort_key == "priority":
-            self.tasks.sort(key=lambda task: task.priority, reverse=self.sort_reverse)
+    def edit_filtered_tasks(self, new_title=None, new_description=None, new_date=None, new_priority=None):
+        return self.edit_tasks(self.get_filtered_tasks(), new_title, new_description, new_date, new_priority)
 
     def get_min_max_dates(self):
-        tasks_with_date = [task for task in self.tasks if task.date]
-
-        if not tasks_with_date:
+        if self.storage.partitioned:
+            # Z manifestu - liczniki znaja tylko wczytane shardy
+            return self.storage.get_min_max_dates()
+        min_date, max_date = self.date_bounds()
+        if min_date is None:
             return datetime.now().date(), datetime.now().date()
+        return min_date, max_date
 
-        min_date = min(tasks_with_date, key=lambda task: task.date).date
-        max_date = max(tasks_with_date, key=lambda task: task.date).date
+    def date_bounds(self):
+        # Skrajne daty z licznikow i poczatkow serii - bez przegladania zadan
+        min_date, max_date = self.aggregates.min_max_dates()
+        starts = [task.date for task in self.series.values()]
+        if starts:
+            min_date = min(starts + [min_date] if min_date else starts)
+            max_date = max(starts + [max_date] if max_date else starts)
         return min_date, max_date
 
+    def get_summary(self, min_date=None, max_date=None):
+        # Liczniki zadan: lacznie, bez daty, cykliczne, na priorytet i na dzien w zakresie (domyslnie od
+        # najwczesniejszej do najpozniejszej daty). Dni z licznikow plus wystapienia serii w tym zakresie.
+        counts = None
+        if self.storage.partitioned:
+            # Skrajne daty i liczniki z manifestu - wczytujemy tylko shardy z zakresu (i shard serii)
+            first, last = self.storage.date_bounds()
+            min_date, max_date = min_date or first, max_date or last
+            counts = self.storage.manifest_counts()
+            if counts is None:
+                self.load_partitions()
+            else:
+                self.load_partitions(min_date, max_date)
+        else:
+            first, last = self.date_bounds()
+            min_date, max_date = min_date or first, max_date or last
+        if counts is None:
+            counts = self.aggregates.total, self.aggregates.undated, self.aggregates.priority_counts
+        total, undated, priority_counts = counts
+
+        priorities = dict(priority_counts)
+        for task in self.series.values():
+            priorities[task.priority] = priorities.get(task.priority, 0) + 1
+        days = dict(self.aggregates.day_range(min_date, max_date))
+        if min_date is not None and max_date is not None:
+            for task in self.series.values():
+                for date in task.recurrence.dates(task.date, min_date, max_date):
+                    day = date.toordinal()
+                    days[day] = days.get(day, 0) + 1
+        return {
+            "total": total + len(self.series),
+            "undated": undated,
+            "recurring": len(self.series),
+            "min_date": first,
+            "max_date": last,
+            "priorities": priorities,
+            "days": [(datetime.fromordinal(day), count) for day, count in sorted(days.items())],
+        }
+
     def delete_task(self, task_id):
-        task = self.get_task_by_id(task_id)
-        if task:
-            self.tasks.remove(task)
-            self.storage.save_tasks(self.tasks)
+        self.delete_tasks([task_id])
+
+    def delete_tasks(self, task_ids):
+        self.finish_loading()
+        tasks = [task for task in map(self.get_task_by_id, dict.fromkeys(task_ids)) if task]
+        if self.engine is None:
+            for task in tasks:
+                del self.tasks[task.id]
+                self.unindex_text(task)
+            self.unindex_tasks(tasks)
+        else:
+            self.uncount_tasks(tasks)
+        self.persist_batch("delete", tasks)
+
+    def iter_tasks(self):
+        if self.engine is self.storage:
+            return self.engine.iter_tasks()
+        if self.engine is not None:
+            return itertools.chain(self.engine.iter_tasks(), self.series.values())
+        if self.storage.partitioned:
+            self.load_partitions()
+        return iter(self.tasks.values())
+
+    def persist(self, operation, task):
+        self.persist_batch(operation, [task])
+
+    def persist_batch(self, operation, tasks):
+        if not tasks:
+            return
+        changes = [(operation, task) for task in tasks]
+        self.invalidate_view()
+        if self.engine is not None:
+            engine_changes = self.route_series(changes)
+            if self.engine is not self.storage:
+                self.engine.record_changes(engine_changes)
+        if self.writer is not None:
+            self.writer.submit_changes(changes)
+            if self.storage.compacts_from_disk:
+                # Sama flaga - snapshot zbuduje watek zapisu, bez kopii wszystkich zadan przy kazdej zmianie
+                if self.storage.needs_compaction():
+                    self.writer.submit_compaction()
+            elif self.storage.needs_compaction():
+                self.writer.submit_snapshot(list(self.iter_tasks()))
+        else:
+            self.storage.record_changes(changes)
+            if self.storage.needs_compaction():
+                self.storage.compact(self.iter_tasks())
+        self.notify(self.EVENTS[operation], [task.id for task in tasks])
+
+    def route_series(self, changes):
+        # Tryby z silnikiem: zmiany zadan cyklicznych aktualizuja self.series, silnik dostaje reszte.
+        # Zadanie, ktore stalo sie cykliczne, znika z silnika; takie, ktore przestalo nim byc - wraca do niego.
+        routed = []
+        for operation, task in changes:
+            was_series = self.series.pop(task.id, None) is not None
+            if operation != "delete" and task.recurrence is not None:
+                self.series[task.id] = task
+                if operation == "edit" and not was_series:
+                    routed.append(("delete", task))
+            elif operation == "edit" and was_series:
+                routed.append(("add", task))
+            elif not was_series:
+                routed.append((operation, task))
+        return routed
+
+    def sync(self):
+        # Odbior zmian zapisanych przez inne procesy; True, gdy widok trzeba odswiezyc
+        if self.loading or not self.storage.has_external_changes():
+            return False
+        if self.writer is not None:
+            # Nasze oczekujace zmiany musza trafic na dysk przed cudzymi - inaczej nadpisalyby je po cichu.
+            # Tylko gdy inne procesy cos zapisaly - bez tego zapis zostaje w tle, poza watkiem interfejsu.
+            self.writer.flush()
+        changes = self.storage.poll_changes()
+        if changes is None:
+            self.reload_all()
+            return True
+        if not changes:
+            return False
+        self.apply_external_changes(changes)
+        return True
+
+    def apply_external_changes(self, changes):
+        # Tylko zmienione rekordy; nic nie zapisujemy - zmiany sa juz na dysku
+        latest = {}
+        for _, task_id, task in changes:
+            latest[task_id] = task
+        known = {task_id for task_id in latest if self.get_task_by_id(task_id) is not None}
+
+        if self.engine is not None:
+            converted = []
+            for task_id, task in latest.items():
+                current = self.get_task_by_id(task_id)
+                if current is not None:
+                    self.uncount_tasks([current])
+                if task is None:
+                    if current is not None:
+                        converted.append(("delete", current))
+                else:
+                    self.count_tasks([task])
+                    converted.append(("edit" if current is not None else "add", task))
+            converted = self.route_series(converted)
+            if self.engine is not self.storage:
+                self.engine.record_changes(converted)
+        else:
+            current = [self.tasks[task_id] for task_id in latest if task_id in self.tasks]
+            self.unindex_tasks(current)
+            for task in current:
+                self.unindex_text(task)
+            indexed = []
+            for task_id, task in latest.items():
+                existing = self.tasks.get(task_id)
+                if task is None:
+                    self.tasks.pop(task_id, None)
+                    continue
+                if existing is not None:
+                    # Aktualizacja w miejscu - widoki trzymajace obiekt widza nowe dane
+                    existing.title = task.title
+                    existing.description = task.description
+                    existing.date = task.date
+                    existing.priority = task.priority
+                    existing.recurrence = task.recurrence
+                    task = existing
+                else:
+                    self.tasks[task_id] = task
+                self.index_text(task)
+                indexed.append(task)
+            self.index_tasks(indexed)
+
+        self.task_id = max([self.task_id] + [task_id + 1 for task_id in latest])
+        self.invalidate_view()
+        for event, task_ids in (("removed", [task_id for task_id in known if latest[task_id] is None]),
+                                ("updated", [task_id for task_id in known if latest[task_id] is not None]),
+                                ("added", sorted(task_id for task_id in latest.keys() - known if latest[task_id]))):
+            if task_ids:
+                self.notify(event, task_ids)
+
+    @staticmethod
+    def task_fields(task):
+        return (task.title, task.description, task.date, task.priority, task.recurrence) if task else None
+
+    def reload_all(self):
+        # Plik podmieniony w calosci (np. kompaktowanie w innym procesie) - wczytujemy wszystko od nowa
+        if self.engine is self.storage:
+            self.task_id = max(self.task_id, self.engine.max_task_id() + 1)
+            self.series = {}
+            self.index_series(self.storage.load_series())
+            self.aggregates = TaskAggregates.from_counts(*self.engine.aggregate_counts())
+        elif self.engine is not None:
+            from columnar import ColumnarTaskTable
+            self.series = {}
+            self.engine = ColumnarTaskTable.from_chunks(self.iter_regular_chunks(self.storage.iter_task_chunks()))
+            self.task_id = max(self.task_id, self.engine.max_task_id() + 1)
+            self.aggregates = TaskAggregates.from_counts(*self.engine.aggregate_counts())
+        else:
+            fresh = {task.id: task for chunk in self.storage.iter_task_chunks() for task in chunk}
+            changes = [("edit", task_id, task) for task_id, task in fresh.items()
+                       if self.task_fields(self.tasks.get(task_id)) != self.task_fields(task)]
+            changes.extend(("delete", task_id, None) for task_id in self.tasks if task_id not in fresh)
+            if changes:
+                self.apply_external_changes(changes)
+            return
+        self.invalidate_view()
+        # Inne zdarzenie niz zmiana filtra - sluchacze trzymajacy kopie danych musza je odbudowac
+        self.notify("reloaded", [])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
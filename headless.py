@@ -0,0 +1,237 @@
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+FIELDS = ["id", "title", "description", "date", "priority", "recurrence"]
+IMPORT_BATCH_SIZE = 10000
+
+
+def task_to_record(task):
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "date": task.date.strftime("%Y-%m-%d") if task.date else "",
+        "priority": task.priority if task.priority is not None else "",
+        "recurrence": str(task.recurrence) if task.recurrence else "",
+    }
+
+
+def write_tasks(tasks, output_format, out):
+    # Wiersz po wierszu - pierwsze wyniki sa na wyjsciu zanim reszta zostanie wczytana
+    count = 0
+    if output_format == "jsonl":
+        for task in tasks:
+            record = task_to_record(task)
+            for name in ("priority", "recurrence"):
+                if record[name] == "":
+                    record[name] = None
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    else:
+        writer = csv.DictWriter(out, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for task in tasks:
+            writer.writerow(task_to_record(task))
+            count += 1
+    out.flush()
+    return count
+
+
+def apply_filters(controller, args):
+    min_date, max_date = args.min_date, args.max_date
+    if args.due_within is not None:
+        today = datetime.now().date()
+        min_date = min_date or today.strftime("%Y-%m-%d")
+        max_date = max_date or (today + timedelta(days=args.due_within)).strftime("%Y-%m-%d")
+
+    # set_filter wymaga obu granic priorytetu, brakujaca uzupelniamy skrajna wartoscia
+    min_priority, max_priority = args.min_priority, args.max_priority
+    if min_priority or max_priority:
+        min_priority, max_priority = min_priority or "1", max_priority or "5"
+
+    controller.set_sort(args.sort, args.desc)
+    if min_date or max_date or min_priority or args.name:
+        return controller.set_filter(min_date, max_date, min_priority, max_priority, args.name, args.descriptions)
+    return None
+
+
+def run_list(controller, args, out=sys.stdout):
+    error = apply_filters(controller, args)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    if args.limit is not None:
+        # Tylko wybrana strona - bez budowania calej przefiltrowanej listy
+        tasks, _ = controller.get_filtered_tasks(args.offset, args.limit)
+    else:
+        tasks = controller.get_filtered_tasks()[args.offset:]
+    write_tasks(tasks, args.format, out)
+    return 0
+
+
+def run_export(controller, args, out=sys.stdout):
+    if args.output:
+        with open(args.output, mode="w", newline="", encoding="utf-8") as file:
+            count = write_tasks(controller.iter_tasks(), args.format, file)
+        print(f"Exported {count} tasks to {args.output}.", file=sys.stderr)
+    else:
+        write_tasks(controller.iter_tasks(), args.format, out)
+    return 0
+
+
+def run_add(controller, args, out=sys.stdout):
+    error = controller.add_task(args.title, args.description, args.date, args.priority, args.repeat)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    out.write(f"{controller.task_id - 1}\n")
+    return 0
+
+
+def run_done(controller, args, out=sys.stdout):
+    missing = [task_id for task_id in args.ids if controller.get_task_by_id(task_id) is None]
+    if missing:
+        print(f"No task with ID: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    # Zadania nie maja statusu - ukonczone zadanie znika z planera
+    controller.delete_tasks(args.ids)
+    return 0
+
+
+def iter_import_rows(filename):
+    # Kolumny jak w tasks.csv (Title, Description, Date, Priority, opcjonalnie Recurrence); ID jest nadawane od nowa.
+    # Zwraca pary (numer wiersza w pliku, wpis).
+    with open(filename, mode="r", newline="") as file:
+        reader = csv.DictReader(file)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        for row in reader:
+            priority = (row.get("priority") or "").strip()
+            yield reader.line_num, (row.get("title") or "", row.get("description") or "",
+                                    (row.get("date") or "").strip(), priority or None,
+                                    (row.get("recurrence") or "").strip())
+
+
+def iter_import_batches(filename, batch_size=IMPORT_BATCH_SIZE):
+    batch = []
+    for _, entry in iter_import_rows(filename):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_import(controller, args, out=sys.stdout):
+    # Dwa przejscia po pliku: najpierw walidacja wszystkich wierszy, potem zapis porcjami. Blad w dalszej czesci
+    # pliku nie zostawia wczesniejszych porcji w planerze - ponowny import po poprawce nie dubluje zadan.
+    imported = 0
+    try:
+        for line, entry in iter_import_rows(args.file):
+            try:
+                controller.validate_entry(*entry)
+            except ValueError as e:
+                print(f"{args.file}, line {line}: {e} (nothing imported)", file=sys.stderr)
+                return 1
+        for batch in iter_import_batches(args.file):
+            error = controller.add_tasks(batch)
+            if error:
+                print(f"{args.file}: {error} (import is partial: {imported} rows were imported)", file=sys.stderr)
+                return 1
+            imported += len(batch)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Imported {imported} tasks.", file=sys.stderr)
+    return 0
+
+
+def run_convert(controller, args, out=sys.stdout):
+    from binary_storage import convert
+
+    try:
+        count = convert(args.source, args.destination)
+    except (OSError, ValueError, ImportError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Converted {count} tasks to {args.destination}.", file=sys.stderr)
+    return 0
+
+
+def run_serve(controller, args, out=sys.stdout):
+    from server import run_server
+
+    run_server(controller, args.host, args.port, args.socket)
+    return 0
+
+
+COMMANDS = {
+    "list": run_list,
+    "export": run_export,
+    "add": run_add,
+    "done": run_done,
+    "import": run_import,
+    "convert": run_convert,
+    "serve": run_serve,
+}
+STANDALONE_COMMANDS = {"convert"}
+# Polecenia dzialajace dlugo - kontroler zapisuje w tle jak w interfejsach
+SERVER_COMMANDS = {"serve"}
+
+
+def add_subcommands(subparsers):
+    format_options = {"choices": ["csv", "jsonl"], "default": "csv", "help": "Format wyjscia (domyslnie csv)"}
+
+    list_parser = subparsers.add_parser("list", help="Wypisz zadania pasujace do filtrow")
+    list_parser.add_argument("--from", dest="min_date", metavar="YYYY-MM-DD", help="Najwczesniejsza data")
+    list_parser.add_argument("--to", dest="max_date", metavar="YYYY-MM-DD", help="Najpozniejsza data")
+    list_parser.add_argument("--due-within", type=int, metavar="DNI", help="Zadania na najblizsze DNI dni")
+    list_parser.add_argument("--min-priority", metavar="P", help="Minimalny priorytet (1-5)")
+    list_parser.add_argument("--max-priority", metavar="P", help="Maksymalny priorytet (1-5)")
+    list_parser.add_argument("--name", default="", help="Fragment tytulu")
+    list_parser.add_argument("--descriptions", action="store_true", help="Szukaj --name takze w opisach")
+    list_parser.add_argument("--sort", choices=["date", "priority"], default="date", help="Klucz sortowania")
+    list_parser.add_argument("--desc", action="store_true", help="Sortuj malejaco")
+    list_parser.add_argument("--offset", type=int, default=0, help="Pomin tyle pierwszych zadan")
+    list_parser.add_argument("--limit", type=int, help="Wypisz najwyzej tyle zadan")
+    list_parser.add_argument("--format", **format_options)
+
+    export_parser = subparsers.add_parser("export", help="Wyeksportuj wszystkie zadania")
+    export_parser.add_argument("-o", "--output", metavar="PLIK", help="Plik docelowy (domyslnie stdout)")
+    export_parser.add_argument("--format", **format_options)
+
+    add_parser = subparsers.add_parser("add", help="Dodaj zadanie i wypisz jego ID")
+    add_parser.add_argument("title", help="Tytul zadania")
+    add_parser.add_argument("--description", default="", help="Opis zadania")
+    add_parser.add_argument("--date", default="", metavar="YYYY-MM-DD", help="Termin zadania")
+    add_parser.add_argument("--priority", help="Priorytet (1-5)")
+    add_parser.add_argument("--repeat", metavar="REGULA",
+                            help="Powtarzanie, np. daily, weekly, monthly, 'every 3 days', 'weekly until YYYY-MM-DD', "
+                                 "'daily count 10' (termin to pierwsze wystapienie)")
+
+    done_parser = subparsers.add_parser("done", help="Oznacz zadania jako wykonane (usuwa je z planera)")
+    done_parser.add_argument("ids", type=int, nargs="+", metavar="ID", help="ID zadan")
+
+    import_parser = subparsers.add_parser("import", help="Zaimportuj zadania z pliku CSV")
+    import_parser.add_argument("file", help="Plik CSV z kolumnami Title, Description, Date, Priority")
+
+    convert_parser = subparsers.add_parser("convert", help="Konwertuj zadania miedzy CSV a formatem binarnym (.bin)")
+    convert_parser.add_argument("source", help="Plik zrodlowy (.csv lub .bin)")
+    convert_parser.add_argument("destination", help="Plik docelowy (.csv lub .bin)")
+
+    serve_parser = subparsers.add_parser("serve", help="Serwer HTTP/JSON dla wielu klientow (-cli/-gui z -connect)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Adres nasluchu (domyslnie 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port (domyslnie 8765, 0 = dowolny wolny)")
+    serve_parser.add_argument("--socket", metavar="SCIEZKA", help="Nasluchuj na gniezdzie Unix zamiast TCP")
+
+
+def run_command(controller, args):
+    try:
+        return COMMANDS[args.command](controller, args)
+    except BrokenPipeError:
+        # Wyjscie przekierowane do np. `head` zostalo zamkniete - to nie jest blad
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    # Blokada doradcza na osobnym pliku .lock: wyklucza inne procesy (flock/msvcrt) i inne watki (RLock).
+    # Mozna ja zagniezdzac - plik blokujemy tylko przy pierwszym wejsciu.
+    def __init__(self, filename):
+        self.filename = filename
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.file = open(self.filename, mode="a+b")
+                self.lock_file(self.file)
+            except OSError:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0:
+            self.unlock_file(self.file)
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+    @staticmethod
+    def lock_file(file):
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            return
+        # msvcrt.LK_LOCK poddaje sie po ok. 10 s - ponawiamy do skutku
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    @staticmethod
+    def unlock_file(file):
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            return
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_identity(filename):
+    # Podmiana pliku (os.replace) zmienia inode, dopisanie - rozmiar i mtime
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
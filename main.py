@@ -1,9 +1,82 @@
 import argparse
-from view_cli import CLI_PlannerApp
-from view_gui import GUI_PlannerApp
-from controller import PlannerController
+import sys
+import os
+
+# Widoki, baza i numpy importowane sa dopiero w wybranym trybie - `-cli` nie laduje Tk, a `-gui` Textual
+
+AUTOSAVE_DELAY = 0.5
+
+def create_controller(args, interactive=True):
+    if args.connect:
+        from client import RemoteController
+        return RemoteController(args.connect)
+
+    from controller import PlannerController
+
+    # Interfejsy zapisuja w tle; polecenia bez interfejsu zapisuja od razu i koncza
+    autosave_delay = AUTOSAVE_DELAY if interactive else None
+    if args.shards:
+        from partitioned_storage import PartitionedStorage
+
+        new_layout = not os.path.exists(os.path.join(args.shards, PartitionedStorage.MANIFEST))
+        storage = PartitionedStorage(args.shards)
+        if new_layout:
+            # Pierwsze uruchomienie - dzielimy tasks.csv na shardy miesieczne. Manifest powstaje na koncu, wiec po
+            # bledzie kolejne uruchomienie dzieli plik od nowa.
+            seed_storage(storage, [])
+        return PlannerController(storage)
+    if args.bin:
+        from binary_storage import BinaryStorage
+
+        new_file = not os.path.exists(args.bin)
+        storage = BinaryStorage(args.bin)
+        if new_file:
+            seed_storage(storage, [storage.filename, storage.heap_filename])
+        return PlannerController(storage)
+    if args.columnar and not args.db:
+        return PlannerController(columnar=True, autosave_delay=autosave_delay)
+    if not args.db:
+        return PlannerController(progressive=interactive, autosave_delay=autosave_delay)
+
+    from sqlite_storage import SQLiteStorage
+
+    new_database = not os.path.exists(args.db)
+    storage = SQLiteStorage(args.db)
+    if new_database:
+        # Pierwsze uruchomienie - przenosimy zadania z pliku CSV
+        seed_storage(storage, [args.db])
+    return PlannerController(storage)
+
+def seed_storage(storage, new_files):
+    # Wypelnienie nowego magazynu zadaniami z tasks.csv. Blad konczy program: nowe pliki sa usuwane, zeby kolejne
+    # uruchomienie nie otworzylo pustego lub ucietego magazynu jak gotowego.
+    from controller import CSVStorage
+
+    try:
+        storage.write_tasks(CSVStorage().load_tasks())
+    except Exception as e:
+        if hasattr(storage, "close"):
+            storage.close()
+        for filename in new_files:
+            if os.path.exists(filename):
+                os.remove(filename)
+        print(f"Cannot import tasks.csv: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def finish(controller, args):
+    # Widoki zamykaja kontroler same; ponowne close() tylko upewnia sie, ze zapis w tle skonczyl
+    controller.close()
+    if controller.profiler is not None:
+        controller.profiler.dump(args.profile_output)
 
 def main():
+    profiler = None
+    if "--profile-startup" in sys.argv:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler()
+        profiler.start()
+
+    from headless import SERVER_COMMANDS, STANDALONE_COMMANDS, add_subcommands, run_command
 
     parser = argparse.ArgumentParser(description="Uruchom aplikacje w trybie CLI lub GUI :)")
     parser.add_argument(
@@ -16,18 +89,113 @@ def main():
         action = 'store_true',
         help = "Uruchom aplikacje w trybie GUI"
     )
+    parser.add_argument(
+        '-db',
+        metavar = 'PLIK',
+        help = "Przechowuj zadania w bazie SQLite zamiast w tasks.csv"
+    )
+    parser.add_argument(
+        '-shards',
+        metavar = 'KATALOG',
+        help = "Przechowuj zadania w shardach miesiecznych w katalogu (wczytywane wg filtra dat)"
+    )
+    parser.add_argument(
+        '-bin',
+        metavar = 'PLIK',
+        help = "Przechowuj zadania w binarnym pliku mapowanym w pamieci (wymaga numpy)"
+    )
+    parser.add_argument(
+        '-connect',
+        metavar = 'ADRES',
+        help = "Polacz sie z serwerem (main.py serve): HOST:PORT lub unix:SCIEZKA"
+    )
+    parser.add_argument(
+        '-columnar',
+        action = 'store_true',
+        help = "Trzymaj zadania w tabeli kolumnowej (wymaga numpy)"
+    )
+    parser.add_argument(
+        '--profile',
+        action = 'store_true',
+        help = "Mierz czasy operacji kontrolera i storage (w TUI klawisz p)"
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action = 'store_true',
+        help = "Jak --profile, dodatkowo przyrosty pamieci z tracemalloc (wolniejsze)"
+    )
+    parser.add_argument(
+        '--profile-output',
+        metavar = 'PLIK',
+        default = 'profile.json',
+        help = "Plik JSON ze statystykami zapisywany przy wyjsciu (domyslnie profile.json)"
+    )
+    parser.add_argument(
+        '--profile-startup',
+        action = 'store_true',
+        help = "Po zakonczeniu wypisz czasy importow i etapow startu (jak -X importtime)"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="POLECENIE")
+    add_subcommands(subparsers)
 
     args = parser.parse_args()
+    mark = profiler.mark if profiler else lambda phase: None
+    mark("arguments")
+
+    if not args.command and not args.cli and not args.gui:
+        print("Dodaj flage -cli lub -gui.")
+        return
+    if args.command in STANDALONE_COMMANDS:
+        # Polecenia operujace na samych plikach - bez wczytywania zadan do kontrolera
+        sys.exit(run_command(None, args))
+
+    try:
+        if args.command:
+            controller = create_controller(args, interactive=args.command in SERVER_COMMANDS)
+        else:
+            controller = create_controller(args)
+    except ImportError as e:
+        print(e)
+        return
+    except OSError as e:
+        print(f"Cannot connect to {args.connect}: {e}")
+        return
+    mark("controller")
+
+    if (args.profile or args.profile_memory) and not args.connect:
+        from profiling import profile_controller
+        profile_controller(controller, track_memory=args.profile_memory)
+
+    if args.command:
+        status = run_command(controller, args)
+        finish(controller, args)
+        mark("command")
+        if profiler:
+            profiler.report()
+        sys.exit(status)
+
+    try:
+        if args.cli:
+            from view_cli import CLI_PlannerApp
+            app = CLI_PlannerApp(controller, on_ready=lambda: mark("first paint"))
+        else:
+            from view_gui import GUI_PlannerApp
+            app = GUI_PlannerApp(controller, on_ready=lambda: mark("first paint"))
+    except ImportError as e:
+        finish(controller, args)
+        print(e)
+        return
+    mark("view")
 
     if args.cli:
-        app = CLI_PlannerApp(PlannerController())
         app.run()
-    elif args.gui:
-        app = GUI_PlannerApp(PlannerController())
-        app.window.mainloop()
     else:
-        print("Dodaj flage -cli lub -gui.")
-        return
+        app.window.mainloop()
+    finish(controller, args)
+    # Raport dopiero po wyjsciu - w trakcie dzialania terminal i okno naleza do interfejsu
+    if profiler:
+        profiler.report()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,10 +1,141 @@
+import calendar
+from datetime import datetime, timedelta
+
+
+class Recurrence:
+    # Regula powtarzania zapisana przy zadaniu, np. "daily", "every 3 days until 2025-06-30", "monthly count 12"
+    UNITS = {"day": "days", "week": "weeks", "month": "months"}
+    NAMES = {"daily": "days", "weekly": "weeks", "monthly": "months"}
+
+    def __init__(self, unit, interval=1, until=None, count=None):
+        if unit not in self.UNITS.values():
+            raise ValueError(f"Unknown recurrence unit: {unit}")
+        if interval < 1:
+            raise ValueError("Recurrence interval must be at least 1.")
+        if count is not None and count < 1:
+            raise ValueError("Recurrence count must be at least 1.")
+        if until is not None and count is not None:
+            raise ValueError("Recurrence takes either an end date or a count, not both.")
+        self.unit = unit
+        self.interval = interval
+        self.until = until
+        self.count = count
+
+    @classmethod
+    def parse(cls, text):
+        words = text.lower().split()
+        try:
+            if words and words[0] in cls.NAMES:
+                unit, interval, rest = cls.NAMES[words[0]], 1, words[1:]
+            elif len(words) >= 3 and words[0] == "every" and words[2].rstrip("s") in cls.UNITS:
+                unit, interval, rest = cls.UNITS[words[2].rstrip("s")], int(words[1]), words[3:]
+            else:
+                raise ValueError
+            until = count = None
+            if rest[:1] == ["until"] and len(rest) == 2:
+                until = datetime.strptime(rest[1], "%Y-%m-%d")
+            elif rest[:1] == ["count"] and len(rest) == 2:
+                count = int(rest[1])
+            elif rest:
+                raise ValueError
+        except ValueError:
+            raise ValueError("Invalid recurrence. Use e.g. 'daily', 'weekly', 'monthly' or 'every 3 days', "
+                             "optionally followed by 'until YYYY-MM-DD' or 'count N'.")
+        return cls(unit, interval, until, count)
+
+    def __str__(self):
+        if self.interval == 1:
+            text = {name: unit for unit, name in self.NAMES.items()}[self.unit]
+        else:
+            text = f"every {self.interval} {self.unit}"
+        if self.until is not None:
+            text += f" until {self.until.strftime('%Y-%m-%d')}"
+        elif self.count is not None:
+            text += f" count {self.count}"
+        return text
+
+    def __eq__(self, other):
+        return isinstance(other, Recurrence) and str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def date_at(self, start, number):
+        # Data wystapienia o numerze `number` (0 = start); dzien miesiaca przycinany do dlugosci miesiaca
+        if self.unit == "days":
+            return start + timedelta(days=number * self.interval)
+        if self.unit == "weeks":
+            return start + timedelta(weeks=number * self.interval)
+        month = start.month - 1 + number * self.interval
+        year = start.year + month // 12
+        month = month % 12 + 1
+        return start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+
+    def steps_between(self, start, date):
+        # Liczba pelnych krokow od startu do daty - dla miesiecy przyblizona, wywolujacy ja poprawia
+        if self.unit == "months":
+            return ((date.year - start.year) * 12 + date.month - start.month) // self.interval
+        days = self.interval * (7 if self.unit == "weeks" else 1)
+        return (date - start).days // days
+
+    def number_range(self, start, min_date=None, max_date=None):
+        # Numery wystapien w oknie dat liczone arytmetycznie - bez przechodzenia od poczatku serii
+        first = 0
+        if min_date is not None and min_date > start:
+            first = self.steps_between(start, min_date)
+            while self.date_at(start, first) < min_date:
+                first += 1
+        end = None if self.count is None else self.count
+        last_date = max_date
+        if self.until is not None and (last_date is None or self.until < last_date):
+            last_date = self.until
+        if last_date is not None:
+            if last_date < start:
+                return range(0)
+            last = self.steps_between(start, last_date)
+            while last >= 0 and self.date_at(start, last) > last_date:
+                last -= 1
+            end = last + 1 if end is None else min(end, last + 1)
+        if end is None:
+            return None
+        return range(first, max(first, end))
+
+    def dates(self, start, min_date=None, max_date=None, reverse=False):
+        # Leniwy generator dat w oknie; bez gornej granicy (i bez konca serii) seria jest nieskonczona
+        numbers = self.number_range(start, min_date, max_date)
+        if numbers is None:
+            if reverse:
+                raise ValueError("An endless recurrence cannot be listed backwards.")
+            number = self.steps_between(start, min_date) if min_date is not None and min_date > start else 0
+            while True:
+                date = self.date_at(start, number)
+                if min_date is None or date >= min_date:
+                    yield date
+                number += 1
+        for number in (reversed(numbers) if reverse else numbers):
+            yield self.date_at(start, number)
+
+    def count_between(self, start, min_date=None, max_date=None):
+        numbers = self.number_range(start, min_date, max_date)
+        return None if numbers is None else len(numbers)
+
+
 class Task:
-    def __init__(self, title, description, date, priority, task_id):
+    def __init__(self, title, description, date, priority, task_id, recurrence=None):
         self.title = title
         self.description = description
         self.date = date
         self.priority = priority
         self.id = task_id
+        self.recurrence = recurrence
+        # Klucz wiersza w widoku - wystapienia jednej serii maja wspolne id, wiec klucz dostaje tez date
+        self.key = task_id
+
+    def occurrence(self, date):
+        # Jedno wystapienie zadania cyklicznego - kopia z inna data, niezapisywana
+        occurrence = Task(self.title, self.description, date, self.priority, self.id, self.recurrence)
+        occurrence.key = f"{self.id}@{date.strftime('%Y-%m-%d')}"
+        return occurrence
 
     def __repr__(self):
         return f"Task(title='{self.title}', description='{self.description}', date='{self.date.strftime('%Y-%m-%d')}')"
@@ -0,0 +1,276 @@
+import csv
+import json
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from controller import CSVStorage, Storage
+
+
+class PartitionedStorage(Storage):
+    partitioned = True
+
+    MANIFEST = "manifest.json"
+    UNDATED = "undated"
+    # Zadania cykliczne maja wystapienia w wielu miesiacach - osobny shard wczytywany z kazdym zakresem
+    RECURRING = "recurring"
+    VERSION = 1
+
+    def __init__(self, directory="tasks", log_filename="errors.log"):
+        self.directory = directory
+        self.log_filename = log_filename
+        self.manifest_filename = os.path.join(directory, self.MANIFEST)
+        # Shardy wczytane do kontrolera i shard kazdego wczytanego zadania (potrzebny przy przenoszeniu)
+        self.loaded = set()
+        self.shard_of = {}
+
+        logging.basicConfig(
+            filename=self.log_filename,
+            level=logging.ERROR,
+            format="%(asctime)s - %(levelname)s - %(message)s"
+        )
+
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self.read_manifest()
+
+    # --- manifest ---
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_filename, mode="r") as file:
+                manifest = json.load(file)
+            if manifest.get("version") == self.VERSION:
+                return manifest
+            logging.error(f"Unsupported manifest version in {self.manifest_filename}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading manifest {self.manifest_filename}: {e}")
+        return {"version": self.VERSION, "max_id": 0, "shards": {}}
+
+    def write_manifest(self):
+        temp_filename = self.manifest_filename + ".tmp"
+        with open(temp_filename, mode="w") as file:
+            json.dump(self.manifest, file, indent=2, sort_keys=True)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.manifest_filename)
+
+    @classmethod
+    def shard_key(cls, task):
+        if task.recurrence is not None:
+            return cls.RECURRING
+        return task.date.strftime("%Y-%m") if task.date else cls.UNDATED
+
+    def shard_filename(self, key):
+        return os.path.join(self.directory, f"{key}.csv")
+
+    def shard_storage(self, key):
+        return CSVStorage(self.shard_filename(key), self.log_filename, journal=False)
+
+    @staticmethod
+    def shard_entry(tasks):
+        dates = [task.date for task in tasks if task.date]
+        return {
+            "count": len(tasks),
+            "min_date": min(dates).strftime("%Y-%m-%d") if dates else None,
+            "max_date": max(dates).strftime("%Y-%m-%d") if dates else None,
+            "max_id": max((task.id for task in tasks), default=0),
+            # Klucze JSON to napisy; "0" - zadania bez priorytetu
+            "priorities": dict(Counter(str(task.priority or 0) for task in tasks)),
+        }
+
+    def overlapping_shards(self, min_date, max_date):
+        # Zadania bez daty przechodza tylko filtr bez dolnej granicy - tak jak w indeksie dat kontrolera
+        keys = []
+        for key, entry in self.manifest["shards"].items():
+            if key == self.UNDATED:
+                if min_date is None:
+                    keys.append(key)
+                continue
+            if key == self.RECURRING:
+                keys.append(key)
+                continue
+            if min_date and entry["max_date"] < min_date.strftime("%Y-%m-%d"):
+                continue
+            if max_date and entry["min_date"] > max_date.strftime("%Y-%m-%d"):
+                continue
+            keys.append(key)
+        return sorted(keys)
+
+    # --- odczyt ---
+
+    @property
+    def fully_loaded(self):
+        return self.loaded >= set(self.manifest["shards"])
+
+    def load_range(self, min_date=None, max_date=None):
+        # Zwraca tylko zadania z shardow, ktorych kontroler jeszcze nie ma
+        tasks = []
+        for key in self.overlapping_shards(min_date, max_date):
+            if key not in self.loaded:
+                tasks.extend(self.load_shard(key))
+        return tasks
+
+    def load_tasks(self):
+        self.loaded.clear()
+        self.shard_of.clear()
+        return self.load_range()
+
+    def iter_task_chunks(self):
+        self.loaded.clear()
+        self.shard_of.clear()
+        for key in self.overlapping_shards(None, None):
+            chunk = self.load_shard(key)
+            if chunk:
+                yield chunk
+
+    def load_shard(self, key):
+        shard = self.shard_storage(key).load_tasks()
+        for task in shard:
+            self.shard_of[task.id] = key
+        self.loaded.add(key)
+        return shard
+
+    def max_task_id(self):
+        return self.manifest["max_id"]
+
+    def count_tasks(self):
+        return sum(entry["count"] for entry in self.manifest["shards"].values())
+
+    def date_bounds(self):
+        # Z samego manifestu - bez czytania zadan; (None, None), gdy nie ma zadan z data
+        dated = [entry for key, entry in self.manifest["shards"].items() if key != self.UNDATED and entry["count"]]
+        if not dated:
+            return None, None
+        return (datetime.strptime(min(entry["min_date"] for entry in dated), "%Y-%m-%d"),
+                datetime.strptime(max(entry["max_date"] for entry in dated), "%Y-%m-%d"))
+
+    def get_min_max_dates(self):
+        min_date, max_date = self.date_bounds()
+        if min_date is None:
+            return datetime.now().date(), datetime.now().date()
+        return min_date, max_date
+
+    def manifest_counts(self):
+        # Liczba zadan (bez serii), zadan bez daty i zadan na priorytet z manifestu - bez wczytywania shardow.
+        # None dla manifestu zapisanego przed licznikami priorytetow.
+        total = undated = 0
+        priorities = {}
+        for key, entry in self.manifest["shards"].items():
+            if key == self.RECURRING:
+                continue
+            if "priorities" not in entry:
+                return None
+            total += entry["count"]
+            if key == self.UNDATED:
+                undated += entry["count"]
+            for priority, count in entry["priorities"].items():
+                priority = int(priority) or None
+                priorities[priority] = priorities.get(priority, 0) + count
+        return total, undated, priorities
+
+    # --- zapis ---
+
+    def save_tasks(self, tasks):
+        try:
+            shards = self.write_tasks(tasks)
+        except Exception as e:
+            logging.error(f"Error saving shards to {self.directory}: {e}")
+            return
+        # Zapisane zadania pochodza od kontrolera - ich shardow nie trzeba juz wczytywac
+        self.loaded = set(shards)
+        self.shard_of = {task.id: key for key, shard in shards.items() for task in shard}
+
+    def write_tasks(self, tasks):
+        # Bledy ida do wywolujacego; manifest zapisujemy dopiero po wszystkich shardach
+        shards = {}
+        for task in tasks:
+            shards.setdefault(self.shard_key(task), []).append(task)
+
+        for key, shard in shards.items():
+            self.shard_storage(key).write_tasks(shard)
+        for key in set(self.manifest["shards"]) - set(shards):
+            os.remove(self.shard_filename(key))
+        self.manifest["shards"] = {key: self.shard_entry(shard) for key, shard in shards.items()}
+        self.manifest["max_id"] = max([self.manifest["max_id"]] +
+                                      [entry["max_id"] for entry in self.manifest["shards"].values()])
+        self.write_manifest()
+        return shards
+
+    def record_change(self, operation, task):
+        self.record_changes([(operation, task)])
+
+    def record_changes(self, changes):
+        # Zmiany grupowane po shardach; przeniesienie do innego miesiaca to usuniecie + dodanie
+        appends = {}
+        rewrites = {}
+        for operation, task in changes:
+            old_key = self.shard_of.get(task.id)
+            new_key = self.shard_key(task)
+            if operation == "delete":
+                if old_key is not None:
+                    rewrites.setdefault(old_key, {})[task.id] = None
+                    del self.shard_of[task.id]
+                continue
+            if operation == "edit" and old_key == new_key:
+                rewrites.setdefault(new_key, {})[task.id] = task
+                continue
+            if old_key is not None:
+                rewrites.setdefault(old_key, {})[task.id] = None
+            appends.setdefault(new_key, []).append(task)
+            self.shard_of[task.id] = new_key
+
+        try:
+            for key, replaced in rewrites.items():
+                self.rewrite_shard(key, replaced, appends.pop(key, []))
+            for key, tasks in appends.items():
+                self.append_shard(key, tasks)
+            self.manifest["max_id"] = max([self.manifest["max_id"]] + [task.id for _, task in changes])
+            self.write_manifest()
+        except OSError as e:
+            logging.error(f"Error applying {len(changes)} changes to {self.directory}: {e}")
+
+    def rewrite_shard(self, key, replaced, added):
+        # Przepisujemy tylko ten jeden plik - pozostale shardy zostaja nietkniete
+        storage = self.shard_storage(key)
+        tasks = []
+        for task in storage.load_tasks():
+            if task.id in replaced:
+                task = replaced.pop(task.id)
+                if task is None:
+                    continue
+            tasks.append(task)
+        tasks.extend(added)
+        if tasks:
+            storage.save_tasks(tasks)
+            self.manifest["shards"][key] = self.shard_entry(tasks)
+        else:
+            os.remove(self.shard_filename(key))
+            self.manifest["shards"].pop(key, None)
+            self.loaded.discard(key)
+
+    def append_shard(self, key, tasks):
+        filename = self.shard_filename(key)
+        new_file = key not in self.manifest["shards"] or not os.path.exists(filename)
+        with open(filename, mode="w" if new_file else "a", newline="") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(CSVStorage.HEADER)
+            writer.writerows(CSVStorage.task_to_row(task) for task in tasks)
+
+        entry = self.manifest["shards"].get(key) if not new_file else None
+        added = self.shard_entry(tasks)
+        if entry is None:
+            self.manifest["shards"][key] = added
+            # Nowy shard jest w calosci znany kontrolerowi - nie trzeba go pozniej wczytywac
+            self.loaded.add(key)
+            return
+        entry["count"] += added["count"]
+        entry["max_id"] = max(entry["max_id"], added["max_id"])
+        if "priorities" in entry:
+            for priority, count in added["priorities"].items():
+                entry["priorities"][priority] = entry["priorities"].get(priority, 0) + count
+        if added["min_date"]:
+            entry["min_date"] = min(entry["min_date"] or added["min_date"], added["min_date"])
+            entry["max_date"] = max(entry["max_date"] or added["max_date"], added["max_date"])
@@ -0,0 +1,140 @@
+import bisect
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+CONTROLLER_OPERATIONS = (
+    "add_task", "add_tasks", "edit_task", "edit_tasks", "delete_task", "delete_tasks",
+    "get_filtered_tasks", "query_filtered_tasks", "search_tasks", "set_filter", "clear_filters", "set_sort",
+    "get_task_by_id", "get_min_max_dates", "load_next_chunk", "persist_batch", "query_page", "sync", "get_summary",
+)
+STORAGE_OPERATIONS = (
+    "load_tasks", "save_tasks", "record_changes", "query_tasks", "get_task", "get_min_max_dates",
+)
+ENGINE_OPERATIONS = ("query_tasks", "record_changes", "get_task", "get_min_max_dates")
+
+
+class OperationStats:
+    # Kubelki histogramu w mikrosekundach (gorne granice), ostatni kubelek to wszystko powyzej 1 s
+    BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+        self.allocated = 0
+        self.max_allocated = 0
+
+    def add(self, seconds, allocated):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.histogram[bisect.bisect_left(self.BUCKETS, seconds * 1e6)] += 1
+        if allocated is not None:
+            self.allocated += allocated
+            self.max_allocated = max(self.max_allocated, allocated)
+
+    def percentile(self, fraction):
+        # Gorna granica kubelka, w ktorym wypada percentyl - dokladnosc wystarczajaca do diagnozy
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= threshold and count:
+                return min(self.BUCKETS[bucket] / 1e6, self.max) if bucket < len(self.BUCKETS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "p99_seconds": self.percentile(0.99),
+            "histogram_us": {f"<={bound}": count for bound, count in zip(self.BUCKETS, self.histogram)} |
+                            {f">{self.BUCKETS[-1]}": self.histogram[-1]},
+            "allocated_bytes": self.allocated,
+            "max_allocated_bytes": self.max_allocated,
+        }
+
+
+class Profiler:
+    def __init__(self, track_memory=False):
+        # Czas mierzony zawsze (ok. 1 us na wywolanie); tracemalloc tylko na zadanie, bo spowalnia caly program
+        self.track_memory = track_memory
+        self.operations = {}
+        # Liczniki prowadzone przez profilowane obiekty (np. trafienia pamieci podrecznej widoku) - prefiks -> slownik
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def instrument(self, target, operations, prefix):
+        # Podmiana metod na obiekcie (nie w klasie) - inne instancje i wylaczony profiler nic nie kosztuja
+        for name in operations:
+            method = getattr(target, name, None)
+            if callable(method):
+                setattr(target, name, self.wrap(f"{prefix}.{name}", method))
+        return target
+
+    def wrap(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            allocated_before = tracemalloc.get_traced_memory()[0] if self.track_memory else None
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                allocated = tracemalloc.get_traced_memory()[0] - allocated_before if self.track_memory else None
+                self.record(name, elapsed, allocated)
+        return timed
+
+    def record(self, name, seconds, allocated=None):
+        with self.lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.add(seconds, allocated)
+
+    def snapshot(self):
+        with self.lock:
+            operations = {name: stats.to_dict() for name, stats in sorted(self.operations.items())}
+        counters = {f"{prefix}.{name}": value for prefix, values in sorted(self.counters.items())
+                    for name, value in sorted(values.items())}
+        return {
+            "started": self.started,
+            "uptime_seconds": time.time() - self.started,
+            "track_memory": self.track_memory,
+            "operations": operations,
+            "counters": counters,
+        }
+
+    def rows(self):
+        # Wiersze do tabeli w interfejsie, najbardziej kosztowne operacje na gorze
+        operations = self.snapshot()["operations"]
+        for name, stats in sorted(operations.items(), key=lambda item: item[1]["total_seconds"], reverse=True):
+            yield (name, stats["count"], stats["total_seconds"] * 1e3, stats["mean_seconds"] * 1e3,
+                   stats["p95_seconds"] * 1e3, stats["max_seconds"] * 1e3,
+                   stats["allocated_bytes"] / 1024 if self.track_memory else None)
+
+    def dump(self, filename):
+        with open(filename, mode="w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+def profile_controller(controller, track_memory=False):
+    profiler = Profiler(track_memory)
+    profiler.instrument(controller, CONTROLLER_OPERATIONS, "controller")
+    profiler.counters["controller"] = controller.stats
+    profiler.instrument(controller.storage, STORAGE_OPERATIONS, "storage")
+    if controller.engine is not None and controller.engine is not controller.storage:
+        profiler.instrument(controller.engine, ENGINE_OPERATIONS, "engine")
+    controller.profiler = profiler
+    return profiler
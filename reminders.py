@@ -0,0 +1,199 @@
+import bisect
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+
+class ReminderScheduler:
+    # Kolejka przypomnien: kopiec (dzien, pilnosc, id) z terminami od dzisiaj. Edycja dodaje nowy wpis, a stary
+    # zostaje w kopcu jako martwy - aktualny wpis zadania jest w self.entries, martwe sa pomijane przy zdejmowaniu.
+    # Widok daje jeden timer (set_timer w Textual, after w Tk) nastawiany na najblizszy termin, wiec w oczekiwaniu
+    # nic sie nie wykonuje.
+    MAX_SLEEP = 3600.0
+    # Wiecej zmienionych zadan naraz (import, doczytanie porcji) - taniej zbudowac kopiec od nowa
+    REBUILD_MIN = 1000
+    # Wyzszy numer to wazniejsze zadanie (5 - najwazniejsze); zadania bez priorytetu po wszystkich z priorytetem
+    NO_PRIORITY_RANK = 0
+
+    def __init__(self, controller, on_due, set_timer, cancel_timer, lead=timedelta(0), clock=datetime.now):
+        self.controller = controller
+        self.on_due = on_due
+        self.set_timer = set_timer
+        self.cancel_timer = cancel_timer
+        self.lead = lead
+        self.clock = clock
+        self.heap = []
+        self.entries = {}
+        # Posortowane wpisy, dla ktorych juz bylo przypomnienie dzisiaj - nadal naleza do najpilniejszych
+        self.due_entries = []
+        self.today = None
+        self.timer = None
+        self.timer_due = None
+        self.controller.add_listener(self.on_tasks_changed)
+        self.rebuild()
+
+    def close(self):
+        self.controller.remove_listener(self.on_tasks_changed)
+        if self.timer is not None:
+            self.cancel_timer(self.timer)
+            self.timer = None
+
+    def rank(self, priority):
+        # Mniejsza ranga wychodzi z kopca wczesniej: priorytet 5 -> -5, priorytet 1 -> -1
+        return -priority if priority is not None else self.NO_PRIORITY_RANK
+
+    def start_of_day(self):
+        now = self.clock()
+        return datetime(now.year, now.month, now.day)
+
+    def rebuild(self):
+        self.today = self.start_of_day()
+        self.entries = {}
+        self.due_entries = []
+        for task in self.controller.iter_upcoming_tasks(self.today):
+            self.entries[task.id] = (task.date.toordinal(), self.rank(task.priority), task.id)
+        self.heap = list(self.entries.values())
+        heapq.heapify(self.heap)
+        self.schedule()
+
+    def next_date(self, task):
+        # Najblizszy termin od dzisiaj; dla serii najblizsze wystapienie
+        if task.date is None:
+            return None
+        if task.recurrence is None:
+            return task.date if task.date >= self.today else None
+        return next(task.recurrence.dates(task.date, self.today), None)
+
+    def push(self, task, date):
+        if date is None:
+            self.entries.pop(task.id, None)
+            return
+        entry = (date.toordinal(), self.rank(task.priority), task.id)
+        if self.entries.get(task.id) == entry:
+            return
+        self.entries[task.id] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self.entries) + self.REBUILD_MIN:
+            # Martwych wpisow wiecej niz zywych - jedno przejscie liniowe, koszt rozlozony na wczesniejsze zmiany
+            self.heap = [entry for entry in set(self.heap) if self.is_current(entry)]
+            heapq.heapify(self.heap)
+
+    def on_tasks_changed(self, event, task_ids):
+        if event == "reloaded" or len(task_ids) >= self.REBUILD_MIN:
+            self.rebuild()
+            return
+        self.roll_over()
+        if event == "removed":
+            for task_id in task_ids:
+                self.entries.pop(task_id, None)
+        elif event in ("added", "updated"):
+            for task_id in task_ids:
+                task = self.controller.get_task_by_id(task_id)
+                if task is None:
+                    self.entries.pop(task_id, None)
+                else:
+                    self.push(task, self.next_date(task))
+        else:
+            return
+        self.schedule()
+
+    def due_time(self, entry):
+        return datetime.fromordinal(entry[0]) - self.lead
+
+    def is_current(self, entry):
+        return self.entries.get(entry[2]) == entry
+
+    def schedule(self):
+        # Martwe wpisy ze szczytu zdejmujemy od razu, zeby timer nie budzil sie na nie
+        while self.heap and not self.is_current(self.heap[0]):
+            heapq.heappop(self.heap)
+        if not self.heap:
+            if self.timer is not None:
+                self.cancel_timer(self.timer)
+                self.timer = self.timer_due = None
+            return
+        # Nie dluzej niz MAX_SLEEP - zmiana zegara czy uspienie komputera nie opozni przypomnienia o wiele
+        now = self.clock()
+        due = min(self.due_time(self.heap[0]), now + timedelta(seconds=self.MAX_SLEEP))
+        if self.timer is not None:
+            if self.timer_due <= due:
+                return
+            self.cancel_timer(self.timer)
+        self.timer_due = due
+        self.timer = self.set_timer(max(0.0, (due - now).total_seconds()), self.fire)
+
+    def roll_over(self):
+        # Nowy dzien - wczorajsze przypomnienia wypadaja z listy najpilniejszych
+        today = self.start_of_day()
+        if today == self.today:
+            return
+        self.today = today
+        first_day = today.toordinal()
+        self.retire([entry for entry in self.due_entries if entry[0] < first_day])
+        self.due_entries = [entry for entry in self.due_entries if entry[0] >= first_day]
+        self.schedule()
+
+    def retire(self, entries):
+        # Wpisy z minionych dni: zwykle zadanie wypada z kolejki, seria wraca z kolejnym wystapieniem
+        for entry in entries:
+            if not self.is_current(entry):
+                continue
+            del self.entries[entry[2]]
+            task = self.controller.get_task_by_id(entry[2])
+            if task is not None and task.recurrence is not None:
+                self.push(task, self.next_date(task))
+
+    def fire(self):
+        self.timer = self.timer_due = None
+        self.roll_over()
+        now = self.clock()
+        due = []
+        while self.heap and self.due_time(self.heap[0]) <= now:
+            entry = heapq.heappop(self.heap)
+            # Ten sam wpis mogl trafic do kopca dwa razy (edycja tam i z powrotem) - rowne wpisy wychodza po sobie
+            if self.is_current(entry) and (not due or due[-1] != entry):
+                due.append(entry)
+        tasks = self.entry_tasks(due)
+        # Spoznione wpisy z minionych dni (np. uspiony komputer) sa zglaszane, ale nie zostaja na liscie dnia
+        first_day = self.today.toordinal()
+        self.retire([entry for entry in due if entry[0] < first_day])
+        for entry in due:
+            if entry[0] < first_day:
+                continue
+            position = bisect.bisect_left(self.due_entries, entry)
+            if position == len(self.due_entries) or self.due_entries[position] != entry:
+                self.due_entries.insert(position, entry)
+        if tasks:
+            self.on_due(tasks)
+        self.schedule()
+
+    def entry_tasks(self, entries):
+        # Zadania dla wpisow; dla serii wystapienie z dnia wpisu
+        tasks = []
+        for day, _, task_id in entries:
+            task = self.controller.get_task_by_id(task_id)
+            if task is None:
+                continue
+            if task.recurrence is not None:
+                task = task.occurrence(datetime.fromordinal(day))
+            tasks.append(task)
+        return tasks
+
+    def iter_pending(self):
+        # Wpisy kopca rosnaco bez jego niszczenia: przeszukiwanie drzewa kopca od korzenia z pomocniczym kopcem
+        # kandydatow - k pierwszych kosztuje O(k log k), a nie O(n)
+        candidates = [(self.heap[0], 0)] if self.heap else []
+        while candidates:
+            entry, position = heapq.heappop(candidates)
+            if self.is_current(entry):
+                yield entry
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self.heap):
+                    heapq.heappush(candidates, (self.heap[child], child))
+
+    def most_urgent(self, count):
+        # count zadan o najwczesniejszym terminie (od dzisiaj), przy rownym terminie najwyzszy priorytet
+        self.roll_over()
+        reminded = (entry for entry in self.due_entries if self.is_current(entry))
+        ranked = (entry for entry, _ in itertools.groupby(heapq.merge(reminded, self.iter_pending())))
+        return self.entry_tasks(itertools.islice(ranked, count))
@@ -0,0 +1,67 @@
+import re
+
+
+class TextIndex:
+    TOKEN_PATTERN = re.compile(r"\w+")
+    EMPTY = frozenset()
+
+    def __init__(self):
+        self.texts = {}
+        self.tokens = {}
+        self.trigrams = {}
+
+    @staticmethod
+    def trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, task_id, text):
+        text = text.lower()
+        self.texts[task_id] = text
+        for token in set(self.TOKEN_PATTERN.findall(text)):
+            self.tokens.setdefault(token, set()).add(task_id)
+        for trigram in self.trigrams_of(text):
+            self.trigrams.setdefault(trigram, set()).add(task_id)
+
+    def remove(self, task_id):
+        text = self.texts.pop(task_id, None)
+        if text is None:
+            return
+        for token in set(self.TOKEN_PATTERN.findall(text)):
+            self.discard(self.tokens, token, task_id)
+        for trigram in self.trigrams_of(text):
+            self.discard(self.trigrams, trigram, task_id)
+
+    @staticmethod
+    def discard(postings, key, task_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del postings[key]
+
+    def search(self, query):
+        query = query.lower()
+        if not query:
+            return set(self.texts)
+
+        if len(query) >= 3:
+            # Przeciecie list trygramow od najkrotszej, potem sprawdzenie podciagu w kandydatach
+            postings = sorted((self.trigrams.get(trigram, self.EMPTY) for trigram in self.trigrams_of(query)), key=len)
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= ids
+            if len(query) == 3:
+                return candidates
+        elif self.TOKEN_PATTERN.fullmatch(query):
+            # Krotkie zapytanie miesci sie w jednym slowie - wystarczy przejrzec slownik
+            candidates = set()
+            for token, ids in self.tokens.items():
+                if query in token:
+                    candidates |= ids
+            return candidates
+        else:
+            candidates = self.texts
+
+        return {task_id for task_id in candidates if query in self.texts[task_id]}
@@ -0,0 +1,364 @@
+import asyncio
+import gc
+import json
+import os
+import signal
+import sys
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from headless import task_to_record
+
+MAX_BODY = 16 * 1024 * 1024
+MAX_PAGE = 1000
+WRITE_BATCH = 256
+CHANGE_LOG_SIZE = 4096
+SYNC_INTERVAL = 1.0
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def task_to_json(task):
+    record = task_to_record(task)
+    if record["date"] == "":
+        record["date"] = None
+    if record["priority"] == "":
+        record["priority"] = None
+    if record["recurrence"] == "":
+        record["recurrence"] = None
+    if task.key != task.id:
+        # Wystapienie zadania cyklicznego - id serii i wlasny klucz wiersza
+        record["key"] = task.key
+    return record
+
+
+class PlannerServer:
+    # Jeden kontroler dla wszystkich klientow. Wszystko dziala w jednej petli asyncio: odczyty obslugiwane sa
+    # od razu miedzy zapisami, a zapisy ida przez jedna kolejke i jeden korutynowy writer, ktory laczy
+    # zgloszenia w partie. Na dysk zapisuje watek autosave kontrolera, wiec petla nie czeka na plik.
+    def __init__(self, controller):
+        self.controller = controller
+        self.writes = None
+        self.revision = 0
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+
+    def on_change(self, event, task_ids):
+        self.revision += 1
+        self.changes.append((self.revision, event, list(task_ids)))
+
+    # --- odczyty ---
+
+    def view_params(self, query):
+        controller = self.controller
+
+        def value(name):
+            return query.get(name, [""])[0]
+
+        try:
+            params = (
+                (controller.parse_date(value("min_date")), controller.parse_date(value("max_date"))),
+                (controller.parse_priority(value("min_priority") or None),
+                 controller.parse_priority(value("max_priority") or None)),
+                value("name").strip(),
+                value("descriptions") in ("1", "true"),
+                value("sort") or "date",
+                value("reverse") in ("1", "true"),
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if params[4] not in ("date", "priority"):
+            raise HTTPError(400, "Sort must be 'date' or 'priority'.")
+        return params
+
+    def in_view(self, params, query):
+        # Stan filtra kontrolera podmieniany tylko na czas zapytania - nic innego nie dziala w tym czasie w petli
+        controller = self.controller
+        saved = (controller.filtered_date, controller.filtered_priority, controller.filtered_name,
+                 controller.filtered_descriptions, controller.sort_key, controller.sort_reverse)
+        (controller.filtered_date, controller.filtered_priority, controller.filtered_name,
+         controller.filtered_descriptions, controller.sort_key, controller.sort_reverse) = params
+        try:
+            return query()
+        finally:
+            (controller.filtered_date, controller.filtered_priority, controller.filtered_name,
+             controller.filtered_descriptions, controller.sort_key, controller.sort_reverse) = saved
+
+    def get_tasks(self, query):
+        params = self.view_params(query)
+        if query.get("fields", [""])[0] == "id":
+            tasks = self.in_view(params, self.controller.get_filtered_tasks)
+            # Klucze wierszy: id, a dla wystapien zadan cyklicznych "id@data"
+            ids = list(map(int, tasks.ids())) if hasattr(tasks, "ids") else [task.key for task in tasks]
+            return {"revision": self.revision, "total": len(ids), "ids": ids}
+        try:
+            offset = max(0, int(query.get("offset", ["0"])[0]))
+            limit = min(MAX_PAGE, max(0, int(query.get("limit", [str(MAX_PAGE)])[0])))
+        except ValueError:
+            raise HTTPError(400, "Offset and limit must be integers.")
+        # Sama strona z indeksow - zapis nie uniewaznia zadnej zbudowanej wczesniej pelnej listy
+        page, total = self.in_view(params, lambda: self.controller.query_page(offset, limit))
+        return {"revision": self.revision, "total": total, "offset": offset, "tasks": list(map(task_to_json, page))}
+
+    def get_task(self, task_id):
+        task = self.controller.get_task_by_id(task_id)
+        if task is None:
+            raise HTTPError(404, f"No task with ID: {task_id}")
+        return task_to_json(task)
+
+    def get_dates(self):
+        min_date, max_date = self.controller.get_min_max_dates()
+        return {"min_date": min_date.strftime("%Y-%m-%d"), "max_date": max_date.strftime("%Y-%m-%d")}
+
+    def get_summary(self, query):
+        try:
+            min_date = self.controller.parse_date(query.get("min_date", [""])[0])
+            max_date = self.controller.parse_date(query.get("max_date", [""])[0])
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        summary = self.controller.get_summary(min_date, max_date)
+        # Klucze obiektow JSON musza byc napisami - priorytety i dni jako pary
+        return {
+            "total": summary["total"], "undated": summary["undated"], "recurring": summary["recurring"],
+            "min_date": summary["min_date"].strftime("%Y-%m-%d") if summary["min_date"] else None,
+            "max_date": summary["max_date"].strftime("%Y-%m-%d") if summary["max_date"] else None,
+            "priorities": [[priority, count] for priority, count in summary["priorities"].items()],
+            "days": [[date.strftime("%Y-%m-%d"), count] for date, count in summary["days"]],
+        }
+
+    def get_changes(self, query):
+        if "since" not in query:
+            # Nowy klient pyta tylko o biezaca rewizje
+            return {"revision": self.revision, "reload": False, "events": []}
+        try:
+            since = int(query["since"][0])
+        except ValueError:
+            raise HTTPError(400, "'since' must be an integer.")
+        if since > self.revision or (self.changes and since < self.changes[0][0] - 1):
+            # Klient nie widzial zbyt wielu zmian (albo serwer wystartowal od nowa) - niech odswiezy wszystko
+            return {"revision": self.revision, "reload": True, "events": []}
+        events = [[event, task_ids] for revision, event, task_ids in self.changes if revision > since]
+        return {"revision": self.revision, "reload": False, "events": events}
+
+    # --- zapisy ---
+
+    async def submit(self, operation, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((operation, payload, future))
+        return await future
+
+    async def run_writer(self):
+        # Jedyny korutynowy writer: kolejne zgloszenia tego samego rodzaju trafiaja do kontrolera jedna partia
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < WRITE_BATCH and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+            start = 0
+            while start < len(batch):
+                end = start + 1
+                while end < len(batch) and batch[end][0] == batch[start][0] and batch[start][0] != "edit":
+                    end += 1
+                try:
+                    self.apply_writes(batch[start][0], batch[start:end])
+                except Exception as e:
+                    for _, _, future in batch[start:end]:
+                        if not future.done():
+                            future.set_exception(e)
+                start = end
+
+    def apply_writes(self, operation, items):
+        controller = self.controller
+        if operation == "add":
+            # Walidacja per zgloszenie - bledny wpis jednego klienta nie odrzuca wpisow pozostalych
+            accepted = []
+            for _, entries, future in items:
+                try:
+                    parsed = [controller.validate_entry(*entry) for entry in entries]
+                except ValueError as e:
+                    future.set_result((400, {"error": str(e)}))
+                    continue
+                accepted.append((parsed, future))
+            tasks = controller.insert_tasks([entry for parsed, _ in accepted for entry in parsed])
+            position = 0
+            for parsed, future in accepted:
+                ids = [task.id for task in tasks[position:position + len(parsed)]]
+                position += len(parsed)
+                future.set_result((201, {"ids": ids, "revision": self.revision}))
+        elif operation == "delete":
+            controller.delete_tasks([task_id for _, task_ids, _ in items for task_id in task_ids])
+            for _, _, future in items:
+                future.set_result((200, {"revision": self.revision}))
+        elif operation == "edit":
+            for _, (task_id, fields), future in items:
+                task = controller.get_task_by_id(task_id)
+                if task is None:
+                    future.set_result((404, {"error": f"No task with ID: {task_id}"}))
+                    continue
+                error = controller.edit_task(task, fields.get("title"), fields.get("description"),
+                                             fields.get("date"), fields.get("priority"), fields.get("recurrence"))
+                if error:
+                    future.set_result((400, {"error": error}))
+                else:
+                    future.set_result((200, {"revision": self.revision}))
+        elif operation == "sync":
+            controller.sync()
+            for _, _, future in items:
+                future.set_result((200, {"revision": self.revision}))
+
+    @staticmethod
+    def parse_entry(record):
+        if not isinstance(record, dict) or not record.get("title"):
+            raise HTTPError(400, "Each task needs a 'title'.")
+        priority = record.get("priority")
+        return (str(record["title"]), str(record.get("description") or ""), record.get("date") or "",
+                str(priority) if priority not in (None, "") else None, str(record.get("recurrence") or ""))
+
+    async def sync_periodically(self):
+        # Zmiany zapisane przez inne procesy (np. polecenia headless) trafiaja do kontrolera przez writer
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            await self.submit("sync", None)
+
+    # --- HTTP ---
+
+    async def route(self, method, path, query, body):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["tasks"]:
+            if method == "GET":
+                return 200, self.get_tasks(query)
+            if method == "POST":
+                records = body.get("tasks") if isinstance(body, dict) and "tasks" in body else [body]
+                if not isinstance(records, list) or not records:
+                    raise HTTPError(400, "Expected a task object or {\"tasks\": [...]}.")
+                return await self.submit("add", [self.parse_entry(record) for record in records])
+            raise HTTPError(405, f"{method} not allowed on /tasks")
+        if parts == ["tasks", "delete"] and method == "POST":
+            task_ids = body.get("ids") if isinstance(body, dict) else None
+            if not isinstance(task_ids, list) or not all(isinstance(task_id, int) for task_id in task_ids):
+                raise HTTPError(400, "Expected {\"ids\": [...]}.")
+            return await self.submit("delete", task_ids)
+        if len(parts) == 2 and parts[0] == "tasks":
+            try:
+                task_id = int(parts[1])
+            except ValueError:
+                raise HTTPError(404, f"No task with ID: {parts[1]}")
+            if method == "GET":
+                return 200, self.get_task(task_id)
+            if method == "PATCH":
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Expected a JSON object.")
+                fields = {name: None if body.get(name) is None else str(body[name])
+                          for name in ("title", "description", "date", "priority", "recurrence")}
+                return await self.submit("edit", (task_id, fields))
+            if method == "DELETE":
+                if self.controller.get_task_by_id(task_id) is None:
+                    raise HTTPError(404, f"No task with ID: {task_id}")
+                return await self.submit("delete", [task_id])
+            raise HTTPError(405, f"{method} not allowed on /tasks/{task_id}")
+        if parts == ["dates"] and method == "GET":
+            return 200, self.get_dates()
+        if parts == ["summary"] and method == "GET":
+            return 200, self.get_summary(query)
+        if parts == ["changes"] and method == "GET":
+            return 200, self.get_changes(query)
+        raise HTTPError(404, f"Unknown endpoint: {method} {path}")
+
+    async def handle_client(self, reader, writer):
+        # HTTP/1.1 z keep-alive - klient wysyla kolejne zapytania tym samym polaczeniem
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                status, payload = await self.respond(method, target, reader, length)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, reader, length):
+        if length > MAX_BODY:
+            return 413, {"error": "Request body too large."}
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        try:
+            try:
+                body = json.loads(body) if body else None
+            except ValueError:
+                raise HTTPError(400, "Request body is not valid JSON.")
+            return await self.route(method, url.path, parse_qs(url.query), body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def serve(self, host="127.0.0.1", port=8765, socket_path=None):
+        self.controller.finish_loading()
+        # Indeks tekstowy od razu - inaczej pierwsze wyszukiwanie zatrzymaloby petle dla wszystkich klientow
+        self.controller.build_text_index()
+        # Wczytane zadania i indeksy zyja do konca procesu - pelne przebiegi GC po nich dawaly przestoje ~100 ms
+        gc.collect()
+        gc.freeze()
+        # Dziennik zmian dopiero po wczytaniu - porcje startowe nie sa zmianami dla klientow
+        self.controller.add_listener(self.on_change)
+        self.writes = asyncio.Queue()
+        writer_task = asyncio.create_task(self.run_writer())
+        sync_task = asyncio.create_task(self.sync_periodically())
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle_client, socket_path)
+            address = f"unix:{socket_path}"
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            host, port = server.sockets[0].getsockname()[:2]
+            address = f"{host}:{port}"
+        print(f"Listening on {address}", flush=True)
+        try:
+            # SIGTERM (np. od menedzera procesow) konczy serwer tak samo jak Ctrl+C - z zapisem zaleglych zmian
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+        except (NotImplementedError, AttributeError):
+            pass
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            writer_task.cancel()
+            sync_task.cancel()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def run_server(controller, host="127.0.0.1", port=8765, socket_path=None):
+    try:
+        asyncio.run(PlannerServer(controller).serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        print("Server stopped.", file=sys.stderr)
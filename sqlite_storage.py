@@ -0,0 +1,230 @@
+import logging
+import sqlite3
+from datetime import datetime
+from controller import Storage
+from model import Recurrence, Task
+
+
+class SQLiteStorage(Storage):
+    queryable = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            date INTEGER,
+            priority INTEGER,
+            recurrence TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks (date, id);
+        CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, date, id);
+        CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks (title COLLATE NOCASE);
+    """
+
+    # Stale zapytania - sqlite3 kompiluje je raz i trzyma w cache polaczenia
+    SELECT_COLUMNS = "SELECT title, description, date, priority, id, recurrence FROM tasks"
+    INSERT_SQL = "INSERT INTO tasks (title, description, date, priority, id, recurrence) VALUES (?, ?, ?, ?, ?, ?)"
+    # Numerowane parametry - ta sama krotka co w INSERT_SQL
+    UPDATE_SQL = ("UPDATE tasks SET title = ?1, description = ?2, date = ?3, priority = ?4, recurrence = ?6 "
+                  "WHERE id = ?5")
+    DELETE_SQL = "DELETE FROM tasks WHERE id = ?"
+    GET_SQL = SELECT_COLUMNS + " WHERE id = ?"
+
+    SORT_COLUMNS = {
+        "date": "date {order}, id {order}",
+        "priority": "priority {order}, date {order}, id {order}",
+    }
+
+    def __init__(self, filename="tasks.db", log_filename="errors.log"):
+        self.filename = filename
+        self.log_filename = log_filename
+
+        logging.basicConfig(
+            filename=self.log_filename,
+            level=logging.ERROR,
+            format="%(asctime)s - %(levelname)s - %(message)s"
+        )
+
+        self.connection = sqlite3.connect(filename, cached_statements=256)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        # Bazy sprzed zadan cyklicznych nie maja kolumny recurrence
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")}
+        if "recurrence" not in columns:
+            self.connection.execute("ALTER TABLE tasks ADD COLUMN recurrence TEXT")
+            self.connection.commit()
+        self.data_version = self.read_data_version()
+
+    @staticmethod
+    def task_to_params(task):
+        date = task.date.toordinal() if task.date else None
+        recurrence = str(task.recurrence) if task.recurrence else None
+        return task.title, task.description, date, task.priority, task.id, recurrence
+
+    @staticmethod
+    def row_to_task(row):
+        title, description, date, priority, task_id, recurrence = row
+        date = datetime.fromordinal(date) if date is not None else None
+        recurrence = Recurrence.parse(recurrence) if recurrence else None
+        return Task(title, description, date, priority, task_id, recurrence)
+
+    def load_tasks(self):
+        try:
+            rows = self.connection.execute(self.SELECT_COLUMNS + " ORDER BY id")
+            return [self.row_to_task(row) for row in rows]
+        except sqlite3.Error as e:
+            logging.error(f"Error reading database {self.filename}: {e}")
+            return []
+
+    def iter_tasks(self):
+        for row in self.connection.execute(self.SELECT_COLUMNS + " ORDER BY id"):
+            yield self.row_to_task(row)
+
+    def save_tasks(self, tasks):
+        try:
+            self.write_tasks(tasks)
+        except sqlite3.Error as e:
+            logging.error(f"Error saving data to {self.filename}: {e}")
+
+    def write_tasks(self, tasks):
+        # Jedna transakcja - przy bledzie tabela zostaje jak byla, a wyjatek idzie do wywolujacego
+        with self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.executemany(self.INSERT_SQL, (self.task_to_params(task) for task in tasks))
+
+    def record_change(self, operation, task):
+        self.record_changes([(operation, task)])
+
+    def record_changes(self, changes):
+        try:
+            with self.connection:
+                for operation, task in changes:
+                    if operation == "add":
+                        self.connection.execute(self.INSERT_SQL, self.task_to_params(task))
+                    elif operation == "edit":
+                        self.connection.execute(self.UPDATE_SQL, self.task_to_params(task))
+                    elif operation == "delete":
+                        self.connection.execute(self.DELETE_SQL, (task.id,))
+        except sqlite3.Error as e:
+            logging.error(f"Error applying {len(changes)} changes to {self.filename}: {e}")
+
+    def load_series(self):
+        # Zadania cykliczne - kontroler rozwija je w wystapienia, query_tasks ich nie zwraca
+        try:
+            rows = self.connection.execute(self.SELECT_COLUMNS + " WHERE recurrence IS NOT NULL ORDER BY id")
+            return [self.row_to_task(row) for row in rows]
+        except sqlite3.Error as e:
+            logging.error(f"Error reading database {self.filename}: {e}")
+            return []
+
+    def get_task(self, task_id):
+        row = self.connection.execute(self.GET_SQL, (task_id,)).fetchone()
+        return self.row_to_task(row) if row else None
+
+    def max_task_id(self):
+        return self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+
+    def reserve_ids(self, count, next_id):
+        # Inny proces mogl juz dodac zadania - id liczymy od aktualnego maksimum w bazie
+        return max(next_id, self.max_task_id() + 1)
+
+    def read_data_version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def has_external_changes(self):
+        # data_version rosnie tylko po zatwierdzeniu transakcji przez inne polaczenie
+        return self.read_data_version() != self.data_version
+
+    def poll_changes(self):
+        version = self.read_data_version()
+        if version == self.data_version:
+            return []
+        self.data_version = version
+        return None
+
+    def count_tasks(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def get_min_max_dates(self):
+        min_date, max_date = self.connection.execute(
+            "SELECT MIN(date), MAX(date) FROM tasks WHERE date IS NOT NULL").fetchone()
+        if min_date is None:
+            return datetime.now().date(), datetime.now().date()
+        return datetime.fromordinal(min_date), datetime.fromordinal(max_date)
+
+    def aggregate_counts(self):
+        # Liczniki startowe dla TaskAggregates kontrolera (bez zadan cyklicznych - te liczy kontroler)
+        try:
+            dates = dict(self.connection.execute(
+                "SELECT COALESCE(date, 0), COUNT(*) FROM tasks WHERE recurrence IS NULL GROUP BY date"))
+            priorities = dict(self.connection.execute(
+                "SELECT priority, COUNT(*) FROM tasks WHERE recurrence IS NULL GROUP BY priority"))
+        except sqlite3.Error as e:
+            logging.error(f"Error reading database {self.filename}: {e}")
+            return {}, {}
+        return dates, priorities
+
+    def build_where(self, min_date, max_date, min_priority, max_priority, name, search_descriptions=False):
+        conditions = ["recurrence IS NULL"]
+        params = []
+        if min_date:
+            conditions.append("date >= ?")
+            params.append(min_date.toordinal())
+        if max_date and min_date:
+            conditions.append("date <= ?")
+            params.append(max_date.toordinal())
+        elif max_date:
+            # Zadania bez daty przechodza filtr bez dolnej granicy - jak w indeksie dat kontrolera i w shardach
+            conditions.append("(date <= ? OR date IS NULL)")
+            params.append(max_date.toordinal())
+        if min_priority is not None:
+            conditions.append("priority >= ?")
+            params.append(min_priority)
+        if max_priority is not None and min_priority is not None:
+            conditions.append("priority <= ?")
+            params.append(max_priority)
+        elif max_priority is not None:
+            # Zadania bez priorytetu - ta sama zasada co dla zadan bez daty
+            conditions.append("(priority <= ? OR priority IS NULL)")
+            params.append(max_priority)
+        if name:
+            escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            if search_descriptions:
+                conditions.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+                params.extend([f"%{escaped}%", f"%{escaped}%"])
+            else:
+                conditions.append("title LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+
+        where = " WHERE " + " AND ".join(conditions)
+        return where, params
+
+    def query_tasks(self, min_date, max_date, min_priority, max_priority, name, sort_key="date", reverse=False,
+                    search_descriptions=False):
+        where, params = self.build_where(min_date, max_date, min_priority, max_priority, name, search_descriptions)
+        order = self.SORT_COLUMNS.get(sort_key, self.SORT_COLUMNS["date"]).format(order="DESC" if reverse else "ASC")
+        try:
+            rows = self.connection.execute(f"{self.SELECT_COLUMNS}{where} ORDER BY {order}", params)
+            return [self.row_to_task(row) for row in rows]
+        except sqlite3.Error as e:
+            logging.error(f"Error querying {self.filename}: {e}")
+            return []
+
+    def query_page(self, offset, limit, min_date, max_date, min_priority, max_priority, name, sort_key="date",
+                   reverse=False, search_descriptions=False):
+        # Jedna strona (LIMIT/OFFSET po indeksie sortowania) i liczba trafien - bez wczytywania reszty wierszy
+        where, params = self.build_where(min_date, max_date, min_priority, max_priority, name, search_descriptions)
+        order = self.SORT_COLUMNS.get(sort_key, self.SORT_COLUMNS["date"]).format(order="DESC" if reverse else "ASC")
+        try:
+            total = self.connection.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+            rows = self.connection.execute(f"{self.SELECT_COLUMNS}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                                           params + [limit, offset])
+            return [self.row_to_task(row) for row in rows], total
+        except sqlite3.Error as e:
+            logging.error(f"Error querying {self.filename}: {e}")
+            return [], 0
+
+    def close(self):
+        self.connection.close()
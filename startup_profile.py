@@ -0,0 +1,58 @@
+import builtins
+import sys
+import time
+
+
+class StartupProfiler:
+    # Odpowiednik `python -X importtime` wlaczany flaga programu, z dodatkowym podzialem na etapy startu
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        self.stack = []
+        self.phases = []
+        self.original_import = None
+
+    def start(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+
+    def stop(self):
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules and not fromlist:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        loaded = len(sys.modules)
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            # Tylko importy, ktore naprawde cos zaladowaly - reszta to odczyt z sys.modules
+            if len(sys.modules) > loaded:
+                self.imports.append((len(self.stack), name, elapsed - children, elapsed))
+
+    def mark(self, phase):
+        self.phases.append((phase, time.perf_counter() - self.started))
+
+    def report(self, out=sys.stderr):
+        self.stop()
+        out.write("import time: self [us] | cumulative | imported package\n")
+        for depth, name, own, cumulative in self.imports:
+            out.write(f"import time: {own * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}\n")
+
+        out.write("\nstartup phase          elapsed [ms]   total [ms]\n")
+        previous = 0.0
+        for phase, at in self.phases:
+            out.write(f"{phase:<22} {(at - previous) * 1e3:12.1f} {at * 1e3:12.1f}\n")
+            previous = at
+        top_level = sum(cumulative for depth, _, _, cumulative in self.imports if depth == 0)
+        out.write(f"{'(imports in total)':<22} {top_level * 1e3:12.1f}\n")
+        out.flush()
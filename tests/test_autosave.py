@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autosave import AutosaveWorker
+from controller import CSVStorage, PlannerController
+from model import Task
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.batches = []
+
+    def record_changes(self, changes):
+        if changes:
+            self.batches.append([(operation, task.title) for operation, task in changes])
+
+    def compact(self, tasks):
+        pass
+
+
+class PausedWorker(AutosaveWorker):
+    # Pierwszy zapis watku autosave czeka na sygnal testu - zmiany sa juz pobrane, ale jeszcze nie zapisane
+    def __init__(self, storage, delay):
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        super().__init__(storage, delay)
+
+    def write(self, snapshot, compact, changes):
+        if threading.current_thread() is self.thread and not self.writing.is_set():
+            self.writing.set()
+            self.release.wait(5)
+        super().write(snapshot, compact, changes)
+
+
+class AutosaveJournalTest(unittest.TestCase):
+    def test_recurring_task_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "tasks.csv")
+            log_filename = os.path.join(directory, "errors.log")
+            controller = PlannerController(CSVStorage(filename, log_filename), autosave_delay=0.01)
+            self.assertIsNone(controller.add_task("Gym", "", "2026-10-20", "2", "weekly"))
+            self.assertIsNone(controller.add_task("Dentist", "", "2026-10-21", "1"))
+            gym = next(task for task in controller.iter_tasks() if task.title == "Gym")
+            self.assertIsNone(controller.edit_task(gym, new_recurrence="every 2 days count 5"))
+            controller.close()
+
+            reloaded = PlannerController(CSVStorage(filename, log_filename))
+            tasks = {task.title: task for task in reloaded.iter_tasks()}
+            self.assertEqual(str(tasks["Gym"].recurrence), "every 2 days count 5")
+            self.assertIsNone(tasks["Dentist"].recurrence)
+            reloaded.close()
+
+    def test_flush_waits_for_the_batch_being_written(self):
+        storage = RecordingStorage()
+        worker = PausedWorker(storage, delay=0.01)
+        task = Task("v1", "", None, None, 1)
+        worker.submit("edit", task)
+        self.assertTrue(worker.writing.wait(5))
+
+        # Nowsza wersja zapisana przez flush() z innego watku (jak sync() w interfejsie) nie moze wyprzedzic v1
+        task.title = "v2"
+        worker.submit("edit", task)
+        flusher = threading.Thread(target=worker.flush)
+        flusher.start()
+        flusher.join(0.1)
+        worker.release.set()
+        flusher.join(5)
+        worker.close()
+        self.assertEqual(storage.batches, [[("edit", "v1")], [("edit", "v2")]])
+
+if __name__ == "__main__":
+    unittest.main()
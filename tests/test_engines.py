@@ -0,0 +1,73 @@
+import itertools
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller import CSVStorage, PlannerController
+from partitioned_storage import PartitionedStorage
+from sqlite_storage import SQLiteStorage
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from binary_storage import BinaryStorage
+
+
+class EngineFilterTest(unittest.TestCase):
+    # Te same zadania (tez bez daty i bez priorytetu) i filtry musza dac ten sam wynik w kazdym silniku
+    DATES = ["2026-01-05", "2026-02-10", "2026-03-15", ""]
+    PRIORITIES = ["1", "3", "5", None]
+    DATE_FILTERS = [(None, None), ("2026-02-01", None), (None, "2026-02-28"), ("2026-02-01", "2026-03-31")]
+    PRIORITY_FILTERS = [(None, None), ("2", None), (None, "3"), ("1", "4")]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.log_filename = os.path.join(self.directory.name, "errors.log")
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def controllers(self):
+        controllers = {
+            "dict": PlannerController(CSVStorage(self.path("dict.csv"), self.log_filename)),
+            "sqlite": PlannerController(SQLiteStorage(self.path("tasks.db"), self.log_filename)),
+            "partitioned": PlannerController(PartitionedStorage(self.path("shards"), self.log_filename)),
+        }
+        if numpy is not None:
+            controllers["columnar"] = PlannerController(CSVStorage(self.path("columnar.csv"), self.log_filename),
+                                                        columnar=True)
+            controllers["binary"] = PlannerController(BinaryStorage(self.path("tasks.bin"), self.log_filename))
+        for controller in controllers.values():
+            self.addCleanup(controller.close)
+        return controllers
+
+    def test_filters_agree_on_undated_tasks(self):
+        controllers = self.controllers()
+        entries = [(f"Task {number}", "", date, priority, None) for number, (date, priority)
+                   in enumerate(itertools.product(self.DATES, self.PRIORITIES))]
+        for controller in controllers.values():
+            self.assertIsNone(controller.add_tasks(entries))
+
+        for (min_date, max_date), (min_priority, max_priority) in itertools.product(self.DATE_FILTERS,
+                                                                                    self.PRIORITY_FILTERS):
+            results = {}
+            for mode, controller in controllers.items():
+                controller.clear_filters()
+                self.assertIsNone(controller.set_filter(min_date, max_date, min_priority, max_priority, ""))
+                page, total = controller.get_filtered_tasks(0, len(entries))
+                results[mode] = (sorted(task.title for task in page), total)
+            expected = results.pop("dict")
+            for mode, result in results.items():
+                with self.subTest(mode=mode, date=(min_date, max_date), priority=(min_priority, max_priority)):
+                    self.assertEqual(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
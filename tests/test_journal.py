@@ -0,0 +1,122 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller import CSVStorage
+from model import Recurrence, Task
+
+
+def rows(tasks):
+    return sorted(CSVStorage.task_to_row(task) for task in tasks)
+
+
+class CSVJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filename = os.path.join(self.directory.name, "tasks.csv")
+        self.log_filename = os.path.join(self.directory.name, "errors.log")
+
+    def storage(self, **options):
+        return CSVStorage(self.filename, self.log_filename, **options)
+
+    def snapshot(self):
+        tasks = [Task(f"Task {number}", "", datetime(2026, 3, number), number, number) for number in range(1, 6)]
+        self.storage().write_tasks(tasks)
+        return tasks
+
+    def test_replay_after_edit_and_delete(self):
+        tasks = self.snapshot()
+        storage = self.storage()
+        storage.load_tasks()
+        edited = Task("Edited", "changed", None, None, 2, Recurrence.parse("weekly count 2"))
+        added = Task("Added", "", datetime(2026, 4, 1), 3, 6)
+        storage.record_changes([("edit", edited), ("delete", tasks[3]), ("add", added)])
+        # Kilka zmian tego samego zadania - wygrywa ostatnia
+        storage.record_change("edit", Task("Edited twice", "", None, 1, 5))
+        storage.record_change("delete", added)
+        storage.record_change("add", Task("Added again", "", None, None, 7))
+
+        expected = [tasks[0], edited, tasks[2], Task("Edited twice", "", None, 1, 5),
+                    Task("Added again", "", None, None, 7)]
+        reloaded = self.storage()
+        self.assertEqual(rows(reloaded.load_tasks()), rows(expected))
+        self.assertEqual(reloaded.snapshot_count, 5)
+        self.assertEqual(reloaded.journal_count, 6)
+        # Ponizej progu dziennik zostaje - snapshot nie jest przepisywany przy odczycie
+        self.assertTrue(os.path.exists(storage.journal_filename))
+
+    def test_compaction_threshold(self):
+        tasks = self.snapshot()
+        storage = self.storage(compact_min_records=3, compact_ratio=0.5)
+        storage.load_tasks()
+        for number, task in enumerate(tasks[:3]):
+            storage.record_change("edit", Task(f"Edit {number}", "", task.date, task.priority, task.id))
+        # Prog to max(3, 0.5 * 5) - trzy wpisy jeszcze go nie przekraczaja
+        self.assertEqual(storage.journal_count, 3)
+        self.assertFalse(storage.needs_compaction())
+        storage.record_change("delete", tasks[4])
+        self.assertTrue(storage.needs_compaction())
+
+        reloaded = self.storage(compact_min_records=3, compact_ratio=0.5)
+        loaded = reloaded.load_tasks()
+        self.assertEqual(len(loaded), 4)
+        # Odczyt ponad progiem kompaktuje: snapshot ma wszystkie zmiany, dziennika juz nie ma
+        self.assertFalse(os.path.exists(reloaded.journal_filename))
+        self.assertEqual((reloaded.snapshot_count, reloaded.journal_count), (4, 0))
+        self.assertEqual(rows(self.storage().load_tasks()), rows(loaded))
+
+    def test_journal_survives_crash_after_snapshot_replace(self):
+        tasks = self.snapshot()
+        storage = self.storage()
+        storage.load_tasks()
+        edited = Task("Edited", "", datetime(2026, 5, 1), 9, 1)
+        added = Task("Added", "", None, None, 6)
+        storage.record_changes([("edit", edited), ("delete", tasks[1]), ("add", added)])
+        journal_copy = storage.journal_filename + ".copy"
+        shutil.copyfile(storage.journal_filename, journal_copy)
+        expected = self.storage().load_tasks()
+
+        # Awaria miedzy os.replace snapshotu a usunieciem dziennika - stary dziennik lezy obok nowego snapshotu
+        storage.write_tasks(expected)
+        self.assertFalse(os.path.exists(storage.journal_filename))
+        shutil.copyfile(journal_copy, storage.journal_filename)
+
+        reloaded = self.storage().load_tasks()
+        self.assertEqual(rows(reloaded), rows(expected))
+        self.assertEqual(len({task.id for task in reloaded}), len(reloaded))
+
+    def test_poll_changes_from_other_process(self):
+        self.snapshot()
+        reader, writer = self.storage(), self.storage()
+        reader.load_tasks()
+        writer.load_tasks()
+        self.assertFalse(reader.has_external_changes())
+        self.assertEqual(reader.poll_changes(), [])
+
+        edited = Task("Edited", "", None, 2, 3)
+        writer.record_changes([("edit", edited), ("delete", Task("", "", None, None, 4))])
+        self.assertTrue(reader.has_external_changes())
+        changes = reader.poll_changes()
+        self.assertEqual([(operation, task_id) for operation, task_id, _ in changes], [("edit", 3), ("delete", 4)])
+        self.assertEqual(CSVStorage.task_to_row(changes[0][2]), CSVStorage.task_to_row(edited))
+        self.assertEqual(reader.poll_changes(), [])
+
+        # Wlasne wpisy czytelnika nie wracaja do niego jako cudze zmiany
+        reader.record_change("add", Task("Own", "", None, None, 6))
+        self.assertEqual(reader.poll_changes(), [])
+
+        # Kompaktowanie przez inny proces podmienia snapshot - czytelnik musi wczytac wszystko od nowa
+        writer.compact(writer.load_tasks())
+        self.assertIsNone(reader.poll_changes())
+        self.assertEqual(len(reader.load_tasks()), 5)
+        self.assertEqual(reader.poll_changes(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
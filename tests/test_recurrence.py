@@ -0,0 +1,107 @@
+import itertools
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Recurrence
+
+
+def day(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+class RecurrenceDatesTest(unittest.TestCase):
+    # (regula, start, min_date, max_date, oczekiwane daty)
+    CASES = [
+        # Dzien miesiaca przycinany do dlugosci miesiaca, kolejne wystapienia wracaja do dnia startu
+        ("monthly", "2026-01-31", None, "2026-05-31",
+         ["2026-01-31", "2026-02-28", "2026-03-31", "2026-04-30", "2026-05-31"]),
+        ("monthly", "2024-01-31", None, "2024-03-31", ["2024-01-31", "2024-02-29", "2024-03-31"]),
+        ("every 2 months", "2025-12-31", None, "2026-06-30", ["2025-12-31", "2026-02-28", "2026-04-30", "2026-06-30"]),
+        ("every 12 months", "2024-02-29", None, "2026-03-01", ["2024-02-29", "2025-02-28", "2026-02-28"]),
+        # until jest wlacznie; until przed startem - brak wystapien
+        ("daily until 2026-03-05", "2026-03-01", None, None,
+         ["2026-03-01", "2026-03-02", "2026-03-03", "2026-03-04", "2026-03-05"]),
+        ("daily until 2026-02-28", "2026-03-01", None, None, []),
+        ("every 3 days until 2026-03-09", "2026-03-01", None, "2026-12-31", ["2026-03-01", "2026-03-04", "2026-03-07"]),
+        ("weekly until 2026-12-31", "2026-03-01", None, "2026-03-15", ["2026-03-01", "2026-03-08", "2026-03-15"]),
+        # count liczy od startu serii, nie od poczatku okna
+        ("weekly count 3", "2026-03-01", None, None, ["2026-03-01", "2026-03-08", "2026-03-15"]),
+        ("weekly count 3", "2026-03-01", "2026-03-05", None, ["2026-03-08", "2026-03-15"]),
+        ("weekly count 3", "2026-03-01", "2026-03-16", None, []),
+        ("monthly count 2", "2026-01-31", None, "2026-12-31", ["2026-01-31", "2026-02-28"]),
+        # Okno przed startem i okno zakonczone przed startem
+        ("daily", "2026-03-10", "2026-03-01", "2026-03-11", ["2026-03-10", "2026-03-11"]),
+        ("daily", "2026-03-10", "2026-03-01", "2026-03-09", []),
+        # Dolna granica miedzy krokami - pierwsze wystapienie po niej
+        ("every 3 days", "2026-03-01", "2026-03-05", "2026-03-13", ["2026-03-07", "2026-03-10", "2026-03-13"]),
+        ("monthly", "2026-01-31", "2026-03-15", "2026-05-01", ["2026-03-31", "2026-04-30"]),
+        ("every 2 weeks", "2026-03-01", "2026-03-15", "2026-03-28", ["2026-03-15"]),
+    ]
+
+    def test_dates_in_window(self):
+        for rule, start, min_date, max_date, expected in self.CASES:
+            recurrence = Recurrence.parse(rule)
+            window = (day(start), min_date and day(min_date), max_date and day(max_date))
+            with self.subTest(rule=rule, start=start, min_date=min_date, max_date=max_date):
+                dates = [date.strftime("%Y-%m-%d") for date in recurrence.dates(*window)]
+                self.assertEqual(dates, expected)
+                self.assertEqual(list(recurrence.dates(*window, reverse=True)), [day(date) for date in expected[::-1]])
+                self.assertEqual(recurrence.count_between(*window), len(expected))
+
+    def test_endless_series_with_min_bound(self):
+        # (regula, start, min_date, pierwsze trzy daty)
+        cases = [
+            ("daily", "2026-03-01", "2026-03-10", ["2026-03-10", "2026-03-11", "2026-03-12"]),
+            ("every 3 days", "2026-03-01", "2026-03-05", ["2026-03-07", "2026-03-10", "2026-03-13"]),
+            ("monthly", "2026-01-31", "2026-03-01", ["2026-03-31", "2026-04-30", "2026-05-31"]),
+            ("weekly", "2026-03-01", "2026-02-01", ["2026-03-01", "2026-03-08", "2026-03-15"]),
+        ]
+        for rule, start, min_date, expected in cases:
+            recurrence = Recurrence.parse(rule)
+            with self.subTest(rule=rule, start=start, min_date=min_date):
+                self.assertIsNone(recurrence.number_range(day(start), day(min_date)))
+                self.assertIsNone(recurrence.count_between(day(start), day(min_date)))
+                dates = itertools.islice(recurrence.dates(day(start), day(min_date)), 3)
+                self.assertEqual([date.strftime("%Y-%m-%d") for date in dates], expected)
+                with self.assertRaises(ValueError):
+                    next(recurrence.dates(day(start), day(min_date), reverse=True))
+
+    def test_window_matches_walk_from_start(self):
+        # Numery z arytmetyki okna musza dac te same daty co przejscie po wszystkich wystapieniach od startu
+        rules = ["daily", "every 4 days", "weekly", "every 3 weeks", "monthly", "every 5 months",
+                 "monthly count 7", "every 2 days until 2026-04-20"]
+        starts = ["2026-01-31", "2026-02-28", "2026-03-15"]
+        bounds = [None, "2026-01-01", "2026-02-28", "2026-03-31", "2026-06-30", "2026-12-31"]
+        for rule, start in itertools.product(rules, starts):
+            recurrence = Recurrence.parse(rule)
+            start = day(start)
+            walk = list(recurrence.dates(start, None, day("2027-12-31")))
+            for min_date, max_date in itertools.product(bounds, bounds[1:]):
+                min_date, max_date = min_date and day(min_date), day(max_date)
+                expected = [date for date in walk if (min_date is None or date >= min_date) and date <= max_date]
+                with self.subTest(rule=rule, start=start, min_date=min_date, max_date=max_date):
+                    self.assertEqual(list(recurrence.dates(start, min_date, max_date)), expected)
+
+
+class RecurrenceParseTest(unittest.TestCase):
+    def test_round_trip(self):
+        for text in ["daily", "weekly", "monthly", "every 3 days", "every 2 weeks until 2026-06-30",
+                     "monthly count 12"]:
+            with self.subTest(text=text):
+                self.assertEqual(str(Recurrence.parse(text)), text)
+        self.assertEqual(str(Recurrence.parse("Every 1 Day")), "daily")
+
+    def test_invalid_rules(self):
+        for text in ["", "yearly", "every days", "every 0 days", "daily count 0", "daily until tomorrow",
+                     "weekly count 2 until 2026-01-01", "monthly extra"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    Recurrence.parse(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller import CSVStorage, PlannerController
+from reminders import ReminderScheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTimers:
+    # Jeden timer naraz jak w widokach; pamieta chwile wywolania wedlug zegara testu
+    def __init__(self, clock):
+        self.clock = clock
+        self.pending = {}
+        self.handles = 0
+
+    def set_timer(self, delay, callback):
+        self.handles += 1
+        self.pending[self.handles] = (self.clock() + timedelta(seconds=delay), callback)
+        return self.handles
+
+    def cancel_timer(self, handle):
+        del self.pending[handle]
+
+    def advance(self, now):
+        # Przesuwa zegar i wywoluje timery, ktorych czas minal (takze te nastawione w trakcie)
+        self.clock.now = now
+        while True:
+            due = [(when, handle) for handle, (when, _) in self.pending.items() if when <= now]
+            if not due:
+                return
+            _, handle = min(due)
+            _, callback = self.pending.pop(handle)
+            callback()
+
+
+class ReminderSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.controller = PlannerController(CSVStorage(os.path.join(self.directory.name, "tasks.csv"),
+                                                       os.path.join(self.directory.name, "errors.log")))
+        self.addCleanup(self.controller.close)
+        self.clock = FakeClock(datetime(2026, 3, 10, 9, 0))
+        self.timers = FakeTimers(self.clock)
+        self.fired = []
+
+    def add(self, *entries):
+        self.assertIsNone(self.controller.add_tasks([entry + (None,) * (5 - len(entry)) for entry in entries]))
+
+    def task(self, title):
+        tasks, _ = self.controller.get_filtered_tasks(0, 1000)
+        return next(task for task in tasks if task.title == title)
+
+    def scheduler(self):
+        scheduler = ReminderScheduler(self.controller, lambda tasks: self.fired.append([task.title for task in tasks]),
+                                      self.timers.set_timer, self.timers.cancel_timer, clock=self.clock)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def urgent(self, scheduler, count=10):
+        return [task.title for task in scheduler.most_urgent(count)]
+
+    def test_most_urgent_orders_by_date_then_priority(self):
+        self.add(("Low", "", "2026-03-12", "1"), ("High", "", "2026-03-12", "5"), ("None", "", "2026-03-12"),
+                 ("Tomorrow", "", "2026-03-11", "2"), ("Past", "", "2026-03-09", "5"), ("Undated", "", "", "5"))
+        scheduler = self.scheduler()
+        self.assertEqual(self.urgent(scheduler), ["Tomorrow", "High", "Low", "None"])
+        self.assertEqual(self.urgent(scheduler, 2), ["Tomorrow", "High"])
+        # Pierwszy termin jutro o polnocy, ale timer budzi sie najpozniej po MAX_SLEEP
+        [(when, _)] = self.timers.pending.values()
+        self.assertEqual(when, self.clock.now + timedelta(seconds=ReminderScheduler.MAX_SLEEP))
+
+    def test_edit_and_delete_leave_no_stale_reminders(self):
+        self.add(("Moved", "", "2026-03-11", "1"), ("Deleted", "", "2026-03-11", "3"), ("Kept", "", "2026-03-11"))
+        scheduler = self.scheduler()
+        moved = self.task("Moved")
+        # Edycja tam i z powrotem zostawia w kopcu dwa rowne wpisy i jeden martwy
+        self.assertIsNone(self.controller.edit_task(moved, new_date="2026-03-20"))
+        self.assertIsNone(self.controller.edit_task(self.task("Moved"), new_date="2026-03-11"))
+        self.assertIsNone(self.controller.edit_task(self.task("Kept"), new_priority="4"))
+        self.controller.delete_task(self.task("Deleted").id)
+        self.assertEqual(self.urgent(scheduler), ["Kept", "Moved"])
+
+        self.timers.advance(datetime(2026, 3, 11, 0, 0))
+        self.assertEqual(self.fired, [["Kept", "Moved"]])
+        self.timers.advance(datetime(2026, 3, 25))
+        self.assertEqual(self.fired, [["Kept", "Moved"]])
+        self.assertEqual(len(self.timers.pending), 0)
+
+    def test_roll_over_drops_yesterday_and_rearms_series(self):
+        self.add(("Once", "", "2026-03-10", "2"), ("Series", "", "2026-03-08", "1", "every 2 days"),
+                 ("Later", "", "2026-03-13"))
+        scheduler = self.scheduler()
+        self.assertEqual(self.urgent(scheduler), ["Once", "Series", "Later"])
+        self.timers.advance(datetime(2026, 3, 10, 9, 0, 1))
+        self.assertEqual(self.fired, [["Once", "Series"]])
+        # Przypomniane dzisiaj nadal sa najpilniejsze
+        self.assertEqual(self.urgent(scheduler), ["Once", "Series", "Later"])
+
+        self.clock.now = datetime(2026, 3, 11, 8, 0)
+        self.assertEqual(self.urgent(scheduler), ["Series", "Later"])
+        self.assertEqual([task.date for task in scheduler.most_urgent(1)], [datetime(2026, 3, 12)])
+
+        self.timers.advance(datetime(2026, 3, 12, 0, 0))
+        self.assertEqual(self.fired, [["Once", "Series"], ["Series"]])
+        self.timers.advance(datetime(2026, 3, 13, 0, 0))
+        self.assertEqual(self.fired, [["Once", "Series"], ["Series"], ["Later"]])
+        self.assertEqual([(task.title, task.date) for task in scheduler.most_urgent(3)],
+                         [("Later", datetime(2026, 3, 13)), ("Series", datetime(2026, 3, 14))])
+
+
+if __name__ == "__main__":
+    unittest.main()
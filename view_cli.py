@@ -1,8 +1,23 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from rich.text import Text
 from textual.app import App, on
+from textual.binding import Binding
 from textual.containers import Grid, Horizontal, Vertical
-from textual.widgets import Footer, Header, DataTable, Label, Button, Static, Input
+from textual.widgets import Footer, Header, DataTable, Label, Button, Static, Input, Checkbox
 from textual.screen import Screen
+from textual.widgets.data_table import RowKey
+
+from aggregates import heatmap_grid, heatmap_level, heatmap_window
+from reminders import ReminderScheduler
+
+
+class TaskCell(str):
+    # Tekst komorki z doczepionym kluczem wiersza i id zadania - DataTable.sort przekazuje tylko wartosci komorek
+    def __new__(cls, value, key, task_id):
+        cell = super().__new__(cls, value)
+        cell.key = key
+        cell.task_id = task_id
+        return cell
 
 
 class CLI_PlannerApp(App):
@@ -10,24 +25,51 @@ class CLI_PlannerApp(App):
 
     SORT_TYPES = ["Sort By: Date ASC", "Sort By: Date DESC", "Sort By: Priority ASC", "Sort By: Priority DESC"]
 
+    COLUMN_KEYS = ("title", "description", "date", "priority", "recurrence")
+
+    # Tabela trzyma jedna strone widoku - pamiec i czas odswiezenia nie zaleza od liczby zadan
+    PAGE_SIZE = 100
+    URGENT_COUNT = 10
+
     BINDINGS = [
         ("s", "sort", "Change Sorting Type"),
         ("f", "filter", "Filter"),
         ("a", "add_task", "Add Task"),
         ("e", "edit_task", "Edit Task"),
         ("d", "delete_task", "Delete Task"),
+        ("p", "show_stats", "Stats"),
+        ("h", "show_heatmap", "Load Heatmap"),
+        ("u", "show_urgent", "Most Urgent"),
         ("q", "quit_app", "Quit"),
+        # Priorytet - inaczej PageUp/PageDown przewijalaby sama tabela
+        Binding("pageup", "previous_page", "Previous Page", priority=True),
+        Binding("pagedown", "next_page", "Next Page", priority=True),
     ]
 
-    def __init__(self, controller):
+    def __init__(self, controller, on_ready=None):
         super().__init__()
         self.controller = controller
+        self.ready_callback = on_ready
         self.tasks_table = DataTable()
         self.sort_index = 0
+        # Wiersze sa kluczowane task.key - wystapienia jednej serii maja wspolne id
+        self.shown_keys = []
+        self.row_cells = {}
+        self.page_offset = 0
+        self.total_tasks = 0
+        self.reminders = None
+        self.updated_ids = set()
+        # Po wczytaniu wszystkiego od nowa (np. kompaktowanie w innym procesie) kazdy wiersz mogl sie zmienic
+        self.rows_stale = False
+        self.controller.add_listener(self.on_tasks_changed)
 
     def compose(self):
         yield Header()
-        self.tasks_table.add_columns("Title", "Description", "Date", "Priority")
+        self.tasks_table.add_column("Title", key="title")
+        self.tasks_table.add_column("Description", key="description")
+        self.tasks_table.add_column("Date", key="date")
+        self.tasks_table.add_column("Priority", key="priority")
+        self.tasks_table.add_column("Repeat", key="recurrence")
         self.tasks_table.zebra_stripes = True
         self.tasks_table.cursor_type = "row"
         self.tasks_table.focus()
@@ -49,40 +91,154 @@ class CLI_PlannerApp(App):
         self.title = "Task Planner"
         self.sub_title = "Manage your tasks"
         self.load_tasks()
+        if self.controller.loading:
+            self.sub_title = "Loading tasks..."
+            self.set_timer(0.01, self.load_next_chunk)
+        else:
+            self.call_after_refresh(self.start_reminders)
+        self.set_interval(1.0, self.poll_external_changes)
+
+    def start_reminders(self):
+        # Kolejka przypomnien po wczytaniu wszystkich zadan i po pierwszej klatce - nie opoznia startu
+        if self.reminders is None:
+            self.reminders = ReminderScheduler(self.controller, self.show_reminders, self.set_timer,
+                                               lambda timer: timer.stop())
+
+    def show_reminders(self, tasks):
+        titles = ", ".join(task.title for task in tasks[:5])
+        more = f" and {len(tasks) - 5} more" if len(tasks) > 5 else ""
+        self.notify(f"{titles}{more}", title=f"Due: {len(tasks)} task(s)", timeout=10)
+
+    def poll_external_changes(self):
+        # Zmiany zapisane przez inne procesy - odswiezamy tylko zmienione wiersze
+        if self.controller.sync():
+            self.load_tasks()
+
+    def on_ready(self):
+        # Zdarzenie Ready przychodzi po wyswietleniu pierwszej klatki
+        if self.ready_callback is not None:
+            self.ready_callback()
+
+    def load_next_chunk(self):
+        # Kolejne porcje doczytujemy miedzy zdarzeniami, interfejs pozostaje responsywny
+        if self.controller.load_next_chunk():
+            self.sub_title = f"Loading tasks... ({len(self.controller.tasks)})"
+            self.load_tasks()
+            self.set_timer(0.01, self.load_next_chunk)
+        else:
+            self.show_page_status()
+            self.start_reminders()
+
+    def on_tasks_changed(self, event, task_ids):
+        if event == "reordered":
+            # Nowy filtr albo sortowanie - wracamy na pierwsza strone
+            self.page_offset = 0
+        elif event == "updated":
+            self.updated_ids.update(task_ids)
+        elif event == "removed":
+            self.updated_ids.difference_update(task_ids)
+        elif event == "reloaded":
+            self.rows_stale = True
+
+    @staticmethod
+    def format_row(task):
+        return (
+            TaskCell(task.title, task.key, task.id),
+            task.description,
+            task.date.strftime("%Y-%m-%d") if task.date else "",
+            task.priority,
+            str(task.recurrence) if task.recurrence else "",
+        )
 
     def load_tasks(self):
         tasks_table = self.query_one(DataTable)
-        tasks_table.clear()
-        self.controller.sort_tasks_by_key()
-        tasks = self.controller.get_filtered_tasks()
+        tasks, self.total_tasks = self.controller.get_filtered_tasks(self.page_offset, self.PAGE_SIZE)
+        if not tasks and self.page_offset and self.total_tasks:
+            # Lista sie skrocila - pokazujemy ostatnia strone
+            self.page_offset = (self.total_tasks - 1) // self.PAGE_SIZE * self.PAGE_SIZE
+            tasks, self.total_tasks = self.controller.get_filtered_tasks(self.page_offset, self.PAGE_SIZE)
+        new_keys = [task.key for task in tasks]
+        self.show_page_status()
+
+        if new_keys == self.shown_keys and not self.updated_ids and not self.rows_stale:
+            self.query_one("#title").update("")
+            return
 
+        cursor_key = None
+        if tasks_table.row_count:
+            try:
+                cursor_key = tasks_table.coordinate_to_cell_key(tasks_table.cursor_coordinate).row_key
+            except IndexError:
+                cursor_key = None
+
+        new_set = set(new_keys)
+        kept_keys = [key for key in self.shown_keys if key in new_set]
+        for key in self.shown_keys:
+            if key not in new_set:
+                tasks_table.remove_row(RowKey(key))
+                del self.row_cells[key]
+
+        kept_set = set(kept_keys)
         for task in tasks:
-            tasks_table.add_row(
-                task.title,
-                task.description,
-                task.date.strftime("%Y-%m-%d"),
-                task.priority,
-                key=task.id
-            )
+            if task.key not in kept_set:
+                cells = self.format_row(task)
+                self.row_cells[task.key] = cells
+                tasks_table.add_row(*cells, key=task.key)
+                kept_keys.append(task.key)
+            elif self.rows_stale or task.id in self.updated_ids:
+                cells = self.format_row(task)
+                for column_key, old_value, new_value in zip(self.COLUMN_KEYS, self.row_cells[task.key], cells):
+                    if old_value != new_value:
+                        tasks_table.update_cell(RowKey(task.key), column_key, new_value)
+                self.row_cells[task.key] = cells
+        self.updated_ids.clear()
+        self.rows_stale = False
+
+        if kept_keys != new_keys:
+            # Zmienila sie tylko kolejnosc - przestawiamy istniejace wiersze bez ich odtwarzania
+            positions = {key: position for position, key in enumerate(new_keys)}
+            tasks_table.sort("title", key=lambda cell: positions[cell.key])
+        self.shown_keys = new_keys
+
+        if cursor_key is not None and cursor_key.value in new_set:
+            tasks_table.move_cursor(row=tasks_table.get_row_index(cursor_key))
         self.query_one("#title").update("")
 
+    def show_page_status(self):
+        if self.controller.loading:
+            return
+        first = min(self.page_offset + 1, self.total_tasks)
+        last = min(self.page_offset + self.PAGE_SIZE, self.total_tasks)
+        self.sub_title = f"Tasks {first}-{last} of {self.total_tasks}"
+
+    def action_next_page(self):
+        if self.page_offset + self.PAGE_SIZE >= self.total_tasks:
+            return
+        self.page_offset += self.PAGE_SIZE
+        self.load_tasks()
+        self.tasks_table.move_cursor(row=0)
+
+    def action_previous_page(self):
+        if not self.page_offset:
+            self.tasks_table.move_cursor(row=0)
+            return
+        self.page_offset = max(0, self.page_offset - self.PAGE_SIZE)
+        self.load_tasks()
+        self.tasks_table.move_cursor(row=self.tasks_table.row_count - 1)
+
     @on(Button.Pressed, "#sort")
     def action_sort(self):
         self.sort_index = (self.sort_index + 1) % len(self.SORT_TYPES)
         self.query_one("#sort").label = self.SORT_TYPES[self.sort_index]
 
         if self.sort_index == 0:
-            self.controller.sort_key = "date"
-            self.controller.sort_reverse = False
+            self.controller.set_sort("date", False)
         elif self.sort_index == 1:
-            self.controller.sort_key = "date"
-            self.controller.sort_reverse = True
+            self.controller.set_sort("date", True)
         elif self.sort_index == 2:
-            self.controller.sort_key = "priority"
-            self.controller.sort_reverse = False
+            self.controller.set_sort("priority", False)
         elif self.sort_index == 3:
-            self.controller.sort_key = "priority"
-            self.controller.sort_reverse = True
+            self.controller.set_sort("priority", True)
 
         self.load_tasks()
 
@@ -107,7 +263,7 @@ class CLI_PlannerApp(App):
             row_key = cell_key.row_key
 
             if row_key:
-                self.push_screen(EditTaskDialog(self.controller, row_key.value))
+                self.push_screen(EditTaskDialog(self.controller, self.row_cells[row_key.value][0].task_id))
         except IndexError:
             self.query_one("#title").update("No task selected.")
 
@@ -124,11 +280,29 @@ class CLI_PlannerApp(App):
             row_key = cell_key.row_key
 
             if row_key:
-                self.push_screen(DeleteConfirm(self.controller, row_key.value))
+                self.push_screen(DeleteConfirm(self.controller, self.row_cells[row_key.value][0].task_id))
         except IndexError:
             self.query_one("#title").update("No task selected.")
 
+    def action_show_stats(self):
+        if self.controller.profiler is None:
+            self.query_one("#title").update("Profiling is off. Run with --profile to collect stats.")
+            return
+        self.push_screen(StatsScreen(self.controller.profiler))
+
+    def action_show_heatmap(self):
+        self.push_screen(HeatmapScreen(self.controller))
+
+    def action_show_urgent(self):
+        if self.reminders is None:
+            self.query_one("#title").update("Tasks are still loading.")
+            return
+        self.push_screen(UrgentScreen(self.reminders.most_urgent(self.URGENT_COUNT)))
+
     def action_quit_app(self):
+        if self.reminders is not None:
+            self.reminders.close()
+        self.controller.close()
         self.exit()
 
 
@@ -162,6 +336,8 @@ class FilterDialog(Screen):
             Input(value=max_priority_value, id="input_max_priority"),
             Label("Filter by Name:"),
             Input(value=self.controller.filtered_name, id="input_name"),
+            Label("Search in Descriptions:"),
+            Checkbox(value=self.controller.filtered_descriptions, id="input_descriptions"),
             Button("Clear Filters", variant="default", id="clear_filters"),
             Button("Apply", variant="success", id="apply"),
             id="filter-dialog"
@@ -176,7 +352,7 @@ class FilterDialog(Screen):
         input_min_priority = self.query_one("#input_min_priority")
         input_max_priority = self.query_one("#input_max_priority")
         input_name = self.query_one("#input_name")
-
+        input_descriptions = self.query_one("#input_descriptions")
 
         min_date, max_date = self.controller.get_min_max_dates()
 
@@ -185,6 +361,7 @@ class FilterDialog(Screen):
         input_min_priority.value = "1"
         input_max_priority.value = "5"
         input_name.value = ""
+        input_descriptions.value = False
 
     @on(Button.Pressed, "#apply")
     def apply_filter(self):
@@ -193,6 +370,7 @@ class FilterDialog(Screen):
         min_priority_input = self.query_one("#input_min_priority").value
         max_priority_input = self.query_one("#input_max_priority").value
         name_input = self.query_one("#input_name").value
+        descriptions_input = self.query_one("#input_descriptions").value
 
         min_date, max_date = self.controller.get_min_max_dates()
 
@@ -201,7 +379,8 @@ class FilterDialog(Screen):
             max_date_input or max_date.strftime("%Y-%m-%d"),
             min_priority_input or "1",
             max_priority_input or "5",
-            name_input
+            name_input,
+            descriptions_input
         ))
 
         if error_message:
@@ -228,6 +407,8 @@ class AddTaskDialog(Screen):
             Input(placeholder=today_date, id="input_date"),
             Label("Priority:"),
             Input(placeholder="3", id="input_priority"),
+            Label("Repeat:"),
+            Input(placeholder="daily, weekly, monthly, every 3 days... (optional)", id="input_recurrence"),
             Static(),
             Button("Cancel", variant="error", id="cancel"),
             Button("Ok", variant="success", id="ok"),
@@ -240,8 +421,9 @@ class AddTaskDialog(Screen):
         description = self.query_one("#input_description").value or "Task Description"
         date = self.query_one("#input_date").value or datetime.now().strftime("%Y-%m-%d")
         priority = self.query_one("#input_priority").value or "3"
+        recurrence = self.query_one("#input_recurrence").value
 
-        error_message = self.controller.add_task(title, description, date, priority)
+        error_message = self.controller.add_task(title, description, date, priority, recurrence)
 
         if error_message:
             self.query_one("#title").update(f"{error_message}")
@@ -268,9 +450,14 @@ class EditTaskDialog(Screen):
             Label("Description:"),
             Input(value=self.current_task.description, id="input_description"),
             Label("Date:"),
-            Input(value=self.current_task.date.strftime("%Y-%m-%d"), id="input_date"),
+            Input(value=self.current_task.date.strftime("%Y-%m-%d") if self.current_task.date else "",
+                  id="input_date"),
             Label("Priority:"),
-            Input(value=str(self.current_task.priority), id="input_priority"),
+            Input(value=str(self.current_task.priority) if self.current_task.priority is not None else "",
+                  id="input_priority"),
+            Label("Repeat:"),
+            Input(value=str(self.current_task.recurrence) if self.current_task.recurrence else "",
+                  placeholder="none", id="input_recurrence"),
             Static(),
             Button("Cancel", variant="error", id="cancel"),
             Button("Save", variant="success", id="save"),
@@ -283,13 +470,16 @@ class EditTaskDialog(Screen):
         new_description = self.query_one("#input_description").value
         new_date = self.query_one("#input_date").value
         new_priority = self.query_one("#input_priority").value
+        # Puste pole usuwa powtarzanie
+        new_recurrence = self.query_one("#input_recurrence").value or "none"
 
         error_message = self.controller.edit_task(
             self.current_task,
             new_title,
             new_description,
             new_date,
-            new_priority
+            new_priority,
+            new_recurrence
         )
 
         if error_message:
@@ -328,3 +518,119 @@ class DeleteConfirm(Screen):
     @on(Button.Pressed, "#cancel")
     def cancel(self):
         self.app.pop_screen()
+
+
+class StatsScreen(Screen):
+    COLUMNS = ("Operation", "Calls", "Total [ms]", "Mean [ms]", "p95 [ms]", "Max [ms]", "Alloc [KiB]")
+
+    def __init__(self, profiler):
+        super().__init__()
+        self.profiler = profiler
+        self.stats_table = DataTable()
+
+    def compose(self):
+        for column in self.COLUMNS:
+            self.stats_table.add_column(column)
+        self.stats_table.zebra_stripes = True
+        yield Grid(
+            Label("Operation Stats", id="title"),
+            self.stats_table,
+            Label("", id="counters"),
+            Button("Close", variant="default", id="close"),
+            id="stats-dialog"
+        )
+
+    def on_mount(self):
+        self.refresh_stats()
+        self.set_interval(1.0, self.refresh_stats)
+
+    def refresh_stats(self):
+        self.stats_table.clear()
+        for name, calls, total, mean, p95, slowest, allocated in self.profiler.rows():
+            self.stats_table.add_row(name, calls, f"{total:.1f}", f"{mean:.3f}", f"{p95:.3f}", f"{slowest:.3f}",
+                                     f"{allocated:.1f}" if allocated is not None else "-")
+        counters = self.profiler.snapshot()["counters"]
+        self.query_one("#counters").update(", ".join(f"{name}: {value}" for name, value in counters.items()))
+
+    @on(Button.Pressed, "#close")
+    def close(self):
+        self.app.pop_screen()
+
+
+class HeatmapScreen(Screen):
+    # Liczba zadan na dzien z licznikow kontrolera - bez przegladania zadan
+    WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    COLORS = ("grey23", "dark_green", "green4", "green3", "green1")
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+
+    def compose(self):
+        yield Grid(
+            Label("Load Heatmap", id="title"),
+            Static(id="heatmap"),
+            Button("Close", variant="default", id="close"),
+            id="heatmap-dialog"
+        )
+
+    def on_mount(self):
+        start, end = heatmap_window(self.controller)
+        summary = self.controller.get_summary(start, end)
+        grid = heatmap_grid(summary["days"], start, end)
+        peak = max(max(row) for row in grid)
+        self.query_one("#title").update(
+            f"Load Heatmap {start.strftime('%Y-%m-%d')} - {end.strftime('%Y-%m-%d')} | "
+            f"Tasks: {summary['total']}, undated: {summary['undated']}, recurring: {summary['recurring']}, "
+            f"busiest day: {peak}")
+
+        text = Text()
+        # Skrot miesiaca nad pierwszym tygodniem miesiaca, jesli zmiesci sie obok poprzedniego
+        months = [" "] * (len(grid[0]) * 2 + 4)
+        last_label = -4
+        for week in range(len(grid[0])):
+            date = start + timedelta(weeks=week)
+            position = 4 + week * 2
+            if (week == 0 or date.day <= 7) and position - last_label >= 4:
+                months[position:position + 3] = date.strftime("%b")
+                last_label = position
+        text.append("".join(months).rstrip() + "\n")
+        for weekday, row in enumerate(grid):
+            text.append(f"{self.WEEKDAYS[weekday]} ")
+            for count in row:
+                text.append("■ ", style=self.COLORS[heatmap_level(count, peak)])
+            text.append("\n")
+        priorities = sorted(summary["priorities"].items(), key=lambda item: item[0] or 0)
+        text.append("\n" + "  ".join(f"P{priority or '-'}: {count}" for priority, count in priorities))
+        self.query_one("#heatmap").update(text)
+
+    @on(Button.Pressed, "#close")
+    def close(self):
+        self.app.pop_screen()
+
+
+class UrgentScreen(Screen):
+    COLUMNS = ("Date", "Priority", "Title", "Description")
+
+    def __init__(self, tasks):
+        super().__init__()
+        self.tasks = tasks
+        self.urgent_table = DataTable()
+
+    def compose(self):
+        for column in self.COLUMNS:
+            self.urgent_table.add_column(column)
+        self.urgent_table.zebra_stripes = True
+        for task in self.tasks:
+            self.urgent_table.add_row(task.date.strftime("%Y-%m-%d"), task.priority if task.priority else "-",
+                                      task.title, task.description)
+        yield Grid(
+            Label("Most Urgent Tasks" if self.tasks else "No upcoming tasks.", id="title"),
+            self.urgent_table,
+            Button("Close", variant="default", id="close"),
+            id="urgent-dialog"
+        )
+
+    @on(Button.Pressed, "#close")
+    def close(self):
+        self.app.pop_screen()
@@ -1,14 +1,22 @@
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from aggregates import heatmap_grid, heatmap_level, heatmap_window
+from reminders import ReminderScheduler
 
 class GUI_PlannerApp():
-    def __init__(self, controller):
+    ROW_HEIGHT = 25
+    BUFFER_ROWS = 20
+    URGENT_COUNT = 10
+
+    def __init__(self, controller, on_ready=None):
         self.controller = controller
         self.window = tk.Tk()
         self.window.title("Task Planner")
         self.window.geometry("1050x500")
         self.window.config(bg="gray")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.sort_index = 0
         self.SORT_TYPES = ["Sort By: Date ASC", "Sort By: Date DESC", "Sort By: Priority ASC", "Sort By: Priority DESC"]
@@ -37,6 +45,12 @@ class GUI_PlannerApp():
         self.delete_button = tk.Button(left_frame, text="Delete Task", command=self.delete_task, font=("Noto Sans", 9), width=30, height=1, fg="white",  bg="red")
         self.delete_button.pack(fill="x", pady=5)
 
+        self.heatmap_button = tk.Button(left_frame, text="Load Heatmap", command=self.show_heatmap, font=("Noto Sans", 9), width=30, height=1, fg="white",  bg="gray")
+        self.heatmap_button.pack(fill="x", pady=5)
+
+        self.urgent_button = tk.Button(left_frame, text="Most Urgent", command=self.show_urgent, font=("Noto Sans", 9), width=30, height=1, fg="white",  bg="gray")
+        self.urgent_button.pack(fill="x", pady=5)
+
         style = ttk.Style()
 
         style.theme_use("clam")
@@ -44,7 +58,7 @@ class GUI_PlannerApp():
         style.configure("Treeview", 
                         background="gray",
                         foreground="black",
-                        rowheight=25,
+                        rowheight=self.ROW_HEIGHT,
                         fieldbackground="silver",
                         font=("Noto Sans", 8))
         
@@ -59,79 +73,181 @@ class GUI_PlannerApp():
                                                  "De", 
                                                  "Da", 
                                                  "P", 
+                                                 "R", 
                                                  "ID"), 
-                                        show="headings")
+                                        show="headings",
+                                        yscrollcommand=self.on_table_scrolled)
         
         self.tasks_table.column("T", width=140, stretch=True)
         self.tasks_table.column("De", width=500, stretch=True)
         self.tasks_table.column("Da", width=80, stretch=True, anchor="center")
         self.tasks_table.column("P", width=60, stretch=True, anchor="center")
+        self.tasks_table.column("R", width=100, stretch=True, anchor="center")
         self.tasks_table.column("ID", width=0, stretch=False)
 
         self.tasks_table.heading("T", text="Title")
         self.tasks_table.heading("De", text="Description")
         self.tasks_table.heading("Da", text="Date")
         self.tasks_table.heading("P", text="Priority")
+        self.tasks_table.heading("R", text="Repeat")
         self.tasks_table.heading("ID", text="")
 
         self.tasks_table.tag_configure('oddrow', background="lightblue")
         self.tasks_table.tag_configure('evenrow', background="silver")
 
+        # Tabela trzyma tylko widoczne wiersze i bufor, pasek przewija cala przefiltrowana liste
+        self.scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
         self.tasks_table.pack(fill="both", expand=True)
+        self.tasks_table.bind("<Configure>", self.on_table_resized)
+
+        self.window_offset = 0
+        self.visible_rows = int(self.tasks_table.cget("height"))
+        self.rendered_range = None
+        self.total_tasks = 0
+        self.reminders = None
 
         self.load_tasks()
+        if self.controller.loading:
+            self.title_label.config(text="Task Planner - Loading tasks...")
+            self.window.after(10, self.load_next_chunk)
+        self.window.after(1000, self.poll_external_changes)
+        if on_ready is not None:
+            # Pierwsze bezczynne wywolanie nastepuje po narysowaniu okna
+            self.window.after_idle(on_ready)
+        if not self.controller.loading:
+            self.window.after_idle(self.start_reminders)
+
+    def load_next_chunk(self):
+        # Kolejne porcje doczytujemy miedzy zdarzeniami, okno pozostaje responsywne
+        if self.controller.load_next_chunk():
+            self.title_label.config(text=f"Task Planner - Loading tasks... ({len(self.controller.tasks)})")
+            self.load_tasks()
+            self.window.after(10, self.load_next_chunk)
+        else:
+            self.title_label.config(text="Task Planner - Manage your tasks")
+            self.start_reminders()
+
+    def start_reminders(self):
+        # Kolejka przypomnien po wczytaniu wszystkich zadan i po narysowaniu okna - nie opoznia startu
+        if self.reminders is None:
+            self.reminders = ReminderScheduler(self.controller, self.show_reminders,
+                                               lambda delay, callback: self.window.after(int(delay * 1000), callback),
+                                               self.window.after_cancel)
+
+    def show_reminders(self, tasks):
+        titles = ", ".join(task.title for task in tasks[:5])
+        more = f" and {len(tasks) - 5} more" if len(tasks) > 5 else ""
+        self.show_message_window(f"Due: {titles}{more}")
+
+    def poll_external_changes(self):
+        # Zmiany zapisane przez inne procesy (wspolny plik zadan)
+        if self.controller.sync():
+            self.load_tasks()
+        self.window.after(1000, self.poll_external_changes)
 
     def load_tasks(self):
-        self.tasks_table.delete(*self.tasks_table.get_children())
-        self.controller.sort_tasks_by_key()
-        tasks = self.controller.get_filtered_tasks()
-        count=0
-
-        for task in tasks:
-            if count % 2 == 0: 
+        self.rendered_range = None
+        self.render_window()
+
+    def fetch_window(self):
+        # Z kontrolera tylko strona z widocznymi wierszami i buforem oraz liczba wszystkich trafien
+        start = max(0, self.window_offset - self.BUFFER_ROWS)
+        limit = self.window_offset + self.visible_rows + self.BUFFER_ROWS - start
+        tasks, self.total_tasks = self.controller.get_filtered_tasks(start, limit)
+        if self.window_offset > max(0, self.total_tasks - self.visible_rows):
+            # Lista sie skrocila ponizej pozycji okna - pobieramy koniec listy
+            self.window_offset = max(0, self.total_tasks - self.visible_rows)
+            start = max(0, self.window_offset - self.BUFFER_ROWS)
+            tasks, self.total_tasks = self.controller.get_filtered_tasks(start, limit)
+        return start, tasks
+
+    def render_window(self):
+        total = self.total_tasks
+        self.window_offset = max(0, min(self.window_offset, total - self.visible_rows))
+
+        start, end = self.rendered_range or (0, 0)
+        margin = self.BUFFER_ROWS // 4
+        if (self.rendered_range is None or self.window_offset - start < margin and start > 0
+                or end - (self.window_offset + self.visible_rows) < margin and end < total):
+            start, tasks = self.fetch_window()
+            total = self.total_tasks
+            end = start + len(tasks)
+            self.tasks_table.delete(*self.tasks_table.get_children())
+
+            for index, task in enumerate(tasks, start):
                 self.tasks_table.insert(
                     "", 
                     "end", 
+                    iid=str(task.key),
                     values=(
                         task.title, 
                         task.description, 
-                        task.date.strftime("%Y-%m-%d"), 
-                        task.priority, 
+                        task.date.strftime("%Y-%m-%d") if task.date else "", 
+                        task.priority if task.priority is not None else "", 
+                        str(task.recurrence) if task.recurrence else "",
                         task.id
                     ),
-                    tags=('evenrow',)
+                    tags=('evenrow',) if index % 2 == 0 else ('oddrow',)
                 )
-            else:
-                self.tasks_table.insert(
-                    "", 
-                    "end", 
-                    values=(
-                        task.title, 
-                        task.description, 
-                        task.date.strftime("%Y-%m-%d"), 
-                        task.priority, 
-                        task.id
-                    ),
-                    tags=('oddrow',)
-                )                
-            count += 1
+            self.rendered_range = (start, end)
+
+        self.tasks_table.yview_moveto((self.window_offset - start) / max(1, end - start))
+        self.update_scrollbar(total)
+
+    def update_scrollbar(self, total):
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.window_offset / total, (self.window_offset + self.visible_rows) / total)
+
+    def scroll_to(self, offset):
+        self.window_offset = int(offset)
+        self.render_window()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total_tasks)
+        elif unit == "pages":
+            self.scroll_to(self.window_offset + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self.window_offset + int(amount))
+
+    def on_table_scrolled(self, first, last):
+        # Treeview przewinal sie sam (kolko myszy, strzalki) - przeliczamy pozycje w calej liscie
+        if self.rendered_range is None:
+            return
+        start, end = self.rendered_range
+        offset = start + round(float(first) * (end - start))
+        if offset != self.window_offset:
+            self.window_offset = offset
+            self.window.after_idle(self.render_window)
+
+    def on_table_resized(self, event):
+        visible_rows = max(1, event.height // self.ROW_HEIGHT - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render_window()
+
+    def on_close(self):
+        # Dopisanie zaleglych zmian z zapisu w tle przed zamknieciem okna
+        if self.reminders is not None:
+            self.reminders.close()
+        self.controller.close()
+        self.window.destroy()
 
     def change_sort(self):
         self.sort_index = (self.sort_index + 1) % len(self.SORT_TYPES)
         self.sort_button.config(text=self.SORT_TYPES[self.sort_index])
 
         if self.sort_index == 0:
-            self.controller.sort_key = "date"
-            self.controller.sort_reverse = False
+            self.controller.set_sort("date", False)
         elif self.sort_index == 1:
-            self.controller.sort_key = "date"
-            self.controller.sort_reverse = True
+            self.controller.set_sort("date", True)
         elif self.sort_index == 2:
-            self.controller.sort_key = "priority"
-            self.controller.sort_reverse = False
+            self.controller.set_sort("priority", False)
         elif self.sort_index == 3:
-            self.controller.sort_key = "priority"
-            self.controller.sort_reverse = True
+            self.controller.set_sort("priority", True)
 
         self.load_tasks()
 
@@ -167,6 +283,14 @@ class GUI_PlannerApp():
         
         DeleteConfirm(self, self.controller, selected_task)
 
+    def show_heatmap(self):
+        HeatmapWindow(self, self.controller)
+
+    def show_urgent(self):
+        if self.reminders is None:
+            self.show_message_window("Tasks are still loading.")
+            return
+        UrgentTasksWindow(self, self.reminders.most_urgent(self.URGENT_COUNT))
 
     def show_message_window(self, message, fg="black"):
         message_window = tk.Toplevel(self.window)
@@ -185,7 +309,7 @@ class FilterDialog:
         self.controller = controller
         self.dialog = tk.Toplevel()
         self.dialog.title("Filter Tasks")
-        self.dialog.geometry("400x450")
+        self.dialog.geometry("400x490")
         self.dialog.config(bg="gray")
         
         # Minimalna i maksymalna data
@@ -227,6 +351,10 @@ class FilterDialog:
         self.input_name.insert(0, self.controller.filtered_name)
         self.input_name.pack(pady=5)
 
+        self.search_descriptions = tk.BooleanVar(value=self.controller.filtered_descriptions)
+        self.input_descriptions = tk.Checkbutton(self.dialog, text="Search in descriptions", variable=self.search_descriptions, font=("Noto Sans", 9), bg="gray", fg="white", selectcolor="gray")
+        self.input_descriptions.pack(pady=5)
+
         self.error_label = tk.Label(self.dialog, text="", font=("Noto Sans", 12), fg="pink", bg="gray")
         self.error_label.pack(pady=5)
 
@@ -253,7 +381,8 @@ class FilterDialog:
             max_date_input or max_date.strftime("%Y-%m-%d"),
             min_priority_input or "1",
             max_priority_input or "5",
-            name_input
+            name_input,
+            self.search_descriptions.get()
         )
 
         if error_message:
@@ -276,6 +405,7 @@ class FilterDialog:
         self.input_max_priority.delete(0, tk.END)
         self.input_max_priority.insert(0, "5")
         self.input_name.delete(0, tk.END)
+        self.search_descriptions.set(False)
 
 class AddTaskDialog:
     def __init__(self, app, controller):
@@ -283,7 +413,7 @@ class AddTaskDialog:
         self.controller = controller
         self.dialog = tk.Toplevel(app.window)
         self.dialog.title("Add Task")
-        self.dialog.geometry("400x450")
+        self.dialog.geometry("400x510")
         self.dialog.config(bg="gray")
 
         today_date = datetime.now().strftime("%Y-%m-%d")
@@ -312,6 +442,11 @@ class AddTaskDialog:
         self.input_priority.insert(0, "3")
         self.input_priority.pack(pady=5)
 
+        self.recurrence_label = tk.Label(self.dialog, text="Repeat (daily, weekly, monthly, every 3 days...):", font=("Noto Sans", 9), bg="gray", fg="white")
+        self.recurrence_label.pack(pady=5)
+        self.input_recurrence = tk.Entry(self.dialog, font=("Noto Sans", 9))
+        self.input_recurrence.pack(pady=5)
+
         self.error_label = tk.Label(self.dialog, text="", fg="pink", font=("Noto Sans", 12), bg="gray")
         self.error_label.pack(pady=5)
 
@@ -327,8 +462,9 @@ class AddTaskDialog:
         description = self.input_description.get("1.0", "end-1c") or "Task Description"
         date = self.input_date.get() or datetime.now().strftime("%Y-%m-%d")
         priority = self.input_priority.get() or "3"
+        recurrence = self.input_recurrence.get()
 
-        error_message = self.controller.add_task(title, description, date, priority)
+        error_message = self.controller.add_task(title, description, date, priority, recurrence)
 
         if error_message:
             self.error_label.config(text=error_message)
@@ -344,9 +480,11 @@ class EditTaskDialog:
         self.app = app
         self.controller = controller
         self.selected_task = selected_task
+        # Wiersz moze byc wystapieniem zadania cyklicznego - data i regula z zapisanej serii
+        self.current_task = self.controller.get_task_by_id(self.app.tasks_table.item(self.selected_task)["values"][5])
         self.dialog = tk.Toplevel(app.window)
         self.dialog.title("Edit Task")
-        self.dialog.geometry("400x450")
+        self.dialog.geometry("400x510")
         self.dialog.config(bg="gray")
 
         self.title_label = tk.Label(self.dialog, text="Title:", font=("Noto Sans", 9), bg="gray", fg="white")
@@ -364,15 +502,21 @@ class EditTaskDialog:
         self.date_label = tk.Label(self.dialog, text="Date:", font=("Noto Sans", 9), bg="gray", fg="white")
         self.date_label.pack(pady=5)
         self.input_date = tk.Entry(self.dialog, font=("Noto Sans", 9))
-        self.input_date.insert(0, self.app.tasks_table.item(self.selected_task)["values"][2])
+        self.input_date.insert(0, self.current_task.date.strftime("%Y-%m-%d") if self.current_task.date else "")
         self.input_date.pack(pady=5)
 
         self.priority_label = tk.Label(self.dialog, text="Priority:", font=("Noto Sans", 9), bg="gray", fg="white")
         self.priority_label.pack(pady=5)
         self.input_priority = tk.Entry(self.dialog, font=("Noto Sans", 9))
-        self.input_priority.insert(0, self.app.tasks_table.item(self.selected_task)["values"][3])
+        self.input_priority.insert(0, self.current_task.priority if self.current_task.priority is not None else "")
         self.input_priority.pack(pady=5)
 
+        self.recurrence_label = tk.Label(self.dialog, text="Repeat (empty = none):", font=("Noto Sans", 9), bg="gray", fg="white")
+        self.recurrence_label.pack(pady=5)
+        self.input_recurrence = tk.Entry(self.dialog, font=("Noto Sans", 9))
+        self.input_recurrence.insert(0, str(self.current_task.recurrence) if self.current_task.recurrence else "")
+        self.input_recurrence.pack(pady=5)
+
         self.error_label = tk.Label(self.dialog, text="", fg="pink", font=("Noto Sans", 12), bg="gray")
         self.error_label.pack(pady=5)
 
@@ -387,14 +531,15 @@ class EditTaskDialog:
         new_description = self.input_description.get("1.0", "end-1c")
         new_date = self.input_date.get()
         new_priority = self.input_priority.get()
-        current_task = self.controller.get_task_by_id(self.app.tasks_table.item(self.selected_task)["values"][4])
+        new_recurrence = self.input_recurrence.get() or "none"
 
         error_message = self.controller.edit_task(
-            current_task,
+            self.current_task,
             new_title,
             new_description,
             new_date,
-            new_priority
+            new_priority,
+            new_recurrence
         )
 
         if error_message:
@@ -427,9 +572,71 @@ class DeleteConfirm:
         self.delete_button.pack(side="left", padx=10, pady=10)
 
     def delete(self):
-        self.controller.delete_task(self.app.tasks_table.item(self.selected_task)["values"][4])
+        self.controller.delete_task(self.app.tasks_table.item(self.selected_task)["values"][5])
         self.dialog.destroy()
         self.app.load_tasks()
 
     def cancel(self):
         self.dialog.destroy()
+
+class HeatmapWindow:
+    # Liczba zadan na dzien z licznikow kontrolera - bez przegladania zadan
+    CELL = 14
+    WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    COLORS = ("#3a3a3a", "#0e4429", "#006d32", "#26a641", "#39d353")
+
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+        start, end = heatmap_window(controller)
+        summary = controller.get_summary(start, end)
+        grid = heatmap_grid(summary["days"], start, end)
+        peak = max(max(row) for row in grid)
+        left, top = 40, 24
+        width = left + len(grid[0]) * self.CELL + 20
+        height = top + 7 * self.CELL + 20
+
+        self.dialog = tk.Toplevel(app.window)
+        self.dialog.title("Load Heatmap")
+        self.dialog.config(bg="gray")
+
+        self.info_label = tk.Label(self.dialog, text=f"{start.strftime('%Y-%m-%d')} - {end.strftime('%Y-%m-%d')} | Tasks: {summary['total']}, undated: {summary['undated']}, recurring: {summary['recurring']}, busiest day: {peak}", bg="gray", fg="white", font=("Noto Sans", 9))
+        self.info_label.pack(pady=5)
+
+        self.canvas = tk.Canvas(self.dialog, width=width, height=height, bg="gray", highlightthickness=0)
+        self.canvas.pack(padx=10)
+        for weekday, name in enumerate(self.WEEKDAYS):
+            self.canvas.create_text(left - 6, top + weekday * self.CELL + self.CELL // 2, text=name, anchor="e", fill="white", font=("Noto Sans", 7))
+        for week in range(len(grid[0])):
+            date = start + timedelta(weeks=week)
+            x = left + week * self.CELL
+            if week == 0 or date.day <= 7:
+                self.canvas.create_text(x, top - 8, text=date.strftime("%b"), anchor="w", fill="white", font=("Noto Sans", 7))
+            for weekday in range(7):
+                count = grid[weekday][week]
+                y = top + weekday * self.CELL
+                self.canvas.create_rectangle(x, y, x + self.CELL - 2, y + self.CELL - 2, fill=self.COLORS[heatmap_level(count, peak)], outline="")
+
+        priorities = sorted(summary["priorities"].items(), key=lambda item: item[0] or 0)
+        self.priority_label = tk.Label(self.dialog, text="  ".join(f"P{priority or '-'}: {count}" for priority, count in priorities), bg="gray", fg="white", font=("Noto Sans", 9))
+        self.priority_label.pack(pady=5)
+
+        self.close_button = tk.Button(self.dialog, text="Close", command=self.dialog.destroy, width=30, height=1, fg="white",  bg="gray")
+        self.close_button.pack(pady=10)
+
+class UrgentTasksWindow:
+    def __init__(self, app, tasks):
+        self.dialog = tk.Toplevel(app.window)
+        self.dialog.title("Most Urgent Tasks")
+        self.dialog.config(bg="gray")
+
+        if not tasks:
+            self.empty_label = tk.Label(self.dialog, text="No upcoming tasks.", bg="gray", fg="white", font=("Noto Sans", 9))
+            self.empty_label.pack(padx=20, pady=10)
+        for task in tasks:
+            label = tk.Label(self.dialog, text=f"{task.date.strftime('%Y-%m-%d')}   P{task.priority or '-'}   {task.title}", bg="gray", fg="white", font=("Noto Sans", 9), anchor="w")
+            label.pack(fill="x", padx=20)
+
+        self.close_button = tk.Button(self.dialog, text="Close", command=self.dialog.destroy, width=30, height=1, fg="white",  bg="gray")
+        self.close_button.pack(pady=10)